@@ -0,0 +1,159 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+
+# Online control of the GeneticEngine's mutation probability, mutation intensity and crossover
+# operator, so that a run does not depend on a hand-picked mutation_probability.
+#
+# Each generation the engine reports which children of the previous one were successes and which
+# of them were mutated. A success is a child fitter than the success_quantile of the population
+# it was bred from (the best tenth by default), i.e. one that advances the front of the search;
+# beating its own parents is not enough, since with a weak selection pressure such as roulette
+# the parents are often poor routes that any change improves. The controller keeps running
+# success rates and adjusts:
+# - the mutation probability and intensity by a success rule in the style of the 1/5th rule of
+#   evolution strategies: when mutated children succeed more often than the unmutated ones,
+#   mutation helps and both grow; when less often, mutation mostly destroys what crossover built
+#   and both shrink. The target is the success rate of the unmutated children rather than a
+#   fixed 1/5, because crossover alone already succeeds at a rate that depends on the selection
+#   method and on how far the run has converged;
+# - as diversity feedback, the probability also grows whenever the population's mean bond
+#   distance (diversity.DiversityTracker) falls below diversity_floor, i.e. the population is
+#   collapsing into clones;
+# - the crossover operator by probability matching: each generation breeds with one operator,
+#   drawn with a probability proportional to its running success rate (at least min_share each).
+
+# Cycle crossover keeps every city at its absolute position in one of the parents, which suits
+# tours poorly: above ~100 cities its children lag far behind, so it is opt-in
+DEFAULT_CROSSOVERS = ('ox', 'pmx')
+
+
+def _blend(average: float, value: float, weight: float) -> float:
+    return value if average is None else average + weight * (value - average)
+
+
+class AdaptiveController:
+    """
+    Adjusts an engine's mutation_probability, mutation_intensity and crossover every generation
+    and records their trajectory.
+
+    Parameters:
+    - probability_range (Tuple[float, float]): Bounds of the mutation probability.
+    - max_intensity (int): Largest mutation intensity (the smallest is 1).
+    - crossovers (Tuple[str, ...]): Crossover operators to choose from.
+    - success_quantile (float): A child succeeds if it beats this quantile of its parents' population.
+    - diversity_floor (float): Mean bond distance below which the mutation probability always grows.
+    - learning_rate (float): Strength of each multiplicative adjustment.
+    - rate_decay (float): Weight of the newest generation in the running success rates.
+    - min_share (float): Minimum probability of each crossover operator.
+    """
+
+    # Columns of the trajectory
+    FIELDS = ('generation', 'mutation_probability', 'mutation_intensity', 'crossover', 'success_rate',
+              'bond_distance')
+
+    def __init__(self, probability_range: Tuple[float, float] = (0.05, 0.9), max_intensity: int = 8,
+                 crossovers: Tuple[str, ...] = DEFAULT_CROSSOVERS, success_quantile: float = 0.1,
+                 diversity_floor: float = 0.05,
+                 learning_rate: float = 0.1, rate_decay: float = 0.1, min_share: float = 0.1):
+        if not crossovers:
+            raise ValueError("The controller needs at least one crossover operator")
+        self.probability_range = probability_range
+        self.max_intensity = max_intensity
+        self.crossovers = tuple(crossovers)
+        self.success_quantile = success_quantile
+        self.diversity_floor = diversity_floor
+        self.learning_rate = learning_rate
+        self.rate_decay = rate_decay
+        self.min_share = min(min_share, 1 / len(self.crossovers))
+        self.probability = None
+        self.intensity = None
+        # Running success rates of mutated and unmutated children, and of each crossover
+        self.mutated_rate = None
+        self.plain_rate = None
+        self.quality = {name: None for name in self.crossovers}
+        self.trajectory = []
+
+    def attach(self, engine) -> None:
+        """Start from the engine's configured values."""
+        low, high = self.probability_range
+        self.probability = min(max(engine.mutation_probability, low), high)
+        self.intensity = float(min(max(engine.mutation_intensity, 1), self.max_intensity))
+
+    def success_threshold(self, fitness: np.ndarray) -> float:
+        """The fitness a child of this population has to beat to count as a success."""
+        return float(np.quantile(fitness, self.success_quantile))
+
+    def shares(self) -> np.ndarray:
+        """Probability of each crossover operator for the next generation."""
+        known = [value for value in self.quality.values() if value is not None]
+        # Operators not tried yet count as the best one, so each gets tried early
+        default = max(known) if known else 1.0
+        quality = np.array([default if self.quality[name] is None else self.quality[name] for name in self.crossovers])
+        total = quality.sum()
+        if total <= 0:
+            return np.full(len(quality), 1 / len(quality))
+        return self.min_share + (1 - self.min_share * len(quality)) * quality / total
+
+    def adapt(self, engine, improved: np.ndarray = None, mutated: np.ndarray = None) -> None:
+        """
+        Update the parameters and set them on the engine.
+
+        Parameters:
+        - engine (GeneticEngine): The engine, between selection of its population and breeding.
+        - improved (np.ndarray): For each child of the last generation, whether it was a success
+          (None when unknown, e.g. on the first generation).
+        - mutated (np.ndarray): For each of those children, whether it was mutated.
+        """
+        if self.probability is None:
+            self.attach(engine)
+        success_rate = None
+        step = 0.0
+        if improved is not None and len(improved) > 0:
+            success_rate = float(np.mean(improved))
+            self.quality[engine.crossover] = _blend(self.quality[engine.crossover], success_rate, self.rate_decay)
+            if mutated.any():
+                self.mutated_rate = _blend(self.mutated_rate, float(np.mean(improved[mutated])), self.rate_decay)
+            if not mutated.all():
+                self.plain_rate = _blend(self.plain_rate, float(np.mean(improved[~mutated])), self.rate_decay)
+            if self.mutated_rate is not None and self.plain_rate is not None:
+                scale = max(self.mutated_rate, self.plain_rate)
+                if scale > 0:
+                    step = self.learning_rate * (self.mutated_rate - self.plain_rate) / scale
+        self.intensity = min(max(self.intensity * math.exp(step), 1.0), float(self.max_intensity))
+        bond_distance = engine.diversity_metrics.get('bond_distance')
+        if bond_distance is not None and bond_distance < self.diversity_floor:
+            step = max(step, self.learning_rate)
+        low, high = self.probability_range
+        self.probability = min(max(self.probability * math.exp(step), low), high)
+
+        engine.mutation_probability = self.probability
+        engine.mutation_intensity = int(round(self.intensity))
+        engine.crossover = self.crossovers[int(engine.rng.choice(len(self.crossovers), p=self.shares()))]
+        self.trajectory.append((engine.generation, engine.mutation_probability, engine.mutation_intensity,
+                                engine.crossover, success_rate, bond_distance))
+        instrumentation = engine.instrumentation
+        instrumentation.gauge('mutation_probability', engine.mutation_probability)
+        instrumentation.gauge('mutation_intensity', engine.mutation_intensity)
+        if success_rate is not None:
+            instrumentation.gauge('success_rate', success_rate)
+
+    def trajectory_dicts(self) -> List[dict]:
+        """The trajectory as one dict per generation."""
+        return [dict(zip(self.FIELDS, row)) for row in self.trajectory]
+
+    def state_dict(self) -> dict:
+        """JSON-serializable state, part of the engine's state_dict()."""
+        return {'probability': self.probability, 'intensity': self.intensity, 'mutated_rate': self.mutated_rate,
+                'plain_rate': self.plain_rate, 'quality': dict(self.quality),
+                'trajectory': [list(row) for row in self.trajectory]}
+
+    def load_state(self, state: dict) -> None:
+        self.probability = state['probability']
+        self.intensity = state['intensity']
+        self.mutated_rate = state['mutated_rate']
+        self.plain_rate = state['plain_rate']
+        self.quality = dict(state['quality'])
+        self.trajectory = [tuple(row) for row in state['trajectory']]
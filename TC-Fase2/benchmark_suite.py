@@ -0,0 +1,271 @@
+import argparse
+import csv
+import json
+import platform
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+from genetic_algorithm import GeneticEngine, generate_distance_matrix, calculate_fitness, default_problems
+from benchmark_att48 import att_48_cities_locations, att_48_cities_weights, att_48_cities_priorities, att_48_cities_order
+from local_search import LocalSearch
+from tsplib import DistanceOracle, DENSE_MATRIX_LIMIT, tsplib_distance_matrix
+from seeding import PopulationSeeder
+
+
+# Reproducible speed/quality benchmark of the GeneticEngine. Every instance runs with a fixed
+# seed; results are written as JSON (and optionally CSV) and can be compared with a stored
+# baseline to flag regressions. Each instance is timed over several identical runs and the
+# fastest one is kept, since noise only ever adds time.
+
+# Gaps (fraction above the optimum) whose first hitting time is recorded
+TARGET_GAPS = (0.10, 0.05, 0.02, 0.01)
+# Published optimal tour length of att48 under the TSPLIB ATT (pseudo-Euclidean) metric
+ATT48_OPTIMUM = 10628
+
+
+def held_karp(distance_matrix) -> float:
+    """Optimal closed tour length by Held-Karp dynamic programming (n <= ~16)."""
+    d = np.asarray(distance_matrix, dtype=np.float64)
+    n = len(d)
+    if n <= 3:
+        return float(sum(d[k, (k + 1) % n] for k in range(n)))
+    m = n - 1
+    # best[mask, j]: shortest path from city 0 through the cities of mask, ending at city j + 1
+    best = np.full((1 << m, m), np.inf)
+    for j in range(m):
+        best[1 << j, j] = d[0, j + 1]
+    inner = d[1:, 1:]
+    for mask in range(1, 1 << m):
+        row = best[mask]
+        if not np.isfinite(row).any():
+            continue
+        # Extend every end city j of mask with every city k not in mask
+        for k in range(m):
+            if mask & (1 << k):
+                continue
+            value = np.min(row + inner[:, k])
+            target = mask | (1 << k)
+            if value < best[target, k]:
+                best[target, k] = value
+    return float(np.min(best[(1 << m) - 1] + d[1:, 0]))
+
+
+@dataclass
+class BenchmarkInstance:
+    """One problem of the suite. optimum is None when no optimal value is known."""
+    name: str
+    distance_matrix: object
+    generations: int
+    optimum: float = None
+    problem: dict = field(default_factory=dict)
+    coordinates: object = None
+
+
+def _synthetic(n_cities: int, seed: int):
+    coordinates = np.random.default_rng(seed).uniform(0, 10_000, (n_cities, 2))
+    if n_cities > DENSE_MATRIX_LIMIT:
+        return DistanceOracle(coordinates, 'EUC_2D'), coordinates
+    return generate_distance_matrix([tuple(point) for point in coordinates.tolist()]), coordinates
+
+
+def build_suite(names: List[str] = None, seed: int = 0) -> List[BenchmarkInstance]:
+    """
+    The benchmark instances (all of them, or those named):
+    default_problems 5-15 (optimum by Held-Karp), att48 as TSP under the TSPLIB ATT metric (its
+    published optimum), att48 as the simulation's Euclidean CVRP (reference, not an optimum: the
+    att_48_cities_order tour under the CVRP fitness), and uniform random sets of 100, 1000 and
+    10000 cities (no known optimum).
+    """
+    factories = {}
+    for size, cities in default_problems.items():
+        def default_problem(cities=cities, size=size):
+            matrix = generate_distance_matrix(cities)
+            return BenchmarkInstance(f'default{size}', matrix, 200, held_karp(matrix), coordinates=cities)
+        factories[f'default{size}'] = default_problem
+
+    optimal_tour = [i - 1 for i in att_48_cities_order[:-1]]
+
+    def att48():
+        matrix = tsplib_distance_matrix(att_48_cities_locations, 'ATT')
+        return BenchmarkInstance('att48', matrix, 1000, ATT48_OPTIMUM, coordinates=att_48_cities_locations)
+
+    def att48_cvrp():
+        matrix = generate_distance_matrix(att_48_cities_locations)
+        problem = dict(weights=att_48_cities_weights, capacity=80, priorities=att_48_cities_priorities,
+                       priority_penalty=0)
+        return BenchmarkInstance('att48-cvrp', matrix, 500, calculate_fitness(optimal_tour, matrix, **problem), problem,
+                                 att_48_cities_locations)
+
+    factories['att48'] = att48
+    factories['att48-cvrp'] = att48_cvrp
+    for n_cities, generations in ((100, 500), (1000, 100), (10000, 10)):
+        def synthetic(n_cities=n_cities, generations=generations):
+            matrix, coordinates = _synthetic(n_cities, seed + n_cities)
+            return BenchmarkInstance(f'random{n_cities}', matrix, generations, coordinates=coordinates)
+        factories[f'random{n_cities}'] = synthetic
+
+    unknown = set(names or ()) - set(factories)
+    if unknown:
+        raise ValueError(f"Unknown benchmark instances {sorted(unknown)}, expected some of {sorted(factories)}")
+    return [factory() for name, factory in factories.items() if not names or name in names]
+
+
+def run_instance(instance: BenchmarkInstance, population_size: int = 100, seed: int = 0,
+                 generations_scale: float = 1.0, local_search_elites: int = 0, seeding_fraction: float = 0.0,
+                 repeats: int = 3, **engine_options) -> dict:
+    """
+    Run the GA on one instance and return its metrics as a flat dict. With local_search_elites,
+    that many elites get 2-opt/Or-opt each generation (dense-matrix instances only); with
+    seeding_fraction, that share of the initial population comes from seeding.PopulationSeeder.
+    The times include building the initial population, so seeding is not free in the results.
+    The seeded run is repeated `repeats` times and the fastest one is reported: every repeat
+    reaches the same fitness, only the timings differ.
+    """
+    generations = max(1, int(round(instance.generations * generations_scale)))
+    if local_search_elites > 0 and isinstance(instance.distance_matrix, np.ndarray):
+        engine_options = dict(engine_options, local_search_elites=local_search_elites,
+                              local_search=LocalSearch(instance.distance_matrix, **instance.problem))
+    if seeding_fraction > 0:
+        engine_options = dict(engine_options, seeding=PopulationSeeder(seeding_fraction,
+                                                                       coordinates=instance.coordinates))
+    elapsed = None
+    for _ in range(max(1, repeats)):
+        run_targets = {gap: None for gap in TARGET_GAPS} if instance.optimum else {}
+        start = time.perf_counter()
+        engine = GeneticEngine(instance.distance_matrix, population_size, seed=seed, **instance.problem,
+                               **engine_options)
+        for _ in range(generations):
+            engine.step()
+            if run_targets:
+                run_elapsed = time.perf_counter() - start
+                for gap, reached in run_targets.items():
+                    if reached is None and engine.best_fitness <= instance.optimum * (1 + gap):
+                        run_targets[gap] = run_elapsed
+        engine.evaluate()
+        best = min(engine.best_fitness, float(engine.fitness.min()))
+        run_elapsed = time.perf_counter() - start
+        if elapsed is None or run_elapsed < elapsed:
+            elapsed, targets, evaluations = run_elapsed, run_targets, engine.evaluations
+
+    result = {
+        'instance': instance.name,
+        'n_cities': len(instance.distance_matrix),
+        'population_size': population_size,
+        'seed': seed,
+        'generations': generations,
+        'repeats': max(1, repeats),
+        'elapsed_seconds': elapsed,
+        'generations_per_second': generations / elapsed if elapsed > 0 else 0.0,
+        # Routes actually scored: cache hits and carried-over elites are not evaluations
+        'evaluations': evaluations,
+        'evaluations_per_second': evaluations / elapsed if elapsed > 0 else 0.0,
+        'best_fitness': best,
+        'optimum': instance.optimum,
+        'gap_percent': 100 * (best / instance.optimum - 1) if instance.optimum else None,
+    }
+    for gap in TARGET_GAPS:
+        result[f'time_to_{int(round(gap * 100))}pct'] = targets.get(gap)
+    return result
+
+
+def run_suite(names: List[str] = None, population_size: int = 100, seed: int = 0, generations_scale: float = 1.0,
+              progress=print, **engine_options) -> dict:
+    """Run every instance of the suite and return {'environment': ..., 'results': [...]}."""
+    results = []
+    for instance in build_suite(names, seed):
+        result = run_instance(instance, population_size, seed, generations_scale, **engine_options)
+        results.append(result)
+        if progress is not None:
+            gap = f"{result['gap_percent']:.2f}%" if result['gap_percent'] is not None else '-'
+            progress(f"{result['instance']:>12}: {result['generations']} gens in {result['elapsed_seconds']:.2f}s "
+                     f"({result['generations_per_second']:.1f} gen/s, {result['evaluations_per_second']:.0f} evals/s) "
+                     f"best {result['best_fitness']:.1f} gap {gap}")
+    return {
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform()},
+        'parameters': dict(engine_options, population_size=population_size, seed=seed,
+                           generations_scale=generations_scale),
+        'results': results,
+    }
+
+
+def write_csv(results: List[dict], path: str) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def compare(current: dict, baseline: dict, speed_tolerance: float = 0.25, gap_tolerance: float = 0.5) -> List[str]:
+    """
+    Regressions of current against baseline, per instance present in both:
+    generations/sec down by more than speed_tolerance (relative), or the final gap up by more than
+    gap_tolerance percentage points (the best fitness, relatively, where there is no optimum).
+
+    Returns:
+    List[str]: One message per regression (empty when there is none).
+    """
+    previous = {result['instance']: result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(result['instance'])
+        if old is None:
+            continue
+        name = result['instance']
+        if result['generations_per_second'] < old['generations_per_second'] * (1 - speed_tolerance):
+            regressions.append(f"{name}: {result['generations_per_second']:.1f} gen/s, "
+                               f"baseline {old['generations_per_second']:.1f}")
+        if result['gap_percent'] is not None and old.get('gap_percent') is not None:
+            if result['gap_percent'] > old['gap_percent'] + gap_tolerance:
+                regressions.append(f"{name}: gap {result['gap_percent']:.2f}%, baseline {old['gap_percent']:.2f}%")
+        elif result['best_fitness'] > old['best_fitness'] * (1 + gap_tolerance / 100):
+            regressions.append(f"{name}: best {result['best_fitness']:.1f}, baseline {old['best_fitness']:.1f}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Speed and quality benchmark of the genetic algorithm.")
+    parser.add_argument('--instances', nargs='+', default=None, help="Subset of instances (default: all)")
+    parser.add_argument('--population', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiply every instance's generation budget")
+    parser.add_argument('--crossover', default='ox')
+    parser.add_argument('--selection', default='roulette')
+    parser.add_argument('--mutation-operator', default='inversion')
+    parser.add_argument('--local-search', type=int, default=0, help="Elites improved by local search each generation")
+    parser.add_argument('--seeding', type=float, default=0.0, help="Share of the initial population built by construction heuristics")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--csv', default=None, help="Also write the results as CSV")
+    parser.add_argument('--baseline', default=None, help="Baseline JSON to compare against")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per instance; the fastest is reported")
+    parser.add_argument('--speed-tolerance', type=float, default=0.25, help="Allowed relative gen/s drop")
+    parser.add_argument('--gap-tolerance', type=float, default=0.5, help="Allowed gap increase (percentage points)")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.instances, args.population, args.seed, args.scale, crossover=args.crossover,
+                       selection=args.selection, mutation=args.mutation_operator,
+                       local_search_elites=args.local_search, seeding_fraction=args.seeding, repeats=args.repeats)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to '{args.output}'")
+    if args.csv:
+        write_csv(report['results'], args.csv)
+        print(f"CSV saved to '{args.csv}'")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.speed_tolerance, args.gap_tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+# GA checkpoints as .npz files: arrays are stored as they are, and dicts, lists, strings and
+# None (e.g. the RNG state or the solver arguments) as JSON strings, so loading never needs
+# pickle. Files are written to a temporary file in the same directory and renamed over the
+# previous checkpoint, so a crash mid-write leaves the last complete checkpoint in place.
+
+_JSON_KEYS = '__json__'
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """
+    Write state atomically to path.
+
+    Parameters:
+    - path (str): Checkpoint file (conventionally .npz).
+    - state (dict): Arrays, numbers, and JSON-serializable dicts/lists/strings.
+    """
+    arrays = {}
+    json_keys = []
+    for key, value in state.items():
+        if value is None or isinstance(value, (dict, list, tuple, str)):
+            arrays[key] = np.array(json.dumps(value))
+            json_keys.append(key)
+        else:
+            arrays[key] = np.asarray(value)
+    arrays[_JSON_KEYS] = np.array(json.dumps(json_keys))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+
+
+def load_checkpoint(path: str) -> dict:
+    """Read a checkpoint written by save_checkpoint; 0-d arrays come back as Python scalars."""
+    with np.load(path, allow_pickle=False) as data:
+        json_keys = set(json.loads(str(data[_JSON_KEYS])))
+        state = {}
+        for key in data.files:
+            if key == _JSON_KEYS:
+                continue
+            value = data[key]
+            if key in json_keys:
+                state[key] = json.loads(str(value))
+            elif value.ndim == 0:
+                state[key] = value.item()
+            else:
+                state[key] = value
+    return state
+
+
+class Checkpointer:
+    """
+    Saves an engine's state_dict every every_generations generations and/or every_seconds
+    seconds (whichever comes first), together with any metadata (e.g. the solver arguments
+    needed to rebuild the engine).
+
+    Parameters:
+    - path (str): Checkpoint file, overwritten by each save.
+    - every_generations (int): Generations between checkpoints (None: no generation trigger).
+    - every_seconds (float): Seconds between checkpoints (None: no time trigger).
+    - metadata (dict): Extra entries stored in every checkpoint.
+    """
+
+    def __init__(self, path: str, every_generations: int = None, every_seconds: float = None, metadata: dict = None):
+        self.path = path
+        self.every_generations = every_generations
+        self.every_seconds = every_seconds
+        self.metadata = dict(metadata or {})
+        self.last_generation = None
+        self.last_time = time.perf_counter()
+        self.saves = 0
+
+    def due(self, generation: int) -> bool:
+        if self.every_generations and generation - (self.last_generation or 0) >= self.every_generations:
+            return True
+        return bool(self.every_seconds) and time.perf_counter() - self.last_time >= self.every_seconds
+
+    def save(self, engine, **extra) -> None:
+        """Write a checkpoint of engine now."""
+        state = engine.state_dict()
+        state.update(self.metadata)
+        state.update(extra)
+        save_checkpoint(self.path, state)
+        self.last_generation = engine.generation
+        self.last_time = time.perf_counter()
+        self.saves += 1
+
+    def maybe_save(self, engine, **extra) -> bool:
+        """Save if a checkpoint is due; returns whether one was written."""
+        if engine.generation == self.last_generation or not self.due(engine.generation):
+            return False
+        self.save(engine, **extra)
+        return True
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+# When a run stops being worth its CPU, and what to do when the population stagnates.
+# Both read the GeneticEngine's own history (best_fitness_values, last_improvement,
+# last_restart), which is part of its checkpointed state, so they behave the same on a resumed run.
+
+
+@dataclass
+class StoppingCriteria:
+    """
+    Early-stopping rules, checked after every generation; any rule that is set can stop the run.
+
+    - stall_generations: No new best fitness for this many generations.
+    - min_improvement: Relative improvement of the best fitness over the last improvement_window
+      generations below this (e.g. 0.001 for 0.1%).
+    - time_limit: Wall-clock seconds of evolution.
+    - target: A best fitness at or below this value.
+    """
+    stall_generations: int = None
+    min_improvement: float = None
+    improvement_window: int = 100
+    time_limit: float = None
+    target: float = None
+    # Running minimum of best_fitness_values, extended by the generations added since the last call
+    _prefix_min: List[float] = field(default_factory=list, init=False, repr=False, compare=False)
+
+    def reason(self, engine, elapsed_seconds: float = 0.0) -> str:
+        """The name of the first rule that says stop ('target', 'time_limit', 'stall', 'min_improvement'), or None."""
+        if self.target is not None and engine.best_fitness <= self.target:
+            return 'target'
+        if self.time_limit is not None and elapsed_seconds >= self.time_limit:
+            return 'time_limit'
+        if self.stall_generations is not None and engine.generation - engine.last_improvement >= self.stall_generations:
+            return 'stall'
+        history = engine.best_fitness_values
+        if self.min_improvement is not None and len(history) > self.improvement_window:
+            prefix = self._prefix_min
+            if len(prefix) > len(history):
+                # A new or reloaded history
+                prefix.clear()
+            for value in history[len(prefix):]:
+                prefix.append(min(prefix[-1], value) if prefix else value)
+            before = prefix[-self.improvement_window - 1]
+            if before > 0 and (before - engine.best_fitness) / before < self.min_improvement:
+                return 'min_improvement'
+        return None
+
+
+@dataclass
+class RestartPolicy:
+    """
+    Cataclysmic restart: when the best fitness has not improved for stall_generations generations
+    (counted from the last restart too), every individual but the keep best is replaced by a
+    random route. keep defaults to the engine's elite_size; max_restarts caps how often it happens.
+    """
+    stall_generations: int = 200
+    keep: int = None
+    max_restarts: int = None
+
+    def due(self, engine) -> bool:
+        if self.max_restarts is not None and engine.restarts >= self.max_restarts:
+            return False
+        return engine.generation - max(engine.last_improvement, engine.last_restart) >= self.stall_generations
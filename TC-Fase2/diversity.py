@@ -0,0 +1,100 @@
+from collections import Counter
+from typing import Dict
+
+import numpy as np
+
+
+# Population diversity from an edge-frequency matrix E, where E[a, b] (a < b) counts the
+# individuals whose closed tour uses the undirected edge a-b.
+#
+# With P routes of n edges, sum(E) = P * n and, since two tours share exactly the edges both
+# use, the total number of shared edges over all pairs is sum(E * (E - 1) / 2). So the mean
+# pairwise bond distance (edges not shared, as a fraction of n) and the edge entropy follow
+# from two running sums, S = sum(E**2) and T = sum(E * log E), which are updated together with
+# E as individuals enter and leave. Only the routes that changed between two updates are
+# touched, so clones and elites that survive a generation cost nothing.
+
+# Largest instance tracked; E is a dense int32 n x n matrix (64 MB at this size)
+MAX_CITIES = 4096
+
+
+def _xlogx(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(x > 0, x * np.log(np.maximum(x, 1)), 0.0)
+
+
+def edge_keys(routes: np.ndarray, n_cities: int) -> np.ndarray:
+    """Undirected edge ids (a * n + b with a < b) of the closed tours in the rows of routes."""
+    routes = np.asarray(routes, dtype=np.int64)
+    following = np.roll(routes, -1, axis=-1)
+    return (np.minimum(routes, following) * n_cities + np.maximum(routes, following)).ravel()
+
+
+class DiversityTracker:
+    """
+    Incremental edge-frequency matrix of a population and the diversity measures it gives.
+
+    update(population) compares the population with the one of the previous update by route
+    hash, removes the edges of the routes that left and adds those of the routes that entered.
+    """
+
+    def __init__(self, n_cities: int):
+        if n_cities > MAX_CITIES:
+            raise ValueError(f"Diversity tracking keeps a dense edge matrix; {n_cities} cities is above {MAX_CITIES}")
+        self.n_cities = n_cities
+        self.edge_counts = np.zeros(n_cities * n_cities, dtype=np.int32)
+        self.reset()
+
+    def reset(self) -> None:
+        self.edge_counts[:] = 0
+        self._routes = Counter()
+        self.n_routes = 0
+        self._sum_squares = 0
+        self._sum_xlogx = 0.0
+        self.distinct_edges = 0
+
+    def _apply(self, keys: np.ndarray, signs: np.ndarray) -> None:
+        if len(keys) == 0:
+            return
+        unique, inverse = np.unique(keys, return_inverse=True)
+        deltas = np.bincount(inverse, weights=signs, minlength=len(unique)).astype(np.int64)
+        old = self.edge_counts[unique].astype(np.int64)
+        new = old + deltas
+        self._sum_squares += int(np.sum(new * new - old * old))
+        self._sum_xlogx += float(np.sum(_xlogx(new) - _xlogx(old)))
+        self.distinct_edges += int(np.count_nonzero(new > 0) - np.count_nonzero(old > 0))
+        self.edge_counts[unique] = new
+
+    def update(self, population: np.ndarray) -> Dict[str, float]:
+        """Register the current population and return metrics()."""
+        rows = np.ascontiguousarray(population, dtype=np.int32)
+        current = Counter(row.tobytes() for row in rows)
+        left = self._routes - current
+        entered = current - self._routes
+        changes = [(np.frombuffer(key, dtype=np.int32), -count) for key, count in left.items()] + \
+                  [(np.frombuffer(key, dtype=np.int32), count) for key, count in entered.items()]
+        if changes:
+            keys = edge_keys(np.array([route for route, _ in changes]), self.n_cities)
+            signs = np.repeat([count for _, count in changes], self.n_cities).astype(np.float64)
+            self._apply(keys, signs)
+        self._routes = current
+        self.n_routes = len(rows)
+        return self.metrics()
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        - bond_distance: Mean share of edges two individuals do not have in common (0: clones, 1: disjoint).
+        - edge_entropy: Entropy of the edge distribution, 0 when all individuals have the same edges
+          and 1 when no edge is shared.
+        - distinct_edges: Number of different edges in the population.
+        - unique_routes: Number of different routes (exact duplicates counted once).
+        """
+        p, n = self.n_routes, self.n_cities
+        bond_distance = edge_entropy = 0.0
+        if p > 1 and n > 2:
+            shared = (self._sum_squares - p * n) / (p * (p - 1))
+            bond_distance = 1.0 - shared / n
+            entropy = np.log(p * n) - self._sum_xlogx / (p * n)
+            edge_entropy = float((entropy - np.log(n)) / np.log(p))
+        return {'bond_distance': float(bond_distance), 'edge_entropy': min(max(edge_entropy, 0.0), 1.0),
+                'distinct_edges': self.distinct_edges, 'unique_routes': len(self._routes)}
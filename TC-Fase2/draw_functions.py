@@ -4,49 +4,228 @@ Created on Fri Dec 22 16:03:11 2023
 
 @author: SérgioPolimante
 """
-import pylab
-import matplotlib.pyplot as plt
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-import matplotlib
+import math
+import functools
 import pygame
 from typing import List, Tuple
 
-matplotlib.use("Agg")
+
+@functools.lru_cache(maxsize=None)
+def get_font(size: int = 20, bold: bool = False, name: str = 'Arial') -> pygame.font.Font:
+    """The SysFont for (size, bold, name), created once; SysFont scans the system fonts on every call."""
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.SysFont(name, size, bold=bold)
+
+
+@functools.lru_cache(maxsize=1024)
+def render_text(text: str, color: Tuple[int, int, int], size: int = 20, bold: bool = False,
+                name: str = 'Arial') -> pygame.Surface:
+    """
+    Rendered (antialiased) text surface, memoized by string, color and font, so lines that do
+    not change between frames are rendered once. Callers must not draw on the returned surface.
+    """
+    return get_font(size, bold, name).render(text, True, color)
+
+
+def clear_font_caches() -> None:
+    """Drop the cached fonts and text; call before pygame.quit(), which invalidates every Font."""
+    render_text.cache_clear()
+    get_font.cache_clear()
+
+
+def _nice_step(span: float, n_ticks: int = 5) -> float:
+    """Round span / n_ticks up to 1, 2 or 5 times a power of ten."""
+    raw = span / n_ticks if span > 0 else 1.0
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for multiple in (1, 2, 5, 10):
+        if raw <= multiple * magnitude:
+            return multiple * magnitude
+    return 10 * magnitude
+
+
+class FitnessPlot:
+    """
+    Fitness curve drawn natively with pygame, replacing a matplotlib figure per frame.
+
+    The history only grows, so draw() ingests the values appended since the last call into at
+    most max_buckets min-max buckets; when they fill up, neighbours are merged and the bucket
+    width doubles. The axes, ticks and labels are rendered once per change of the axis limits,
+    which are rounded to nice steps, so a frame costs the same at 50 or 50,000 generations.
+
+    Parameters:
+    - rect (Tuple[int, int, int, int]): Area (x, y, width, height) of the plot on the screen.
+    - x_label (str): Label for the x-axis.
+    - y_label (str): Label for the y-axis.
+    - color (Tuple[int, int, int]): Color of the curve.
+    - max_buckets (int): Number of min-max buckets kept (default: one per pixel column).
+    """
+
+    MARGINS = (72, 20, 14, 44)  # left, right, top, bottom
+
+    def __init__(self, rect: Tuple[int, int, int, int] = (0, 0, 400, 400), x_label: str = 'Generation',
+                 y_label: str = 'Fitness', color: Tuple[int, int, int] = (31, 119, 180), max_buckets: int = None):
+        self.rect = pygame.Rect(rect)
+        self.x_label = x_label
+        self.y_label = y_label
+        self.color = color
+        left, right, top, bottom = self.MARGINS
+        self.area = pygame.Rect(self.rect.x + left, self.rect.y + top,
+                                self.rect.width - left - right, self.rect.height - top - bottom)
+        self.max_buckets = max_buckets or max(self.area.width, 2)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the history (e.g. for a new run)."""
+        self.n_values = 0
+        self.first_value = None
+        self.last_value = None
+        self.bucket_size = 1
+        # Per bucket: [count, min value, index of the min, max value, index of the max]
+        self._buckets = []
+        self._limits = None
+        self._background = None
+        self._points = None
+
+    def _ingest(self, values) -> None:
+        buckets = self._buckets
+        for index in range(self.n_values, len(values)):
+            value = float(values[index])
+            last = buckets[-1] if buckets else None
+            if last is None or last[0] >= self.bucket_size:
+                buckets.append([1, value, index, value, index])
+                if len(buckets) > self.max_buckets:
+                    self._merge()
+            else:
+                last[0] += 1
+                if value < last[1]:
+                    last[1], last[2] = value, index
+                if value > last[3]:
+                    last[3], last[4] = value, index
+        if self.first_value is None and len(values):
+            self.first_value = float(values[0])
+        self.n_values = len(values)
+        self.last_value = float(values[-1])
+
+    def _merge(self) -> None:
+        merged = []
+        for k in range(0, len(self._buckets), 2):
+            pair = self._buckets[k:k + 2]
+            low = min(pair, key=lambda bucket: bucket[1])
+            high = max(pair, key=lambda bucket: bucket[3])
+            merged.append([sum(bucket[0] for bucket in pair), low[1], low[2], high[3], high[4]])
+        self._buckets = merged
+        self.bucket_size *= 2
+
+    def series(self) -> Tuple[List[int], List[float]]:
+        """The decimated (indices, values) currently drawn, in index order."""
+        points = []
+        for _, low, low_index, high, high_index in self._buckets:
+            if low_index == high_index:
+                points.append((low_index, low))
+            else:
+                points.extend(sorted([(low_index, low), (high_index, high)]))
+        # The curve always ends at the latest value
+        if points and points[-1][0] != self.n_values - 1:
+            points.append((self.n_values - 1, self.last_value))
+        return [index for index, _ in points], [value for _, value in points]
+
+    def _axis_limits(self) -> Tuple[float, float, float, float, float, float]:
+        low = min(bucket[1] for bucket in self._buckets)
+        high = max(bucket[3] for bucket in self._buckets)
+        y_step = _nice_step(high - low)
+        y_min = math.floor(low / y_step) * y_step
+        y_max = max(math.ceil(high / y_step) * y_step, y_min + y_step)
+        x_step = _nice_step(max(self.n_values - 1, 1))
+        x_max = max(math.ceil((self.n_values - 1) / x_step) * x_step, x_step)
+        return 0.0, x_max, x_step, y_min, y_max, y_step
+
+    def _render_background(self) -> pygame.Surface:
+        font = get_font(13)
+        x_min, x_max, x_step, y_min, y_max, y_step = self._limits
+        surface = pygame.Surface(self.rect.size)
+        surface.fill((255, 255, 255))
+        area = self.area.move(-self.rect.x, -self.rect.y)
+        pygame.draw.rect(surface, (0, 0, 0), area, 1)
+
+        for k in range(int(round((x_max - x_min) / x_step)) + 1):
+            value = x_min + k * x_step
+            x = area.left + (value - x_min) / (x_max - x_min) * (area.width - 1)
+            pygame.draw.line(surface, (0, 0, 0), (x, area.bottom - 1), (x, area.bottom + 3))
+            label = font.render(f"{value:g}", True, (0, 0, 0))
+            surface.blit(label, label.get_rect(midtop=(x, area.bottom + 5)))
+        for k in range(int(round((y_max - y_min) / y_step)) + 1):
+            value = y_min + k * y_step
+            y = area.bottom - 1 - (value - y_min) / (y_max - y_min) * (area.height - 1)
+            pygame.draw.line(surface, (0, 0, 0), (area.left - 4, y), (area.left, y))
+            label = font.render(f"{value:g}", True, (0, 0, 0))
+            surface.blit(label, label.get_rect(midright=(area.left - 6, y)))
+
+        x_title = font.render(self.x_label, True, (0, 0, 0))
+        surface.blit(x_title, x_title.get_rect(midbottom=(area.centerx, self.rect.height - 2)))
+        y_title = pygame.transform.rotate(font.render(self.y_label, True, (0, 0, 0)), 90)
+        surface.blit(y_title, y_title.get_rect(midleft=(2, area.centery)))
+        return surface
+
+    def _pixel_points(self) -> List[Tuple[float, float]]:
+        x_min, x_max, _, y_min, y_max, _ = self._limits
+        area = self.area
+        x_scale = (area.width - 1) / (x_max - x_min)
+        y_scale = (area.height - 1) / (y_max - y_min)
+        indices, values = self.series()
+        return [(area.left + (index - x_min) * x_scale, area.bottom - 1 - (value - y_min) * y_scale)
+                for index, value in zip(indices, values)]
+
+    def draw(self, screen: pygame.Surface, values) -> None:
+        """
+        Draw the curve of values (the full history, e.g. best_fitness_values; only the part
+        appended since the last call is processed).
+        """
+        if len(values) < self.n_values or (self.n_values and float(values[0]) != self.first_value):
+            self.reset()
+        if len(values) > self.n_values:
+            self._ingest(values)
+            self._points = None
+        if not self._buckets:
+            screen.fill((255, 255, 255), self.rect)
+            return
+
+        limits = self._axis_limits()
+        if limits != self._limits:
+            self._limits = limits
+            self._background = self._render_background()
+            self._points = None
+        if self._points is None:
+            self._points = self._pixel_points()
+
+        screen.blit(self._background, self.rect)
+        if len(self._points) > 1:
+            pygame.draw.lines(screen, self.color, False, self._points, 2)
+        else:
+            pygame.draw.circle(screen, self.color, self._points[0], 2)
+
+
+# One persistent FitnessPlot per label pair, for callers of draw_plot
+_plots = {}
 
 
 def draw_plot(screen: pygame.Surface, x: list, y: list, x_label: str = 'Generation', y_label: str = 'Fitness') -> None:
     """
-    Draw a plot on a Pygame screen using Matplotlib.
+    Draw a plot on a Pygame screen, through a persistent FitnessPlot in the top-left 400x400 area.
 
     Parameters:
     - screen (pygame.Surface): The Pygame surface to draw the plot on.
-    - x (list): The x-axis values.
+    - x (list): The x-axis values (consecutive generations; the curve is plotted against the index).
     - y (list): The y-axis values.
     - x_label (str): Label for the x-axis (default is 'Generation').
     - y_label (str): Label for the y-axis (default is 'Fitness').
     """
-    fig, ax = plt.subplots(figsize=(4, 4), dpi=100)
-    ax.plot(x, y)
-    ax.set_ylabel(y_label)
-    ax.set_xlabel(x_label)
-    try:
-        plt.tight_layout()
-    except Exception:
-        pass
-
-    canvas = FigureCanvasAgg(fig)
-    canvas.draw()
-    renderer = canvas.get_renderer()
-    raw_data = renderer.tostring_rgb()
-
-    size = canvas.get_width_height()
-    surf = pygame.image.fromstring(raw_data, size, "RGB")
-    screen.blit(surf, (0, 0))
-    
-    # Close the figure to free memory
-    plt.close(fig)
-    
+    plot = _plots.get((x_label, y_label))
+    if plot is None:
+        plot = _plots[(x_label, y_label)] = FitnessPlot(x_label=x_label, y_label=y_label)
+    plot.draw(screen, y)
+
+
 def draw_cities(screen: pygame.Surface, cities_locations: List[Tuple[int, int]], colors: List[Tuple[int, int, int]], radii: List[int]) -> None:
     """
     Draws circles representing cities on the given Pygame screen.
@@ -68,6 +247,44 @@ def draw_cities(screen: pygame.Surface, cities_locations: List[Tuple[int, int]],
 
 
 
+class CitiesLayer:
+    """
+    The city circles pre-drawn once on a colorkeyed surface covering their bounding box, so a
+    frame blits one surface instead of drawing every circle. Cities never move; call
+    set_cities again (e.g. when priorities, and so colors, change) to redraw the layer.
+    """
+
+    COLORKEY = (255, 0, 254)
+
+    def __init__(self, cities_locations: List[Tuple[int, int]] = None, colors: List[Tuple[int, int, int]] = None,
+                 radii: List[int] = None):
+        self.surface = None
+        self.position = (0, 0)
+        if cities_locations is not None:
+            self.set_cities(cities_locations, colors, radii)
+
+    def set_cities(self, cities_locations: List[Tuple[int, int]], colors: List[Tuple[int, int, int]],
+                   radii: List[int]) -> None:
+        if not cities_locations:
+            self.surface = None
+            return
+        radii = [radii[i] if i < len(radii) else 5 for i in range(len(cities_locations))]
+        left = min(x - r for (x, _), r in zip(cities_locations, radii))
+        top = min(y - r for (_, y), r in zip(cities_locations, radii))
+        right = max(x + r for (x, _), r in zip(cities_locations, radii))
+        bottom = max(y + r for (_, y), r in zip(cities_locations, radii))
+        self.surface = pygame.Surface((right - left + 1, bottom - top + 1))
+        self.surface.fill(self.COLORKEY)
+        self.surface.set_colorkey(self.COLORKEY, pygame.RLEACCEL)
+        self.position = (left, top)
+        shifted = [(x - left, y - top) for x, y in cities_locations]
+        draw_cities(self.surface, shifted, colors, radii)
+
+    def draw(self, screen: pygame.Surface) -> None:
+        if self.surface is not None:
+            screen.blit(self.surface, self.position)
+
+
 def draw_paths(screen: pygame.Surface, path: List[Tuple[int, int]], rgb_color: Tuple[int, int, int], width: int = 1):
     """
     Draw a path on a Pygame screen with direction arrows.
@@ -120,17 +337,13 @@ def draw_text(screen: pygame.Surface, text: str, color: pygame.Color, position:
     - color (pygame.Color): The color of the text.
     - position (Tuple[int, int]): Position to draw the text (x, y).
     """
-    if not pygame.font.get_init():
-        pygame.font.init()
-
     font_size = 20
-    my_font = pygame.font.SysFont('Arial', font_size)
+    color = tuple(color)
     
-    # Handle multi-line text
+    # Handle multi-line text; each line is rendered once and reused while it stays the same
     lines = text.split('\n')
     x, y = position
     for line in lines:
-        text_surface = my_font.render(line, True, color)
-        screen.blit(text_surface, (x, y))
+        screen.blit(render_text(line, color, font_size), (x, y))
         y += font_size + 5
 
@@ -2,9 +2,17 @@
 
 import random
 import math
+import time
 import copy 
 from typing import List, Tuple
 
+import numpy as np
+
+from selection import select_parents, SELECTION_METHODS
+from mutation import mutate_population, MUTATION_OPERATORS
+from instrumentation import NULL_INSTRUMENTATION
+from diversity import DiversityTracker
+
 default_problems = {
 5: [(733, 251), (706, 87), (546, 97), (562, 49), (576, 253)],
 10:[(470, 169), (602, 202), (754, 239), (476, 233), (468, 301), (522, 29), (597, 171), (487, 325), (746, 232), (558, 136)],
@@ -35,43 +43,171 @@ def calculate_point_segment_distance(px, py, x1, y1, x2, y2):
     return math.sqrt((px - closest_x)**2 + (py - closest_y)**2)
 
 
-def generate_distance_matrix(cities_location: List[Tuple[float, float]]) -> List[List[float]]:
+INTERSECTION_PENALTY = 10000.0
+SAFETY_RADIUS = 15.0
+
+
+class SpatialGrid:
+    """
+    Uniform grid over a set of 2D points, used to find the points near a query location
+    without scanning the whole set.
+
+    Points are bucketed by cell and stored cell by cell (CSR layout), with a one-cell empty
+    border around the bounding box so the 3x3 block of any inside cell is always valid.
+    """
+
+    def __init__(self, points: np.ndarray, cell_size: float):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        self.origin = self.points.min(axis=0)
+        cells = self.cell_of(self.points)
+        self.n_cols = int(cells[:, 0].max()) + 1
+        self.n_rows = int(cells[:, 1].max()) + 1
+
+        # Padded key space: cell (c, r) lives at (r + 1) * stride + (c + 1)
+        self.stride = self.n_cols + 2
+        keys = self.key(cells)
+        self.order = np.argsort(keys, kind='stable')
+        self.cell_start = np.searchsorted(keys[self.order], np.arange(self.stride * (self.n_rows + 2) + 1))
+        self.block_offsets = np.array([dy * self.stride + dx for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+
+    def cell_of(self, xy: np.ndarray) -> np.ndarray:
+        """Return the integer (col, row) cell coordinates of each point in xy."""
+        return np.floor((np.asarray(xy, dtype=np.float64) - self.origin) / self.cell_size).astype(np.int64)
+
+    def key(self, cells: np.ndarray) -> np.ndarray:
+        """Return the flat key of each (col, row) cell."""
+        return (cells[:, 1] + 1) * self.stride + (cells[:, 0] + 1)
+
+    def query_cells(self, cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the points stored in each query cell and its 8 neighbors.
+
+        Parameters:
+        - cells (np.ndarray): (m, 2) integer cell coordinates inside the grid.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: (query_index, point_index) pairs, one per candidate.
+        """
+        keys = (self.key(cells)[:, None] + self.block_offsets[None, :]).ravel()
+        lo = self.cell_start[keys]
+        counts = self.cell_start[keys + 1] - lo
+        query_index = np.repeat(np.arange(len(cells)), len(self.block_offsets))
+        query_index = np.repeat(query_index, counts)
+        # Position inside each [lo, lo + count) run, flattened
+        run_starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        point_index = self.order[run_starts + np.arange(len(run_starts))]
+        return query_index, point_index
+
+
+def _segment_proximity_counts(coords: np.ndarray, safety_radius: float) -> np.ndarray:
+    """
+    Count, for every segment (i, j), how many other cities lie closer than safety_radius to it.
+
+    Each segment is sampled at a spacing small enough that any city within the radius must sit
+    in a grid cell adjacent to one of the samples, so only those cities are tested exactly.
+    The grid only saves the exact tests: there are n^2 / 2 segments of about sqrt(n) samples each,
+    so the work still grows as n^2 * sqrt(n) (about 10 s at 1000 cities). Small instances only.
+    """
+    n = len(coords)
+    counts = np.zeros((n, n), dtype=np.int32)
+    if n < 3 or safety_radius <= 0:
+        return counts
+
+    # Cells at least 2r wide, about one city per cell on average, and never more than ~4n cells
+    extent = coords.max(axis=0) - coords.min(axis=0)
+    spacing = math.sqrt(max(extent[0] * extent[1], 1.0) / n)
+    cell_size = max(2 * safety_radius, spacing, float(extent.max()) / (4 * n))
+    grid = SpatialGrid(coords, cell_size)
+    # A sample s covers every city k with |k - s| <= r + step / 2 <= cell_size
+    step = 1.9 * (cell_size - safety_radius)
+
+    for i in range(n - 1):
+        js = np.arange(i + 1, n)
+        start = coords[i]
+        vectors = coords[js] - start
+        lengths = np.sqrt(vectors[:, 0] ** 2 + vectors[:, 1] ** 2)
+
+        # Samples per segment, both endpoints included
+        n_samples = np.ceil(lengths / step).astype(np.int64) + 1
+        segment_of_sample = np.repeat(np.arange(len(js)), n_samples)
+        first_sample = np.cumsum(n_samples) - n_samples
+        t = (np.arange(n_samples.sum()) - first_sample[segment_of_sample]) / np.maximum(n_samples - 1, 1)[segment_of_sample]
+        samples = start + vectors[segment_of_sample] * t[:, None]
+
+        # Every city in the 3x3 block around each sample is a candidate (the clip guards
+        # against a rounding error pushing an endpoint sample outside the bounding box)
+        cells = np.clip(grid.cell_of(samples), 0, [grid.n_cols - 1, grid.n_rows - 1])
+        query_index, k = grid.query_cells(cells)
+        segment = segment_of_sample[query_index]
+        keep = (k != i) & (k != js[segment])
+        segment, k = segment[keep], k[keep]
+
+        # Exact point-to-segment distance, vectorized version of calculate_point_segment_distance
+        seg_x, seg_y = vectors[segment, 0], vectors[segment, 1]
+        rel_x, rel_y = coords[k, 0] - start[0], coords[k, 1] - start[1]
+        seg_len2 = seg_x * seg_x + seg_y * seg_y
+        t = np.clip((rel_x * seg_x + rel_y * seg_y) / np.where(seg_len2 > 0, seg_len2, 1), 0, 1)
+        off_x = rel_x - t * seg_x
+        off_y = rel_y - t * seg_y
+        hit = off_x * off_x + off_y * off_y < safety_radius * safety_radius
+
+        # Neighborhoods of consecutive samples overlap, so count each (segment, city) hit once
+        hit_keys = np.unique(segment[hit] * n + k[hit])
+        hits = np.bincount(hit_keys // n, minlength=len(js))
+        counts[i, js] = hits
+        counts[js, i] = hits
+
+    return counts
+
+
+def generate_distance_matrix(cities_location: List[Tuple[float, float]],
+                             penalize_intersections: bool = False,
+                             intersection_penalty: float = INTERSECTION_PENALTY,
+                             safety_radius: float = SAFETY_RADIUS,
+                             dtype=np.float64) -> np.ndarray:
     """
     Generate a distance matrix for the given cities.
-    Includes a heavy penalty if the path between two cities passes too close to a third city.
+
+    The Euclidean distances are computed with NumPy broadcasting in row blocks, so the result is a
+    contiguous (n, n) array of the requested dtype. When penalize_intersections is True, a heavy
+    penalty is added for every third city that lies closer than safety_radius to the segment
+    between two cities. Only cities near each segment are checked, using a SpatialGrid, but the
+    segments are still sampled one by one: the penalty is meant for the simulation's small maps
+    (it takes seconds from a few hundred cities on).
+
+    Parameters:
+    - cities_location (List[Tuple[float, float]]): The (x, y) coordinates of the cities.
+    - penalize_intersections (bool): Enable the "passes too close to a third city" penalty.
+    - intersection_penalty (float): Penalty added per city found inside the safety radius.
+    - safety_radius (float): Distance under which a city counts as being on the segment.
+    - dtype: Floating point type of the returned matrix (np.float64 or np.float32).
+
+    Returns:
+    np.ndarray: The (n, n) distance matrix.
     """
-    n = len(cities_location)
-    matrix = [[0.0] * n for _ in range(n)]
-    
-    # Removed intersection penalty for CVRP correct distance calculation
-    # INTERSECTION_PENALTY = 10000.0
-    # SAFETY_RADIUS = 15.0 
-    
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                # Basic Euclidean distance
-                dist = math.sqrt((cities_location[i][0] - cities_location[j][0]) ** 2 + 
-                                 (cities_location[i][1] - cities_location[j][1]) ** 2)
-                
-                # Check for intersection with any other city k - REMOVED for VRP
-                penalty = 0
-                # for k in range(n):
-                #     if k == i or k == j:
-                #         continue
-                #     
-                #     px, py = cities_location[k]
-                #     x1, y1 = cities_location[i]
-                #     x2, y2 = cities_location[j]
-                #     
-                #     distance_to_segment = calculate_point_segment_distance(px, py, x1, y1, x2, y2)
-                #     
-                #     if distance_to_segment < SAFETY_RADIUS:
-                #         penalty += INTERSECTION_PENALTY
-                
-                matrix[i][j] = dist + penalty
-                
-    return matrix
+    coords = np.asarray(cities_location, dtype=np.float64).reshape(-1, 2)
+    n = len(coords)
+    matrix = np.empty((n, n), dtype=dtype)
+
+    # Row blocks keep the temporaries cache-sized even for tens of thousands of cities
+    block = max(1, 2 ** 16 // max(n, 1))
+    x, y = coords[:, 0], coords[:, 1]
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        dx = np.subtract.outer(x[start:stop], x)
+        dy = np.subtract.outer(y[start:stop], y)
+        np.multiply(dx, dx, out=dx)
+        np.multiply(dy, dy, out=dy)
+        dx += dy
+        np.sqrt(dx, out=dx)
+        matrix[start:stop] = dx
+
+    if penalize_intersections:
+        counts = _segment_proximity_counts(coords, safety_radius)
+        matrix += (counts * intersection_penalty).astype(dtype)
+
+    return np.ascontiguousarray(matrix)
 
 
 def generate_random_population(n_cities: int, population_size: int) -> List[List[int]]:
@@ -88,10 +224,134 @@ def generate_random_population(n_cities: int, population_size: int) -> List[List
     return [random.sample(range(n_cities), n_cities) for _ in range(population_size)]
 
 
-def calculate_fitness(path: List[int], distance_matrix: List[List[float]], weights: List[int] = None, capacity: int = None, priorities: List[str] = None, priority_penalty: float = 0) -> float:
+SPLIT_MODES = ('optimal', 'greedy')
+DEFAULT_SPLIT = 'optimal'
+
+
+def _rotate_path_to_depot(path: List[int]) -> List[int]:
+    """
+    Rotate a path so it starts at the depot (city 0). Paths without a 0 are returned unchanged.
+    """
+    if 0 in path:
+        zero_idx = path.index(0)
+        return path[zero_idx:] + path[:zero_idx]
+    return path
+
+
+def split_giant_tour(path: List[int], distance_matrix: List[List[float]], weights: List[int], capacity: int, split: str = DEFAULT_SPLIT, max_trip_cities: int = None) -> Tuple[float, List[List[int]]]:
+    """
+    Cut a giant tour into capacity-feasible trips that start and end at the depot (city 0).
+
+    The tour is first rotated to start at the depot; the order of the cities is never changed,
+    only where the trips are cut.
+    - 'greedy' starts a new trip as soon as the next city would overflow the capacity.
+    - 'optimal' is Prins' split: a shortest path over the DAG whose arcs (i, j) are the feasible
+      trips serving cities i+1..j, so the cuts give the lowest total distance for this order.
+      max_trip_cities bounds the trip length, making it O(n * max_trip_cities).
+    A single city heavier than the capacity still gets a trip of its own in both modes.
+
+    Parameters:
+    - path (List[int]): The giant tour (city indices, depot included).
+    - distance_matrix: The (n, n) distance matrix.
+    - weights (List[int]): The demand of each city.
+    - capacity (int): The vehicle capacity.
+    - split (str): 'optimal' or 'greedy'.
+    - max_trip_cities (int): Maximum cities per trip for the optimal split (None = unbounded).
+
+    Returns:
+    Tuple[float, List[List[int]]]: The total distance and the trips, each as [0, city, city, ...].
+    """
+    if split not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode '{split}', expected one of {SPLIT_MODES}")
+
+    rotated_path = _rotate_path_to_depot(list(path))
+    if not rotated_path:
+        return 0, []
+    depot = rotated_path[0]  # Should be 0
+    customers = rotated_path[1:]
+
+    if split == 'greedy':
+        total_distance = 0
+        current_load = 0
+        last_node = depot
+        trips = []
+        current_trip = [depot]
+        for city_idx in customers:
+            w = weights[city_idx]
+            if current_load + w > capacity:
+                # Trip complete: Return to Depot (0), then start a new trip: Depot (0) -> current city
+                total_distance += distance_matrix[last_node][0]
+                total_distance += distance_matrix[0][city_idx]
+                if len(current_trip) > 1:
+                    trips.append(current_trip)
+                current_trip = [depot, city_idx]
+                current_load = w
+            else:
+                # Continue trip
+                total_distance += distance_matrix[last_node][city_idx]
+                current_trip.append(city_idx)
+                current_load += w
+            last_node = city_idx
+
+        # Final return to Depot (0)
+        total_distance += distance_matrix[last_node][0]
+        if len(current_trip) > 1:
+            trips.append(current_trip)
+        return total_distance, trips
+
+    # Optimal split: labels[j] is the cheapest way to serve customers[:j]
+    m = len(customers)
+    limit = m if max_trip_cities is None else max_trip_cities
+    labels = [0] + [float('inf')] * m
+    predecessor = [0] * (m + 1)
+    for i in range(m):
+        load = 0
+        cost = 0
+        for j in range(i + 1, min(m, i + limit) + 1):
+            city_idx = customers[j - 1]
+            load += weights[city_idx]
+            if j == i + 1:
+                cost = distance_matrix[0][city_idx]
+            else:
+                if load > capacity:
+                    break
+                cost += distance_matrix[customers[j - 2]][city_idx]
+            candidate = labels[i] + (cost + distance_matrix[city_idx][0])
+            if candidate < labels[j]:
+                labels[j] = candidate
+                predecessor[j] = i
+
+    trips = []
+    j = m
+    while j > 0:
+        i = predecessor[j]
+        trips.append([depot] + customers[i:j])
+        j = i
+    trips.reverse()
+    return (labels[m] if m else distance_matrix[depot][0]), trips
+
+
+def count_priority_violations(path: List[int], priorities: List[str]) -> int:
+    """
+    Count the Normal cities visited while a Critical city is still pending.
+    The path is read from the depot, which itself is not counted as a visit.
+    """
+    rotated_path = _rotate_path_to_depot(list(path))
+    pending_critical = sum(1 for p in priorities if p == 'Critical')
+    violations = 0
+    for city_idx in rotated_path[1:]:
+        if priorities[city_idx] == 'Critical':
+            pending_critical -= 1
+        elif pending_critical > 0:
+            violations += 1
+    return violations
+
+
+def calculate_fitness(path: List[int], distance_matrix: List[List[float]], weights: List[int] = None, capacity: int = None, priorities: List[str] = None, priority_penalty: float = 0, split: str = DEFAULT_SPLIT, max_trip_cities: int = None) -> float:
     """
     Calculate the fitness of a given path based on the distance matrix.
-    If weights and capacity are provided, calculates the CVRP distance (sum of split trips).
+    If weights and capacity are provided, calculates the CVRP distance (sum of split trips),
+    cutting the trips with split_giant_tour in the given split mode.
     If priorities and penalty are provided, penalizes visiting Normal cities before Critical ones.
     """
     if weights is None or capacity is None:
@@ -105,54 +365,304 @@ def calculate_fitness(path: List[int], distance_matrix: List[List[float]], weigh
         return distance
 
     # CVRP Fitness (Split Routes)
-    # 1. Rotate to start at Depot (0)
-    if 0 in path:
-        zero_idx = path.index(0)
-        rotated_path = path[zero_idx:] + path[:zero_idx]
-    else:
-        rotated_path = path
-        
-    total_distance = 0
-    current_load = 0
-    last_node = rotated_path[0] # Should be 0
-    
-    # Priority Logic Setup
-    pending_critical = 0
+    total_distance, _ = split_giant_tour(path, distance_matrix, weights, capacity, split, max_trip_cities)
+
+    # Penalty for visiting Normal while Critical still exists
     if priorities is not None and priority_penalty > 0:
-        pending_critical = sum(1 for p in priorities if p == 'Critical')
-    
-    # Iterate through cities excluding the depot itself at the start
-    for city_idx in rotated_path[1:]:
-        # Priority Check
-        if priorities is not None and priority_penalty > 0:
-            is_critical = priorities[city_idx] == 'Critical'
-            if is_critical:
-                pending_critical -= 1
-            elif pending_critical > 0:
-                # Penalty for visiting Normal while Critical still exists
-                total_distance += priority_penalty
-
-        w = weights[city_idx]
-        if current_load + w > capacity:
-            # Trip complete: Return to Depot (0)
-            total_distance += distance_matrix[last_node][0]
-            
-            # Start new trip: Depot (0) -> current city
-            total_distance += distance_matrix[0][city_idx]
-            
-            current_load = w
-            last_node = city_idx
-        else:
-            # Continue trip
-            total_distance += distance_matrix[last_node][city_idx]
-            current_load += w
-            last_node = city_idx
-            
-    # Final return to Depot (0)
-    total_distance += distance_matrix[last_node][0]
+        total_distance += count_priority_violations(path, priorities) * priority_penalty
 
     return total_distance
 
+
+def critical_mask(priorities: List[str]) -> np.ndarray:
+    """
+    Convert a list of 'Critical'/'Normal' labels into an integer mask (1 = Critical).
+    """
+    return np.array([1 if p == 'Critical' else 0 for p in priorities], dtype=np.int8)
+
+
+def _rotate_to_depot(routes: np.ndarray) -> np.ndarray:
+    """
+    Rotate every row so it starts at the depot (city 0), like path.index(0) plus slicing.
+    Rows without a 0 are left as they are.
+    """
+    n = routes.shape[1]
+    shift = np.argmax(routes == 0, axis=1)
+    columns = (np.arange(n)[None, :] + shift[:, None]) % n
+    return np.take_along_axis(routes, columns, axis=1)
+
+
+def _greedy_split_population(rotated: np.ndarray, matrix: np.ndarray, weights: np.ndarray, capacity: int, dtype) -> np.ndarray:
+    """
+    Greedy split of split_giant_tour for all rows: sweeps the tour positions in order and
+    applies the capacity reset to every row at each step.
+    """
+    n_routes, n = rotated.shape
+    total = np.zeros(n_routes, dtype=dtype)
+    load = np.zeros(n_routes, dtype=weights.dtype)
+    last = rotated[:, 0]
+
+    for position in range(1, n):
+        city = rotated[:, position]
+        w = weights[city]
+        new_trip = load + w > capacity
+        # Close the trip and start a new one from the depot, or continue the current trip
+        total += np.where(new_trip, matrix[last, 0], matrix[last, city])
+        total += np.where(new_trip, matrix[0, city], 0)
+        load = np.where(new_trip, w, load + w)
+        last = city
+
+    # Final return to Depot (0)
+    total += matrix[last, 0]
+    return total
+
+
+def _optimal_split_population(rotated: np.ndarray, matrix: np.ndarray, weights: np.ndarray, capacity: int, max_trip_cities: int, dtype) -> np.ndarray:
+    """
+    Optimal (Prins) split of split_giant_tour for all rows: the DAG relaxation loops over
+    trip start i and end j, and each step relaxes the label of every row at once.
+    """
+    n_routes, n = rotated.shape
+    m = n - 1
+    if m == 0:
+        return matrix[rotated[:, 0], 0].astype(dtype)
+
+    customers = rotated[:, 1:]
+    demand = weights[customers]
+    from_depot = matrix[0, customers].astype(dtype)
+    to_depot = matrix[customers, 0].astype(dtype)
+    inner = matrix[customers[:, :-1], customers[:, 1:]].astype(dtype)
+
+    limit = m if max_trip_cities is None else max_trip_cities
+    labels = np.full((n_routes, m + 1), np.inf, dtype=dtype)
+    labels[:, 0] = 0
+    for i in range(m):
+        base = labels[:, i]
+        load = demand[:, i].copy()
+        cost = from_depot[:, i].copy()
+        feasible = np.ones(n_routes, dtype=bool)
+        for j in range(i + 1, min(m, i + limit) + 1):
+            if j > i + 1:
+                load += demand[:, j - 1]
+                feasible &= load <= capacity
+                if not feasible.any():
+                    break
+                cost += inner[:, j - 2]
+            candidate = base + (cost + to_depot[:, j - 1])
+            better = feasible & (candidate < labels[:, j])
+            labels[:, j] = np.where(better, candidate, labels[:, j])
+
+    return labels[:, m]
+
+
+def _cvrp_population_fitness(routes: np.ndarray, matrix: np.ndarray, weights: List[int], capacity: int, priorities: List[str] = None, priority_penalty: float = 0, split: str = DEFAULT_SPLIT, max_trip_cities: int = None) -> np.ndarray:
+    """
+    CVRP branch of calculate_fitness, evaluated for all rows at once.
+
+    Additions happen in the same order as in split_giant_tour and calculate_fitness, which keeps
+    the results bit-identical to the per-path reference.
+    """
+    if split not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode '{split}', expected one of {SPLIT_MODES}")
+
+    dtype = matrix.dtype if np.issubdtype(matrix.dtype, np.floating) else np.float64
+    rotated = _rotate_to_depot(routes)
+    weights = np.asarray(weights)
+
+    if split == 'greedy':
+        total = _greedy_split_population(rotated, matrix, weights, capacity, dtype)
+    else:
+        total = _optimal_split_population(rotated, matrix, weights, capacity, max_trip_cities, dtype)
+
+    if priorities is not None and priority_penalty > 0:
+        # Normal cities visited while a Critical one is still pending (the depot is not a visit)
+        is_critical = critical_mask(priorities).astype(bool)
+        visited_critical = is_critical[rotated[:, 1:]]
+        pending_critical = int(is_critical.sum()) - np.cumsum(visited_critical, axis=1)
+        violations = (~visited_critical & (pending_critical > 0)).sum(axis=1)
+        total = total + (violations * priority_penalty).astype(dtype)
+
+    return total
+
+
+# Rows of routes converted to uint64 at a time when hashing them
+HASH_CHUNK_CELLS = 1 << 20
+
+
+def _route_hash_weights(n_cities: int) -> np.ndarray:
+    """Fixed random odd (n_cities, 2) uint64 weights of the two route digests."""
+    weights = _ROUTE_HASH_WEIGHTS.get(n_cities)
+    if weights is None:
+        weights = np.random.default_rng(0x5EED).integers(0, 2**63, (n_cities, 2), dtype=np.uint64) * 2 + 1
+        _ROUTE_HASH_WEIGHTS[n_cities] = weights = weights.astype(np.uint64)
+    return weights
+
+
+_ROUTE_HASH_WEIGHTS = {}
+
+
+class FitnessCache:
+    """
+    Bounded memo of route fitness values, held in a direct-mapped numpy table.
+
+    Routes are keyed by two 64-bit digests, random linear combinations of their city indices
+    (mod 2**64) computed for a whole population at once. The first digest picks the slot
+    (a newer route replaces the one in its slot), both are stored with the value and checked
+    on every lookup, so two routes would have to collide on 128 bits to be confused. Lookups
+    and stores work on whole arrays of keys, without per-route Python objects, and the table
+    takes 24 bytes per slot whatever the number of cities (2.4 MB for the default max_size).
+
+    The cache remembers the problem it was filled for (distance matrix, weights, capacity,
+    priorities, penalty and split) and empties itself when any of them changes, so a hit
+    always returns what calculate_fitness would compute. The matrix is held by reference and
+    compared by identity (an id alone could be reused by a new matrix once the old one is
+    freed); editing a matrix in place needs an explicit clear().
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._keys = np.zeros((max_size, 2), dtype=np.uint64)
+        self._values = np.zeros(max_size)
+        self._filled = np.zeros(max_size, dtype=bool)
+        self._context = None
+        self._distance_matrix = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def route_keys(routes) -> np.ndarray:
+        """Return the (k, 2) uint64 digests of every row of a 2-D route array."""
+        routes = np.asarray(routes)
+        keys = np.empty((len(routes), 2), dtype=np.uint64)
+        if routes.ndim != 2 or routes.shape[1] == 0:
+            keys[:] = 0
+            return keys
+        weights = _route_hash_weights(routes.shape[1])
+        chunk = max(1, HASH_CHUNK_CELLS // routes.shape[1])
+        for start in range(0, len(routes), chunk):
+            # Integer matmul wraps around mod 2**64
+            np.matmul(routes[start:start + chunk].astype(np.uint64), weights, out=keys[start:start + chunk])
+        return keys
+
+    @staticmethod
+    def route_key(route) -> Tuple[int, int]:
+        """Return the cache key of a single route, as a hashable pair of ints."""
+        first, second = FitnessCache.route_keys(np.asarray(route)[None])[0].tolist()
+        return first, second
+
+    def set_context(self, distance_matrix, weights=None, capacity=None, priorities=None, priority_penalty=0, split=DEFAULT_SPLIT, max_trip_cities=None) -> None:
+        """Declare the problem the next lookups belong to; clears the cache if it changed."""
+        context = (None if weights is None else tuple(weights), capacity,
+                   None if priorities is None else tuple(priorities), priority_penalty,
+                   split, max_trip_cities)
+        if distance_matrix is not self._distance_matrix or context != self._context:
+            self.clear()
+            self._distance_matrix = distance_matrix
+            self._context = context
+
+    def lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cached fitness of a (k, 2) array of keys.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: The fitness values (undefined where missing) and the hit mask.
+        """
+        slots = keys[:, 0] % np.uint64(self.max_size)
+        hit = self._filled[slots] & (self._keys[slots] == keys).all(axis=1)
+        return self._values[slots], hit
+
+    def store(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """Insert a (k, 2) array of keys with their fitness values."""
+        slots = keys[:, 0] % np.uint64(self.max_size)
+        self._keys[slots] = keys
+        self._values[slots] = values
+        self._filled[slots] = True
+
+    def get(self, key: Tuple[int, int]):
+        """Return the cached fitness for key, or None on a miss."""
+        value, hit = self.lookup(np.array([key], dtype=np.uint64))
+        if not hit[0]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return float(value[0])
+
+    def put(self, key: Tuple[int, int], value: float) -> None:
+        self.store(np.array([key], dtype=np.uint64), value)
+
+    def clear(self) -> None:
+        self._filled[:] = False
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._filled))
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self),
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+def calculate_population_fitness(population, distance_matrix: np.ndarray, weights: List[int] = None, capacity: int = None, priorities: List[str] = None, priority_penalty: float = 0, split: str = DEFAULT_SPLIT, max_trip_cities: int = None, cache: 'FitnessCache' = None, evaluator=None) -> np.ndarray:
+    """
+    Calculate the fitness of every individual of a population at once.
+
+    Takes the same problem arguments as calculate_fitness, which stays the reference
+    implementation: both return identical values for every path.
+    In TSP mode (no weights/capacity) all tour lengths come from a single gather over the
+    distance matrix, summed left to right so the float result matches the per-path loop.
+    In CVRP mode the split (greedy or optimal, see split_giant_tour) and the priority penalty
+    are computed for all rows together, looping over tour positions instead of individuals.
+
+    With a FitnessCache, only the routes the cache has not seen yet are evaluated.
+    An evaluator (e.g. parallel_fitness.ParallelFitnessEvaluator, built for the same problem
+    arguments) takes over the evaluation of those routes.
+
+    Parameters:
+    - population: The routes, as a 2-D integer array (one row per individual) or a list of lists.
+    - distance_matrix (np.ndarray): The (n, n) distance matrix, or a tsplib.DistanceOracle.
+    - cache (FitnessCache): Optional memo of already evaluated routes.
+    - evaluator: Optional callable returning the fitness of a 2-D array of routes.
+
+    Returns:
+    np.ndarray: The fitness of each individual, in population order.
+    """
+    routes = np.asarray(population, dtype=np.intp)
+    if routes.ndim != 2 or routes.shape[1] == 0:
+        return np.zeros(len(routes))
+
+    if cache is not None:
+        cache.set_context(distance_matrix, weights, capacity, priorities, priority_penalty, split, max_trip_cities)
+        keys = cache.route_keys(routes)
+        fitness, hit = cache.lookup(keys)
+        missing = np.flatnonzero(~hit)
+        evaluated = 0
+        if len(missing):
+            # Routes repeated within the population are evaluated once
+            _, first, inverse = np.unique(keys[missing], axis=0, return_index=True, return_inverse=True)
+            values = calculate_population_fitness(routes[missing[first]], distance_matrix, weights, capacity, priorities, priority_penalty, split, max_trip_cities, evaluator=evaluator)
+            fitness = fitness.astype(values.dtype, copy=False)
+            fitness[missing] = values[inverse.ravel()]
+            cache.store(keys[missing[first]], values)
+            evaluated = len(first)
+        # Misses count the routes actually evaluated
+        cache.misses += evaluated
+        cache.hits += len(routes) - evaluated
+        return fitness
+
+    if evaluator is not None:
+        return np.asarray(evaluator(routes))
+
+    # Lazy matrices (tsplib.DistanceOracle) index like arrays and must not be materialized
+    matrix = distance_matrix if hasattr(distance_matrix, 'shape') else np.asarray(distance_matrix)
+
+    if weights is None or capacity is None:
+        edges = matrix[routes, np.roll(routes, -1, axis=1)]
+        # cumsum adds strictly left to right, unlike sum's pairwise reduction
+        return np.cumsum(edges, axis=1)[:, -1]
+
+    return _cvrp_population_fitness(routes, matrix, weights, capacity, priorities, priority_penalty, split, max_trip_cities)
+
     
 def calculate_fitness_path(path, distance_matrix, info_locais):
     total_distance = 0
@@ -180,10 +690,20 @@ def calculate_fitness_path(path, distance_matrix, info_locais):
     
 
 
+def _random_cut(length: int) -> Tuple[int, int]:
+    """Draw the [start, end) segment used by order_crossover and partially_mapped_crossover."""
+    start_index = random.randint(0, length - 1)
+    end_index = random.randint(start_index + 1, length)
+    return start_index, end_index
+
+
 def order_crossover(parent1: List[Tuple[float, float]], parent2: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
     """
     Perform order crossover (OX) between two parent sequences to create a child sequence.
 
+    The segment of parent1 is kept in place and the other positions are filled, left to right,
+    with the remaining genes in parent2 order. Runs in O(n).
+
     Parameters:
     - parent1 (List[Tuple[float, float]]): The first parent sequence.
     - parent2 (List[Tuple[float, float]]): The second parent sequence.
@@ -194,21 +714,199 @@ def order_crossover(parent1: List[Tuple[float, float]], parent2: List[Tuple[floa
     length = len(parent1)
 
     # Choose two random indices for the crossover
-    start_index = random.randint(0, length - 1)
-    end_index = random.randint(start_index + 1, length)
+    start_index, end_index = _random_cut(length)
 
     # Initialize the child with a copy of the substring from parent1
-    child = parent1[start_index:end_index]
+    segment = list(parent1[start_index:end_index])
+    taken = set(segment)
+
+    # Genes from parent2 not in the segment, in parent2 order, go before and after it
+    remaining_genes = [gene for gene in parent2 if gene not in taken]
+    return remaining_genes[:start_index] + segment + remaining_genes[start_index:]
 
-    # Fill in the remaining positions with genes from parent2
-    remaining_positions = [i for i in range(length) if i < start_index or i >= end_index]
-    remaining_genes = [gene for gene in parent2 if gene not in child]
 
-    for position, gene in zip(remaining_positions, remaining_genes):
-        child.insert(position, gene)
+def partially_mapped_crossover(parent1: List[int], parent2: List[int]) -> List[int]:
+    """
+    Perform partially mapped crossover (PMX) between two parent sequences.
+
+    The segment of parent1 is kept in place. Every other position takes the gene of parent2,
+    and a gene already used by the segment is replaced through the segment mapping
+    parent1[i] -> parent2[i] until a free gene is found. Runs in O(n).
 
+    Parameters:
+    - parent1 (List[int]): The first parent sequence.
+    - parent2 (List[int]): The second parent sequence.
+
+    Returns:
+    List[int]: The child sequence.
+    """
+    length = len(parent1)
+    start_index, end_index = _random_cut(length)
+
+    child = list(parent2)
+    child[start_index:end_index] = parent1[start_index:end_index]
+    in_segment = set(parent1[start_index:end_index])
+    position_in_parent1 = {gene: i for i, gene in enumerate(parent1)}
+
+    for i in list(range(start_index)) + list(range(end_index, length)):
+        gene = parent2[i]
+        while gene in in_segment:
+            gene = parent2[position_in_parent1[gene]]
+        child[i] = gene
     return child
 
+
+def cycle_crossover(parent1: List[int], parent2: List[int]) -> List[int]:
+    """
+    Perform cycle crossover (CX) between two parent sequences.
+
+    Positions are split into the cycles of the mapping i -> position of parent2[i] in parent1.
+    The cycles, taken in order of their first position, are copied alternately from parent1
+    and parent2, so every gene keeps the position it had in one of the parents.
+
+    Parameters:
+    - parent1 (List[int]): The first parent sequence.
+    - parent2 (List[int]): The second parent sequence.
+
+    Returns:
+    List[int]: The child sequence.
+    """
+    length = len(parent1)
+    position_in_parent1 = {gene: i for i, gene in enumerate(parent1)}
+    child = [None] * length
+    visited = [False] * length
+
+    cycle = 0
+    for start in range(length):
+        if visited[start]:
+            continue
+        source = parent1 if cycle % 2 == 0 else parent2
+        i = start
+        while not visited[i]:
+            visited[i] = True
+            child[i] = source[i]
+            i = position_in_parent1[parent2[i]]
+        cycle += 1
+    return child
+
+
+def _batch_cuts(n_pairs: int, length: int, starts, ends, rng) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row [start, end) segments, drawn like _random_cut unless given."""
+    if starts is None or ends is None:
+        rng = rng if rng is not None else np.random.default_rng()
+        starts = rng.integers(0, length, n_pairs)
+        ends = rng.integers(starts + 1, length + 1)
+    return np.asarray(starts)[:, None], np.asarray(ends)[:, None]
+
+
+def order_crossover_batch(parents1: np.ndarray, parents2: np.ndarray, starts: np.ndarray = None, ends: np.ndarray = None, rng: np.random.Generator = None, out: np.ndarray = None) -> np.ndarray:
+    """
+    Order crossover for many parent pairs at once: row k of the result is the OX child of
+    parents1[k] and parents2[k]. Uses a boolean "taken" mask per row, O(n) per child.
+
+    Parameters:
+    - parents1, parents2 (np.ndarray): (P, n) integer arrays of paired parents.
+    - starts, ends (np.ndarray): Optional per-row segments; drawn from rng otherwise.
+    - rng (np.random.Generator): Random generator for the segments.
+    - out (np.ndarray): Optional (P, n) array to write the children into.
+
+    Returns:
+    np.ndarray: The (P, n) children.
+    """
+    parents1, parents2 = np.asarray(parents1), np.asarray(parents2)
+    n_pairs, length = parents1.shape
+    starts, ends = _batch_cuts(n_pairs, length, starts, ends, rng)
+    columns = np.arange(length)[None, :]
+    in_segment = (columns >= starts) & (columns < ends)
+
+    # taken[k, gene] is True for the genes of parents1[k]'s segment
+    taken = np.zeros((n_pairs, length), dtype=bool)
+    np.put_along_axis(taken, parents1, in_segment, axis=1)
+    keep = ~np.take_along_axis(taken, parents2, axis=1)
+
+    # Compact the kept parent2 genes to the left of each row, preserving their order
+    remaining = np.zeros_like(parents2)
+    rows, cols = np.nonzero(keep)
+    remaining[rows, np.cumsum(keep, axis=1)[rows, cols] - 1] = parents2[rows, cols]
+
+    source = np.where(columns < starts, columns, columns - (ends - starts))
+    filled = np.take_along_axis(remaining, np.clip(source, 0, length - 1), axis=1)
+    if out is None:
+        out = np.empty_like(parents1)
+    np.copyto(out, np.where(in_segment, parents1, filled))
+    return out
+
+
+def partially_mapped_crossover_batch(parents1: np.ndarray, parents2: np.ndarray, starts: np.ndarray = None, ends: np.ndarray = None, rng: np.random.Generator = None, out: np.ndarray = None) -> np.ndarray:
+    """
+    PMX for many parent pairs at once; same arguments as order_crossover_batch.
+    Conflicting genes of every row follow the segment mapping together, one step per loop.
+    """
+    parents1, parents2 = np.asarray(parents1), np.asarray(parents2)
+    n_pairs, length = parents1.shape
+    starts, ends = _batch_cuts(n_pairs, length, starts, ends, rng)
+    columns = np.arange(length)[None, :]
+    in_segment = (columns >= starts) & (columns < ends)
+
+    position_in_parent1 = np.empty_like(parents1)
+    np.put_along_axis(position_in_parent1, parents1, np.broadcast_to(columns, parents1.shape), axis=1)
+    gene_in_segment = np.zeros((n_pairs, length), dtype=bool)
+    np.put_along_axis(gene_in_segment, parents1, in_segment, axis=1)
+
+    genes = parents2.copy()
+    rows, cols = np.nonzero(~in_segment & np.take_along_axis(gene_in_segment, genes, axis=1))
+    values = genes[rows, cols]
+    # Only the still-conflicting (row, col) entries are followed at each step
+    while len(rows):
+        values = parents2[rows, position_in_parent1[rows, values]]
+        done = ~gene_in_segment[rows, values]
+        genes[rows[done], cols[done]] = values[done]
+        rows, cols, values = rows[~done], cols[~done], values[~done]
+
+    if out is None:
+        out = np.empty_like(parents1)
+    np.copyto(out, np.where(in_segment, parents1, genes))
+    return out
+
+
+def cycle_crossover_batch(parents1: np.ndarray, parents2: np.ndarray, starts: np.ndarray = None, ends: np.ndarray = None, rng: np.random.Generator = None, out: np.ndarray = None) -> np.ndarray:
+    """
+    Cycle crossover for many parent pairs at once (CX is deterministic, so starts, ends and rng
+    are only accepted for a uniform signature). Each position learns the smallest position of
+    its cycle by pointer doubling, which numbers the cycles in the same order as cycle_crossover.
+    """
+    parents1, parents2 = np.asarray(parents1), np.asarray(parents2)
+    n_pairs, length = parents1.shape
+    columns = np.broadcast_to(np.arange(length)[None, :], parents1.shape)
+
+    position_in_parent1 = np.empty_like(parents1)
+    np.put_along_axis(position_in_parent1, parents1, columns, axis=1)
+    successor = np.take_along_axis(position_in_parent1, parents2, axis=1)
+
+    cycle_start = columns.copy()
+    for _ in range(max(1, int(np.ceil(np.log2(max(length, 2))))) + 1):
+        cycle_start = np.minimum(cycle_start, np.take_along_axis(cycle_start, successor, axis=1))
+        successor = np.take_along_axis(successor, successor, axis=1)
+
+    cycle_number = np.take_along_axis(np.cumsum(cycle_start == columns, axis=1) - 1, cycle_start, axis=1)
+    if out is None:
+        out = np.empty_like(parents1)
+    np.copyto(out, np.where(cycle_number % 2 == 0, parents1, parents2))
+    return out
+
+
+CROSSOVER_OPERATORS = {
+    'ox': order_crossover,
+    'pmx': partially_mapped_crossover,
+    'cx': cycle_crossover,
+}
+
+CROSSOVER_BATCH_OPERATORS = {
+    'ox': order_crossover_batch,
+    'pmx': partially_mapped_crossover_batch,
+    'cx': cycle_crossover_batch,
+}
+
 ### demonstration: crossover test code
 # Example usage:
 # parent1 = [(1, 1), (2, 2), (3, 3), (4,4), (5,5), (6, 6)]
@@ -236,10 +934,11 @@ def order_crossover(parent1: List[Tuple[float, float]], parent2: List[Tuple[floa
 
 
 
-# TODO: implement a mutation_intensity and invert pieces of code instead of just swamping two. 
 def mutate(solution:  List[Tuple[float, float]], mutation_probability: float) ->  List[Tuple[float, float]]:
     """
-    Mutate a solution by inverting a segment of the sequence with a given mutation probability.
+    Mutate a solution by swapping two adjacent cities with a given mutation probability.
+    Segment inversion, scramble, displacement and multi-swap with a mutation intensity, and the
+    exact tour length change of each move, are in mutation.py.
 
     Parameters:
     - solution (List[int]): The solution sequence to be mutated.
@@ -275,6 +974,173 @@ def mutate(solution:  List[Tuple[float, float]], mutation_probability: float) ->
 # print("Mutated Solution:", mutated_solution)
 
 
+class FitnessTrace:
+    """
+    Prefix state of a CVRP fitness evaluation, kept so a path that only differs from this one
+    after some position can be re-scored from that position instead of from the depot.
+
+    For every position p of the depot-rotated path it stores the split state after serving
+    the cities up to p (running total and load for the greedy split, shortest-path labels
+    for the optimal split) and the pending-critical and violation counts.
+    """
+
+    def __init__(self, path: List[int], distance_matrix, weights: List[int], capacity: int, priorities: List[str] = None, priority_penalty: float = 0, split: str = DEFAULT_SPLIT, max_trip_cities: int = None):
+        if split not in SPLIT_MODES:
+            raise ValueError(f"Unknown split mode '{split}', expected one of {SPLIT_MODES}")
+        self.distance_matrix = distance_matrix
+        self.weights = weights
+        self.capacity = capacity
+        self.priorities = priorities
+        self.priority_penalty = priority_penalty
+        self.split = split
+        self.max_trip_cities = max_trip_cities
+        self.use_priorities = priorities is not None and priority_penalty > 0
+
+        self.path = list(path)
+        self.zero_index = path.index(0) if 0 in path else 0
+        self.rotated = _rotate_path_to_depot(self.path)
+        m = len(self.rotated) - 1
+        self.totals = [0] * (m + 1)
+        self.loads = [0] * (m + 1)
+        self.labels = [0] + [float('inf')] * m
+        self.pending = [sum(1 for p in priorities if p == 'Critical') if self.use_priorities else 0] * (m + 1)
+        self.violations = [0] * (m + 1)
+        self.fitness = self._evaluate_from(1)
+
+    def _evaluate_from(self, start: int) -> float:
+        """Recompute the states of positions start..m (the earlier ones are kept) and return the fitness."""
+        rotated, d, weights, capacity = self.rotated, self.distance_matrix, self.weights, self.capacity
+        m = len(rotated) - 1
+
+        if self.use_priorities:
+            for p in range(start, m + 1):
+                pending, violations = self.pending[p - 1], self.violations[p - 1]
+                if self.priorities[rotated[p]] == 'Critical':
+                    pending -= 1
+                elif pending > 0:
+                    violations += 1
+                self.pending[p], self.violations[p] = pending, violations
+
+        if m == 0:
+            total_distance = d[rotated[0]][0]
+        elif self.split == 'greedy':
+            # Same additions as split_giant_tour, resumed from the state after position start-1
+            for p in range(start, m + 1):
+                city_idx, last_node = rotated[p], rotated[p - 1]
+                total, load = self.totals[p - 1], self.loads[p - 1]
+                w = weights[city_idx]
+                if load + w > capacity:
+                    total += d[last_node][0]
+                    total += d[0][city_idx]
+                    load = w
+                else:
+                    total += d[last_node][city_idx]
+                    load += w
+                self.totals[p], self.loads[p] = total, load
+            total_distance = self.totals[m] + d[rotated[m]][0]
+        else:
+            # Labels before start only involve unchanged cities; trips reaching start may begin earlier
+            limit = m if self.max_trip_cities is None else self.max_trip_cities
+            first = start - 1
+            load = weights[rotated[start]]
+            while first > 0 and start - first < limit and load + weights[rotated[first]] <= capacity:
+                load += weights[rotated[first]]
+                first -= 1
+
+            labels = self.labels
+            for j in range(start, m + 1):
+                labels[j] = float('inf')
+            for i in range(first, m):
+                load = 0
+                cost = 0
+                for j in range(i + 1, min(m, i + limit) + 1):
+                    city_idx = rotated[j]
+                    load += weights[city_idx]
+                    if j == i + 1:
+                        cost = d[0][city_idx]
+                    else:
+                        if load > capacity:
+                            break
+                        cost += d[rotated[j - 1]][city_idx]
+                    if j < start:
+                        continue
+                    candidate = labels[i] + (cost + d[city_idx][0])
+                    if candidate < labels[j]:
+                        labels[j] = candidate
+            total_distance = labels[m]
+
+        if self.use_priorities:
+            total_distance += self.violations[m] * self.priority_penalty
+        return total_distance
+
+    def copy(self) -> 'FitnessTrace':
+        """Independent copy, so a candidate can be re-scored without touching this trace."""
+        trace = copy.copy(self)
+        trace.totals, trace.loads, trace.labels = list(self.totals), list(self.loads), list(self.labels)
+        trace.pending, trace.violations = list(self.pending), list(self.violations)
+        return trace
+
+    def reroute(self, path: List[int], first: int, last: int) -> float:
+        """
+        Replace the path, in place, by one that only differs from it at positions first..last,
+        and re-score it from the first changed position. Returns the new fitness.
+        """
+        n = len(self.path)
+        z = self.zero_index
+        self.path = list(path)
+        if 0 in self.path and self.path[z] != 0:
+            # The depot moved: the rotation changes, so everything is re-scored
+            self.zero_index = self.path.index(0)
+            start = 1
+        elif first <= z <= last:
+            # The changed segment wraps around the depot in rotated order
+            start = 1
+        else:
+            start = (first - z) % n
+        self.rotated = _rotate_path_to_depot(self.path)
+
+        if n > 1:
+            self.fitness = self._evaluate_from(max(start, 1))
+        return self.fitness
+
+    def child_fitness(self, child: List[int], move, inplace: bool = False) -> float:
+        """
+        Fitness of child, this path with a mutation.py move applied, re-scored from the first
+        trip the move touches. With inplace=True the trace is updated to describe the child.
+        """
+        trace = self if inplace else self.copy()
+        if move is None:
+            return trace.fitness
+        return trace.reroute(list(child), move[0], move[1])
+
+
+def calculate_fitness_delta(parent: List[int], child: List[int], move, parent_fitness: float, distance_matrix, weights: List[int] = None, capacity: int = None, priorities: List[str] = None, priority_penalty: float = 0, split: str = DEFAULT_SPLIT, max_trip_cities: int = None, delta: float = None, trace: FitnessTrace = None) -> float:
+    """
+    Fitness of child, the parent mutated by a mutation.py operator that returned (move, delta),
+    without re-scoring the whole child.
+
+    In TSP mode this is parent_fitness plus the operator's exact tour length delta (the child is
+    scored in full if no delta is given). In CVRP mode the parent's FitnessTrace is resumed from
+    the first changed position of move: the greedy split keeps its state up to there and the
+    optimal split only re-labels from the first trip that can reach it, so the result equals
+    calculate_fitness exactly. Pass the trace when one parent has several children, so it is
+    only built once.
+
+    Returns:
+    float: The fitness of the child.
+    """
+    if weights is None or capacity is None:
+        if move is None:
+            return parent_fitness
+        if delta is None:
+            return calculate_fitness(list(child), distance_matrix)
+        return parent_fitness + delta
+
+    if trace is None:
+        trace = FitnessTrace(list(parent), distance_matrix, weights, capacity, priorities, priority_penalty, split, max_trip_cities)
+    return trace.child_fitness(child, move)
+
+
 def sort_population(population: List[List[Tuple[float, float]]], fitness: List[float]) -> Tuple[List[List[Tuple[float, float]]], List[float]]:
     """
     Sort a population based on fitness values.
@@ -298,6 +1164,415 @@ def sort_population(population: List[List[Tuple[float, float]]], fitness: List[f
     return sorted_population, sorted_fitness
 
 
+# Cities per parent buffer of GeneticEngine: parents are gathered for crossover in chunks of
+# this many cells (8 MB of int16), not as two copies of the whole population
+PARENT_BUFFER_CELLS = 1 << 22
+
+
+class GeneticEngine:
+    """
+    Genetic algorithm over a preallocated population matrix.
+
+    The population is one (population_size, n_cities) array of int16 city indices (int32 above
+    32768 cities), so 10k individuals of 5k cities take 100 MB per buffer instead of gigabytes
+    of boxed Python ints. Two buffers are swapped between generations: sorting and breeding
+    write into the idle one, and mutation edits its rows in place. Crossover parents are gathered
+    chunk by chunk into two small preallocated buffers (PARENT_BUFFER_CELLS cities each), so a
+    generation allocates no population-sized arrays; the footprint is the two buffers, 200 MB
+    at that scale.
+
+    Each step evaluates and sorts the population, keeps elite_size elites, draws all parent
+    pairs with one call to a selection.py method (roulette on 1 / fitness by default), fills
+    the rest with batch crossover children and mutates them in place with a mutation.py
+    operator (the original adjacent swap by default). All randomness comes from one
+    np.random.Generator, so a seed reproduces a run exactly.
+    With an instrumentation.Instrumentation, step() times its phases (fitness, sort,
+    local_search, selection, crossover, mutation) and counts the routes actually scored; the
+    driver of the loop closes each generation record.
+    With a convergence.RestartPolicy, a stagnating population is re-seeded around its elites
+    at the start of a step.
+    With track_diversity, a diversity.DiversityTracker follows the population every step
+    (diversity_metrics, and gauges of the instrumentation); with reject_duplicates, children that
+    repeat an elite or an earlier child are mutated again (or replaced by a random route) before
+    they are evaluated.
+    With an adaptive.AdaptiveController, mutation_probability, mutation_intensity and crossover
+    are re-tuned every step from which of the previous children, mutated or not, made it into
+    the best part of the population they were bred from, and from the diversity, which is then
+    always tracked.
+    With a seeding.PopulationSeeder, part of the random initial population is replaced by
+    nearest-neighbour, greedy-edge, savings or sweep routes.
+    """
+
+    def __init__(self, distance_matrix: np.ndarray, population_size: int, mutation_probability: float = 0.5,
+                 weights: List[int] = None, capacity: int = None, priorities: List[str] = None,
+                 priority_penalty: float = 0, split: str = DEFAULT_SPLIT, crossover: str = 'ox',
+                 elite_size: int = 1, seed: int = None, initial_population=None, cache: FitnessCache = None,
+                 selection: str = 'roulette', selection_options: dict = None, evaluator=None,
+                 local_search=None, local_search_elites: int = 1, local_search_offspring: float = 0.0,
+                 mutation: str = 'swap', mutation_intensity: int = 1, instrumentation=None,
+                 restart=None, track_diversity: bool = False, reject_duplicates: bool = False, adaptive=None,
+                 seeding=None):
+        if crossover not in CROSSOVER_BATCH_OPERATORS:
+            raise ValueError(f"Unknown crossover '{crossover}', expected one of {tuple(CROSSOVER_BATCH_OPERATORS)}")
+        if mutation not in MUTATION_OPERATORS:
+            raise ValueError(f"Unknown mutation '{mutation}', expected one of {tuple(MUTATION_OPERATORS)}")
+        if selection not in SELECTION_METHODS:
+            raise ValueError(f"Unknown selection '{selection}', expected one of {tuple(SELECTION_METHODS)}")
+
+        self.distance_matrix = distance_matrix
+        self.n_cities = len(distance_matrix)
+        self.population_size = population_size
+        self.mutation_probability = mutation_probability
+        self.mutation = mutation
+        self.mutation_intensity = mutation_intensity
+        self.weights = weights
+        self.capacity = capacity
+        self.priorities = priorities
+        self.priority_penalty = priority_penalty
+        self.split = split
+        self.crossover = crossover
+        self.selection = selection
+        self.selection_options = selection_options or {}
+        self.elite_size = min(elite_size, population_size)
+        self.rng = np.random.default_rng(seed)
+        self.cache = cache if cache is not None else FitnessCache()
+        # Optional population evaluator for the same problem, e.g. a ParallelFitnessEvaluator
+        self.evaluator = evaluator
+        # Optional memetic stage: a local_search.LocalSearch for the same problem
+        self.local_search = local_search
+        self.local_search_elites = local_search_elites if local_search is not None else 0
+        self.local_search_offspring = local_search_offspring if local_search is not None else 0.0
+        self._polished = set()
+        self.instrumentation = instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
+        self.restart_policy = restart
+        self.adaptive = adaptive
+        if adaptive is not None:
+            unknown = [name for name in adaptive.crossovers if name not in CROSSOVER_BATCH_OPERATORS]
+            if unknown:
+                raise ValueError(f"Unknown crossover {unknown}, expected some of {tuple(CROSSOVER_BATCH_OPERATORS)}")
+            adaptive.attach(self)
+        # Fitness a child of the last step had to beat to count as a success, and which children
+        # were mutated, for the adaptive controller
+        self._success_threshold = None
+        self._mutated = None
+        self.diversity = DiversityTracker(self.n_cities) if track_diversity or adaptive is not None else None
+        self.diversity_metrics = {}
+        self.reject_duplicates = reject_duplicates
+
+        dtype = np.int16 if self.n_cities <= np.iinfo(np.int16).max + 1 else np.int32
+        self.population = np.empty((population_size, self.n_cities), dtype=dtype)
+        self._next_population = np.empty_like(self.population)
+        parent_rows = max(1, min(population_size, PARENT_BUFFER_CELLS // max(self.n_cities, 1)))
+        self._parents = np.empty((2, parent_rows, self.n_cities), dtype=dtype)
+        self.fitness = np.empty(population_size)
+        self.best_route = np.empty(self.n_cities, dtype=dtype)
+        self.best_fitness = float('inf')
+        self.best_fitness_values = []
+        self.generation = 0
+        # Generations of the last new best and of the last restart, for convergence.py
+        self.last_improvement = 0
+        self.last_restart = 0
+        self.restarts = 0
+        # Routes actually scored (FitnessCache misses), for throughput figures
+        self.evaluations = 0
+        self.stop_reason = None
+
+        if initial_population is None:
+            self.population[:] = np.arange(self.n_cities, dtype=dtype)
+            self.population[:] = self.rng.permuted(self.population, axis=1)
+            # Number of individuals built by the seeding heuristics
+            self.seeded = seeding.seed(self) if seeding is not None else 0
+        else:
+            self.population[:] = np.asarray(initial_population, dtype=dtype)
+            self.seeded = 0
+        self._evaluated = False
+
+    def evaluate(self) -> np.ndarray:
+        """Score the current population (cached routes are not re-scored)."""
+        if not self._evaluated:
+            misses = self.cache.misses
+            self.fitness[:] = calculate_population_fitness(self.population, self.distance_matrix, self.weights,
+                                                           self.capacity, self.priorities, self.priority_penalty,
+                                                           self.split, cache=self.cache, evaluator=self.evaluator)
+            self._evaluated = True
+            self.evaluations += self.cache.misses - misses
+            self.instrumentation.count('evaluations', self.cache.misses - misses)
+        return self.fitness
+
+    def sort(self) -> None:
+        """Sort population and fitness by fitness, best first, through the idle buffer."""
+        order = np.argsort(self.evaluate(), kind='stable')
+        # Children no longer sit after the elites
+        self._success_threshold = None
+        np.take(self.population, order, axis=0, out=self._next_population)
+        self.population, self._next_population = self._next_population, self.population
+        self.fitness[:] = self.fitness[order]
+
+    def select_parents(self, n_pairs: int) -> np.ndarray:
+        """Draw n_pairs parent index pairs with the configured selection method, in one call."""
+        return select_parents(self.fitness, n_pairs, self.selection, self.rng, **self.selection_options)
+
+    def breed(self, pairs: np.ndarray, children: np.ndarray) -> None:
+        """Write the crossover child of each parent index pair into the rows of children."""
+        first, second = self._parents
+        operator = CROSSOVER_BATCH_OPERATORS[self.crossover]
+        # All cuts drawn at once, so the children do not depend on the chunk size (CX has none)
+        starts = ends = None
+        if self.crossover != 'cx':
+            starts, ends = (cuts.ravel() for cuts in _batch_cuts(len(pairs), self.n_cities, None, None, self.rng))
+        for start in range(0, len(pairs), len(first)):
+            stop = min(start + len(first), len(pairs))
+            k = stop - start
+            np.take(self.population, pairs[start:stop, 0], axis=0, out=first[:k])
+            np.take(self.population, pairs[start:stop, 1], axis=0, out=second[:k])
+            operator(first[:k], second[:k], None if starts is None else starts[start:stop],
+                     None if ends is None else ends[start:stop], out=children[start:stop])
+
+    def mutate(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Mutate each row in place with mutation_probability, using the mutation.py operator
+        and intensity of this engine; returns the indices of the mutated rows.
+        """
+        if self.n_cities < 2 or len(rows) == 0:
+            return np.empty(0, dtype=np.intp)
+        if self.mutation == 'swap' and self.mutation_intensity == 1:
+            # The adjacent swap of mutate, vectorized over the rows
+            mutated = np.nonzero(self.rng.random(len(rows)) < self.mutation_probability)[0]
+            index = self.rng.integers(0, self.n_cities - 1, len(mutated))
+            held = rows[mutated, index]
+            rows[mutated, index] = rows[mutated, index + 1]
+            rows[mutated, index + 1] = held
+            return mutated
+        return mutate_population(rows, self.mutation_probability, self.mutation, self.mutation_intensity, self.rng)[0]
+
+    def remove_duplicates(self, children: np.ndarray, kept: np.ndarray, tries: int = 3) -> List[int]:
+        """
+        Make every row of children differ from the rows of kept and from the earlier children:
+        a repeated route is mutated again (with this engine's operator and intensity) up to tries
+        times, then replaced by a random route.
+
+        Returns:
+        List[int]: The indices of the duplicate rows, which have all been changed.
+        """
+        operator = MUTATION_OPERATORS[self.mutation]
+        seen = set(map(tuple, FitnessCache.route_keys(kept).tolist()))
+        duplicates = []
+        for index, row in enumerate(children):
+            key = FitnessCache.route_key(row)
+            if key in seen:
+                duplicates.append(index)
+                for _ in range(tries):
+                    operator(row, self.rng, self.mutation_intensity)
+                    key = FitnessCache.route_key(row)
+                    if key not in seen:
+                        break
+                else:
+                    row[:] = self.rng.permutation(self.n_cities)
+                    key = FitnessCache.route_key(row)
+            seen.add(key)
+        return duplicates
+
+    def emigrants(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the n best routes and their fitness, e.g. to send to another island."""
+        self.sort()
+        n = min(n, self.population_size)
+        return self.population[:n].copy(), self.fitness[:n].copy()
+
+    def immigrate(self, routes: np.ndarray, fitness: np.ndarray = None) -> None:
+        """
+        Replace the worst individuals with routes from another population.
+
+        Parameters:
+        - routes (np.ndarray): (k, n_cities) routes to insert.
+        - fitness (np.ndarray): Their fitness under the same problem, if known; otherwise they are scored.
+        """
+        routes = np.asarray(routes)
+        k = min(len(routes), self.population_size)
+        if k == 0:
+            return
+        self.sort()
+        self.population[-k:] = routes[:k]
+        if fitness is not None:
+            self.fitness[-k:] = fitness[:k]
+        else:
+            self._evaluated = False
+
+    def restart(self, keep: int = None) -> None:
+        """Replace all but the keep best individuals (default elite_size) with random routes."""
+        self.sort()
+        keep = min(self.elite_size if keep is None else keep, self.population_size)
+        rest = self.population[keep:]
+        rest[:] = np.arange(self.n_cities, dtype=rest.dtype)
+        rest[:] = self.rng.permuted(rest, axis=1)
+        self._evaluated = False
+        self.last_restart = self.generation
+        self.restarts += 1
+
+    def polish(self, routes: np.ndarray, indices=None) -> None:
+        """
+        Improve rows of routes (all, or the given indices) in place with the local search and
+        cache their new fitness. Routes that already are local-search optima are skipped.
+        """
+        for index in range(len(routes)) if indices is None else indices:
+            row = routes[index]
+            key = self.cache.route_key(row)
+            if key in self._polished:
+                continue
+            route, fitness = self.local_search.improve(row)
+            row[:] = route
+            key = self.cache.route_key(row)
+            self.cache.put(key, fitness)
+            if len(self._polished) >= self.cache.max_size:
+                self._polished.clear()
+            self._polished.add(key)
+
+    def step(self) -> float:
+        """Run one generation and return the best fitness of the population it started from."""
+        phase = self.instrumentation.phase
+        with phase('fitness'):
+            self.evaluate()
+        improved = None
+        if self._success_threshold is not None:
+            improved = self.fitness[self.elite_size:] < self._success_threshold
+        with phase('sort'):
+            self.sort()
+        if self.restart_policy is not None and self.restart_policy.due(self):
+            with phase('restart'):
+                self.restart(self.restart_policy.keep)
+                self.sort()
+        if self.local_search_elites > 0:
+            with phase('local_search'):
+                self.polish(self.population[:self.local_search_elites])
+                self._evaluated = False
+                self.sort()
+        if self.diversity is not None:
+            with phase('diversity'):
+                self.diversity_metrics = self.diversity.update(self.population)
+            for name, value in self.diversity_metrics.items():
+                self.instrumentation.gauge(name, value)
+        if self.adaptive is not None:
+            with phase('adaptive'):
+                self.adaptive.adapt(self, improved, self._mutated)
+        best_fitness = float(self.fitness[0])
+        if best_fitness < self.best_fitness:
+            self.best_fitness = best_fitness
+            np.copyto(self.best_route, self.population[0])
+            self.last_improvement = self.generation
+        self.best_fitness_values.append(best_fitness)
+
+        # Elitism, then children written straight into the idle buffer
+        next_population = self._next_population
+        next_population[:self.elite_size] = self.population[:self.elite_size]
+        n_children = self.population_size - self.elite_size
+        if n_children > 0:
+            with phase('selection'):
+                pairs = self.select_parents(n_children)
+            children = next_population[self.elite_size:]
+            with phase('crossover'):
+                self.breed(pairs, children)
+            with phase('mutation'):
+                mutated = self.mutate(children)
+            if self.local_search_offspring > 0:
+                with phase('local_search'):
+                    chosen = np.nonzero(self.rng.random(n_children) < self.local_search_offspring)[0]
+                    self.polish(children, chosen)
+            if self.reject_duplicates:
+                with phase('duplicates'):
+                    duplicates = self.remove_duplicates(children, next_population[:self.elite_size])
+                    self.instrumentation.count('duplicates', len(duplicates))
+
+        # Elites are re-scored from the cache on the next evaluate
+        self.population, self._next_population = next_population, self.population
+        if self.adaptive is not None and n_children > 0:
+            self._success_threshold = self.adaptive.success_threshold(self.fitness)
+            self._mutated = np.zeros(n_children, dtype=bool)
+            self._mutated[mutated] = True
+            if self.reject_duplicates:
+                # Re-mutated duplicates count as mutated children too
+                self._mutated[duplicates] = True
+        self._evaluated = False
+        self.generation += 1
+        return best_fitness
+
+    def state_dict(self) -> dict:
+        """
+        Everything step() depends on besides the constructor arguments: population, fitness,
+        best route, history, generation counter, RNG state, the digests (FitnessCache.route_keys)
+        of the routes already polished and the (possibly adapted) mutation and crossover settings.
+        load_state() on an engine built with the same arguments continues bit-for-bit.
+        """
+        return {
+            'population': self.population.copy(),
+            'fitness': self.fitness.copy(),
+            'evaluated': self._evaluated,
+            'best_route': self.best_route.copy(),
+            'best_fitness': self.best_fitness,
+            'best_fitness_values': np.asarray(self.best_fitness_values, dtype=np.float64),
+            'generation': self.generation,
+            'rng_state': self.rng.bit_generator.state,
+            'last_improvement': self.last_improvement,
+            'last_restart': self.last_restart,
+            'restarts': self.restarts,
+            'evaluations': self.evaluations,
+            'polished': np.array(sorted(self._polished), dtype=np.uint64).reshape(-1, 2),
+            'mutation_probability': self.mutation_probability,
+            'mutation_intensity': self.mutation_intensity,
+            'crossover': self.crossover,
+            'success_threshold': self._success_threshold,
+            'mutated': self._mutated,
+            'adaptive': self.adaptive.state_dict() if self.adaptive is not None else None,
+        }
+
+    def load_state(self, state: dict) -> None:
+        """Restore a state_dict(), e.g. from checkpoint.load_checkpoint."""
+        population = np.asarray(state['population'])
+        if population.shape != self.population.shape:
+            raise ValueError(f"State population {population.shape} does not match this engine's {self.population.shape}")
+        self.population[:] = population
+        self.fitness[:] = state['fitness']
+        self._evaluated = bool(state['evaluated'])
+        self.best_route[:] = state['best_route']
+        self.best_fitness = float(state['best_fitness'])
+        self.best_fitness_values[:] = np.asarray(state['best_fitness_values'], dtype=np.float64).tolist()
+        self.generation = int(state['generation'])
+        self.rng.bit_generator.state = state['rng_state']
+        self.last_improvement = int(state.get('last_improvement', 0))
+        self.last_restart = int(state.get('last_restart', 0))
+        self.restarts = int(state.get('restarts', 0))
+        self.evaluations = int(state.get('evaluations', 0))
+        self._polished = set(map(tuple, np.asarray(state['polished'], dtype=np.uint64).reshape(-1, 2).tolist()))
+        self.mutation_probability = float(state.get('mutation_probability', self.mutation_probability))
+        self.mutation_intensity = int(state.get('mutation_intensity', self.mutation_intensity))
+        self.crossover = state.get('crossover', self.crossover)
+        self._success_threshold = state.get('success_threshold')
+        mutated = state.get('mutated')
+        self._mutated = None if mutated is None else np.asarray(mutated, dtype=bool)
+        if self.adaptive is not None and state.get('adaptive') is not None:
+            self.adaptive.load_state(state['adaptive'])
+        if self.diversity is not None:
+            self.diversity.reset()
+
+    def run(self, n_generations: int, callback=None, stopping=None) -> Tuple[List[int], float]:
+        """
+        Run n_generations steps. callback(engine) is called after each one and may return True
+        to stop early; so may a convergence.StoppingCriteria, whose reason is kept in stop_reason.
+
+        Returns:
+        Tuple[List[int], float]: The best route found and its fitness.
+        """
+        start = time.perf_counter()
+        for _ in range(n_generations):
+            self.step()
+            self.instrumentation.end_generation(self.generation, best_fitness=self.best_fitness)
+            if stopping is not None:
+                self.stop_reason = stopping.reason(self, time.perf_counter() - start)
+                if self.stop_reason is not None:
+                    break
+            if callback is not None and callback(self):
+                break
+        return self.best_route.tolist(), self.best_fitness
+
+
 if __name__ == '__main__':
     N_CITIES = 10
     
@@ -308,45 +1583,11 @@ if __name__ == '__main__':
               for _ in range(N_CITIES)]
     
     # CREATE INITIAL POPULATION
-    population = generate_random_population(cities_locations, POPULATION_SIZE)
+    distance_matrix = generate_distance_matrix(cities_locations)
+    engine = GeneticEngine(distance_matrix, POPULATION_SIZE, MUTATION_PROBABILITY)
 
-    # Lists to store best fitness and generation for plotting
-    best_fitness_values = []
-    best_solutions = []
-    
     for generation in range(N_GENERATIONS):
-  
-        
-        population_fitness = [calculate_fitness(individual) for individual in population]    
-        
-        population, population_fitness = sort_population(population,  population_fitness)
-        
-        best_fitness = calculate_fitness(population[0])
-        best_solution = population[0]
-           
-        best_fitness_values.append(best_fitness)
-        best_solutions.append(best_solution)    
-
+        best_fitness = engine.step()
         print(f"Generation {generation}: Best fitness = {best_fitness}")
 
-        new_population = [population[0]]  # Keep the best individual: ELITISM
-        
-        while len(new_population) < POPULATION_SIZE:
-            
-            # SELECTION
-            parent1, parent2 = random.choices(population[:10], k=2)  # Select parents from the top 10 individuals
-            
-            # CROSSOVER
-            child1 = order_crossover(parent1, parent2)
-            
-            ## MUTATION
-            child1 = mutate(child1, MUTATION_PROBABILITY)
-            
-            new_population.append(child1)
-            
-    
-        print('generation: ', generation)
-        population = new_population
-    
-
-
+    print(f"Best solution: {engine.best_route.tolist()} ({engine.best_fitness})")
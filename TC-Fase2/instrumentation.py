@@ -0,0 +1,175 @@
+import contextlib
+import cProfile
+import json
+import pstats
+import time
+from typing import Callable, Dict
+
+
+# Per-phase timers and counters for the generation loop.
+#
+#     instrumentation = Instrumentation(jsonl_path='trace.jsonl')
+#     with instrumentation.phase('fitness'):
+#         ...
+#     instrumentation.count('evaluations', 100)
+#     instrumentation.gauge('bond_distance', 0.42)
+#     instrumentation.end_generation(generation)
+#
+# Each end_generation() closes one record (phase seconds, counters, wall time since the
+# previous record, last value of each gauge) and passes it to the callback and/or appends
+# it as one JSON line. When disabled, phase() returns a shared no-op context manager and
+# count()/end_generation() return immediately, so instrumented code costs a method call
+# per phase.
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ('owner', 'name', 'start')
+
+    def __init__(self, owner: 'Instrumentation', name: str):
+        self.owner = owner
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        phases = self.owner._phases
+        phases[self.name] = phases.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class Instrumentation:
+    """
+    Phase timers and counters aggregated per generation.
+
+    Parameters:
+    - enabled (bool): Collect anything at all.
+    - callback: Called with every generation record (a dict).
+    - jsonl_path (str): Append every record to this file as one JSON line.
+    """
+
+    def __init__(self, enabled: bool = True, callback: Callable[[dict], None] = None, jsonl_path: str = None):
+        self.enabled = enabled
+        self.callback = callback
+        self.jsonl_path = jsonl_path
+        self._file = None
+        self._phases = {}
+        self._counters = {}
+        self._gauges = {}
+        self._last_end = time.perf_counter()
+        self.totals = {}
+        self.counter_totals = {}
+        self.last_gauges = {}
+        self.records = 0
+
+    def phase(self, name: str):
+        """Context manager timing one phase of the current generation."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Add value to a counter of the current generation."""
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        """Set a measurement of the current generation (e.g. a diversity metric); the last value wins."""
+        if self.enabled:
+            self._gauges[name] = value
+
+    def end_generation(self, generation: int, **fields) -> dict:
+        """
+        Close the current record and emit it.
+
+        Returns:
+        dict: The record ({'generation', 'phases', 'counters', 'gauges', 'phase_seconds', 'wall_seconds', ...fields}),
+        or None when disabled.
+        """
+        if not self.enabled:
+            return None
+        now = time.perf_counter()
+        record = {
+            'generation': generation,
+            'phases': self._phases,
+            'counters': self._counters,
+            'gauges': self._gauges,
+            'phase_seconds': sum(self._phases.values()),
+            'wall_seconds': now - self._last_end,
+        }
+        record.update(fields)
+        for name, seconds in self._phases.items():
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+        for name, value in self._counters.items():
+            self.counter_totals[name] = self.counter_totals.get(name, 0) + value
+        self.last_gauges.update(self._gauges)
+        self.records += 1
+        self._phases, self._counters, self._gauges = {}, {}, {}
+        self._last_end = now
+
+        if self.callback is not None:
+            self.callback(record)
+        if self.jsonl_path is not None:
+            if self._file is None:
+                self._file = open(self.jsonl_path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(record) + '\n')
+        return record
+
+    def summary(self) -> Dict[str, dict]:
+        """Total and mean seconds per phase, counter totals and the latest gauges, over all records so far."""
+        records = max(self.records, 1)
+        return {
+            'records': self.records,
+            'phases': {name: {'total_seconds': total, 'mean_seconds': total / records}
+                       for name, total in sorted(self.totals.items(), key=lambda item: -item[1])},
+            'counters': dict(self.counter_totals),
+            'gauges': dict(self.last_gauges),
+        }
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        lines = [f"{summary['records']} generations"]
+        for name, phase in summary['phases'].items():
+            lines.append(f"  {name:<14} {phase['total_seconds']:9.3f}s total  {1000 * phase['mean_seconds']:8.3f} ms/gen")
+        for name, value in summary['counters'].items():
+            lines.append(f"  {name:<14} {value}")
+        for name, value in summary['gauges'].items():
+            lines.append(f"  {name:<14} {value:.4g} (last)")
+        return '\n'.join(lines)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'Instrumentation':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# Shared disabled instance, the default wherever instrumentation is optional
+NULL_INSTRUMENTATION = Instrumentation(enabled=False)
+
+
+@contextlib.contextmanager
+def profiled(path: str = None, top: int = 20, sort_by: str = 'cumulative'):
+    """
+    Run the enclosed block under cProfile. The stats are dumped to path (for snakeviz, pstats,
+    ...) if given, and the top functions are printed.
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        if path:
+            profile.dump_stats(path)
+            print(f"Profile saved to '{path}'")
+        if top:
+            pstats.Stats(profile).sort_stats(sort_by).print_stats(top)
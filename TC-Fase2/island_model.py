@@ -0,0 +1,320 @@
+import argparse
+import multiprocessing as mp
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+from genetic_algorithm import GeneticEngine, DEFAULT_SPLIT, calculate_fitness
+
+
+# Island model: N GeneticEngines evolve independently and trade their best routes every
+# migration_interval generations. Each island runs in its own process; the coordinator only
+# moves migrants between the pipes, so the work per process is one whole engine.
+
+TOPOLOGIES = ('ring', 'random')
+
+
+@dataclass
+class IslandStats:
+    """Per-island summary at the end of a run."""
+    island: int
+    seed: int
+    mutation_probability: float
+    best_fitness: float
+    mean_fitness: float
+    distinct_routes: int
+    generations: int
+    elapsed_seconds: float
+
+
+@dataclass
+class IslandResult:
+    """Global best of an island run, with the per-island stats."""
+    best_route: List[int]
+    best_fitness: float
+    best_island: int
+    best_fitness_values: List[float]
+    islands: List[IslandStats]
+    migrations: int
+    elapsed_seconds: float
+    parameters: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        result = dict(self.__dict__)
+        result['islands'] = [dict(stats.__dict__) for stats in self.islands]
+        return result
+
+
+class _Island:
+    """One engine plus the bookkeeping the coordinator asks for."""
+
+    def __init__(self, index: int, seed: int, mutation_probability: float, engine_kwargs: dict):
+        self.index = index
+        self.seed = seed
+        self.engine = GeneticEngine(mutation_probability=mutation_probability, seed=seed, **engine_kwargs)
+        self.elapsed_seconds = 0.0
+
+    def evolve(self, n_generations: int, immigrants=None, n_emigrants: int = 0):
+        """Insert the immigrants, run n_generations and return this island's emigrants."""
+        start = time.perf_counter()
+        if immigrants is not None:
+            self.engine.immigrate(*immigrants)
+        for _ in range(n_generations):
+            self.engine.step()
+        emigrants = self.engine.emigrants(n_emigrants)
+        self.elapsed_seconds += time.perf_counter() - start
+        return emigrants
+
+    def stats(self) -> dict:
+        engine = self.engine
+        fitness = engine.evaluate()
+        return {
+            'stats': IslandStats(
+                island=self.index,
+                seed=self.seed,
+                mutation_probability=engine.mutation_probability,
+                best_fitness=engine.best_fitness,
+                mean_fitness=float(fitness.mean()),
+                distinct_routes=len(np.unique(engine.population, axis=0)),
+                generations=engine.generation,
+                elapsed_seconds=self.elapsed_seconds,
+            ),
+            'best_route': engine.best_route.copy(),
+            'best_fitness_values': list(engine.best_fitness_values),
+        }
+
+
+def _island_worker(connection, index: int, seed: int, mutation_probability: float, engine_kwargs: dict) -> None:
+    """Process entry point: serve ('evolve', ...) and ('stats',) requests until ('stop',)."""
+    try:
+        island = _Island(index, seed, mutation_probability, engine_kwargs)
+        while True:
+            message = connection.recv()
+            if message[0] == 'evolve':
+                connection.send(('ok', island.evolve(*message[1:])))
+            elif message[0] == 'stats':
+                connection.send(('ok', island.stats()))
+            else:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    except Exception:
+        connection.send(('error', traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+class IslandModel:
+    """
+    Island-model GA: n_islands GeneticEngines, each with its own seed and mutation rate.
+
+    Every migration_interval generations each island sends copies of its migration_size best
+    routes to a neighbour, where they replace the worst individuals. With topology 'ring'
+    island i sends to i + 1; with 'random' every island picks another island each migration.
+    Islands keep separate search directions between migrations, which holds more diversity
+    than one population of the same total size.
+
+    With processes=True every island runs in its own worker process (one pipe each);
+    with processes=False they run one after another in this process, giving the same result
+    for the same seed.
+    """
+
+    def __init__(self, distance_matrix: np.ndarray, n_islands: int = 4, population_size: int = 100,
+                 mutation_probability=0.5, migration_interval: int = 50, migration_size: int = 2,
+                 topology: str = 'ring', seed: int = None, processes: bool = True, **engine_kwargs):
+        """
+        Parameters:
+        - distance_matrix (np.ndarray): Distance matrix shared by all islands.
+        - n_islands (int): Number of sub-populations.
+        - population_size (int): Size of each sub-population.
+        - mutation_probability (float or List[float]): One rate for all islands, or one per island.
+        - migration_interval (int): Generations between migrations.
+        - migration_size (int): Routes each island sends per migration.
+        - topology (str): 'ring' or 'random'.
+        - seed (int): Master seed; island seeds and the random topology derive from it.
+        - processes (bool): Run the islands in worker processes.
+        - engine_kwargs: Further GeneticEngine arguments (weights, capacity, priorities, ...).
+        """
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology '{topology}', expected one of {TOPOLOGIES}")
+        if np.ndim(mutation_probability) == 0:
+            mutation_probability = [mutation_probability] * n_islands
+        if len(mutation_probability) != n_islands:
+            raise ValueError("mutation_probability needs one value per island")
+
+        self.distance_matrix = distance_matrix
+        self.n_islands = n_islands
+        self.population_size = population_size
+        self.mutation_probabilities = [float(p) for p in mutation_probability]
+        self.migration_interval = max(1, migration_interval)
+        self.migration_size = migration_size
+        self.topology = topology
+        self.processes = processes
+        self.engine_kwargs = dict(engine_kwargs, distance_matrix=distance_matrix, population_size=population_size)
+
+        seed_sequence = np.random.SeedSequence(seed)
+        self.seed = seed_sequence.entropy
+        children = seed_sequence.spawn(n_islands + 1)
+        self.island_seeds = [int(child.generate_state(1)[0]) for child in children[:n_islands]]
+        self.rng = np.random.default_rng(children[-1])
+        self.migrations = 0
+
+    def destinations(self) -> np.ndarray:
+        """Island each island sends its emigrants to in the next migration."""
+        islands = np.arange(self.n_islands)
+        if self.topology == 'ring' or self.n_islands < 2:
+            return (islands + 1) % self.n_islands
+        # Any other island, uniformly
+        return (islands + self.rng.integers(1, self.n_islands, self.n_islands)) % self.n_islands
+
+    def _migrate(self, emigrants: list) -> list:
+        immigrants = [None] * self.n_islands
+        if self.n_islands < 2 or self.migration_size <= 0:
+            return immigrants
+        routes = [[] for _ in range(self.n_islands)]
+        fitness = [[] for _ in range(self.n_islands)]
+        for source, target in enumerate(self.destinations()):
+            routes[target].append(emigrants[source][0])
+            fitness[target].append(emigrants[source][1])
+        for target in range(self.n_islands):
+            if routes[target]:
+                immigrants[target] = (np.concatenate(routes[target]), np.concatenate(fitness[target]))
+        self.migrations += 1
+        return immigrants
+
+    def _epochs(self, n_generations: int):
+        done = 0
+        while done < n_generations:
+            epoch = min(self.migration_interval, n_generations - done)
+            done += epoch
+            yield epoch, done < n_generations
+
+    def _run_serial(self, n_generations: int) -> list:
+        islands = [_Island(i, seed, rate, self.engine_kwargs)
+                   for i, (seed, rate) in enumerate(zip(self.island_seeds, self.mutation_probabilities))]
+        immigrants = [None] * self.n_islands
+        for epoch, migrate in self._epochs(n_generations):
+            emigrants = [island.evolve(epoch, immigrants[i], self.migration_size if migrate else 0)
+                         for i, island in enumerate(islands)]
+            immigrants = self._migrate(emigrants) if migrate else [None] * self.n_islands
+        return [island.stats() for island in islands]
+
+    def _run_processes(self, n_generations: int) -> list:
+        context = mp.get_context()
+        connections, workers = [], []
+        try:
+            for i, (seed, rate) in enumerate(zip(self.island_seeds, self.mutation_probabilities)):
+                parent, child = context.Pipe()
+                worker = context.Process(target=_island_worker, args=(child, i, seed, rate, self.engine_kwargs),
+                                         daemon=True)
+                worker.start()
+                child.close()
+                connections.append(parent)
+                workers.append(worker)
+
+            immigrants = [None] * self.n_islands
+            for epoch, migrate in self._epochs(n_generations):
+                # All islands evolve concurrently; the coordinator waits for the slowest one
+                for i, connection in enumerate(connections):
+                    connection.send(('evolve', epoch, immigrants[i], self.migration_size if migrate else 0))
+                emigrants = [self._receive(connection) for connection in connections]
+                immigrants = self._migrate(emigrants) if migrate else [None] * self.n_islands
+
+            for connection in connections:
+                connection.send(('stats',))
+            return [self._receive(connection) for connection in connections]
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(('stop',))
+                except (BrokenPipeError, OSError):
+                    pass
+                connection.close()
+            for worker in workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+
+    @staticmethod
+    def _receive(connection):
+        status, payload = connection.recv()
+        if status == 'error':
+            raise RuntimeError(f"Island worker failed:\n{payload}")
+        return payload
+
+    def run(self, n_generations: int) -> IslandResult:
+        """Evolve every island for n_generations, migrating along the way, and return the global best."""
+        start = time.perf_counter()
+        self.migrations = 0
+        reports = self._run_processes(n_generations) if self.processes else self._run_serial(n_generations)
+        elapsed = time.perf_counter() - start
+
+        best_island = min(range(self.n_islands), key=lambda i: reports[i]['stats'].best_fitness)
+        histories = [report['best_fitness_values'] for report in reports]
+        return IslandResult(
+            best_route=reports[best_island]['best_route'].tolist(),
+            best_fitness=reports[best_island]['stats'].best_fitness,
+            best_island=best_island,
+            # Global best of each generation across the islands
+            best_fitness_values=np.minimum.reduce([np.asarray(h) for h in histories]).tolist() if n_generations else [],
+            islands=[report['stats'] for report in reports],
+            migrations=self.migrations,
+            elapsed_seconds=elapsed,
+            parameters={
+                'n_islands': self.n_islands, 'population_size': self.population_size,
+                'mutation_probabilities': self.mutation_probabilities,
+                'migration_interval': self.migration_interval, 'migration_size': self.migration_size,
+                'topology': self.topology, 'seed': self.seed, 'processes': self.processes,
+            },
+        )
+
+
+if __name__ == '__main__':
+    from solver import scale_to_screen, parse_critical_indices, DEFAULT_TRUCK_CAPACITY
+    from genetic_algorithm import generate_distance_matrix
+    from benchmark_att48 import att_48_cities_locations, att_48_cities_weights
+
+    parser = argparse.ArgumentParser(description="Island-model GA on the att48 CVRP.")
+    parser.add_argument('--islands', type=int, default=mp.cpu_count(), help="Number of islands (default: CPU count)")
+    parser.add_argument('--population', type=int, default=100, help="Population size per island")
+    parser.add_argument('--generations', type=int, default=1000, help="Generations per island")
+    parser.add_argument('--interval', type=int, default=50, help="Generations between migrations")
+    parser.add_argument('--migrants', type=int, default=2, help="Routes sent per island and migration")
+    parser.add_argument('--topology', choices=TOPOLOGIES, default='ring')
+    parser.add_argument('--mutation', type=float, nargs='+', default=[0.5], help="One rate, or one per island")
+    parser.add_argument('--capacity', type=int, default=DEFAULT_TRUCK_CAPACITY)
+    parser.add_argument('--critical', type=str, default="")
+    parser.add_argument('--penalty', type=float, default=0)
+    parser.add_argument('--split', type=str, default=DEFAULT_SPLIT)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--compare', action='store_true', help="Also run one population of the same total size")
+    args = parser.parse_args()
+
+    cities = scale_to_screen(att_48_cities_locations)
+    matrix = generate_distance_matrix(cities)
+    priorities = parse_critical_indices(args.critical, len(cities))
+    problem = dict(weights=att_48_cities_weights, capacity=args.capacity, priorities=priorities,
+                   priority_penalty=args.penalty, split=args.split)
+    mutation = args.mutation[0] if len(args.mutation) == 1 else args.mutation
+
+    model = IslandModel(matrix, args.islands, args.population, mutation, args.interval, args.migrants,
+                        args.topology, args.seed, **problem)
+    result = model.run(args.generations)
+    for stats in result.islands:
+        print(f"Island {stats.island}: best {stats.best_fitness:.2f} | mean {stats.mean_fitness:.2f} | "
+              f"distinct {stats.distinct_routes}/{args.population} | mutation {stats.mutation_probability} | "
+              f"{stats.elapsed_seconds:.2f}s")
+    assert calculate_fitness(result.best_route, matrix, **problem) == result.best_fitness
+    print(f"Global best: {result.best_fitness:.2f} (island {result.best_island}) after {result.migrations} "
+          f"migrations in {result.elapsed_seconds:.2f}s")
+
+    if args.compare:
+        start = time.perf_counter()
+        single = GeneticEngine(matrix, args.islands * args.population, args.mutation[0], seed=args.seed, **problem)
+        single.run(args.generations)
+        distinct = len(np.unique(single.population, axis=0))
+        print(f"Single population of {single.population_size}: best {single.best_fitness:.2f} | "
+              f"distinct {distinct}/{single.population_size} | {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,355 @@
+import time
+from collections import deque
+from typing import List, Tuple
+
+import numpy as np
+
+from genetic_algorithm import FitnessTrace, calculate_fitness, DEFAULT_SPLIT
+
+
+# Memetic local search: 2-opt and Or-opt restricted to each city's K nearest neighbours, with
+# don't-look bits. A city is only re-examined after a move touched one of its tour neighbours,
+# so a pass over an already good tour costs O(n * K) instead of O(n^2).
+#
+# Plain TSP moves are scored with O(1) length deltas. With weights and capacity the cost is
+# the CVRP fitness of calculate_fitness (split trips plus priority penalty), so every
+# candidate is re-scored exactly with a FitnessTrace resumed from its first changed position.
+# That costs O(n * trip length) per candidate (about 0.7 ms on att48), so only moves that
+# shorten the giant tour are scored, and each improve() call stops after max_evaluations
+# exact scorings (CVRP_MAX_EVALUATIONS by default, about 0.1 s on att48).
+
+LOCAL_SEARCH_MOVES = ('2opt', 'oropt')
+IMPROVEMENT_EPSILON = 1e-9
+# Default budget of exact CVRP scorings per improve() call
+CVRP_MAX_EVALUATIONS = 150
+
+
+def neighbor_lists(distance_matrix, k: int = 8) -> np.ndarray:
+    """
+    The k nearest other cities of every city, closest first.
+
+    Returns:
+    np.ndarray: (n, k) array of city indices.
+    """
+    matrix = np.asarray(distance_matrix, dtype=np.float64)
+    n = len(matrix)
+    k = max(0, min(k, n - 1))
+    if k == 0:
+        return np.empty((n, 0), dtype=np.intp)
+    distances = matrix.copy()
+    np.fill_diagonal(distances, np.inf)
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(nearest, order, axis=1)
+
+
+class LocalSearch:
+    """
+    2-opt and Or-opt improvement of single routes, for the same problem as calculate_fitness.
+
+    Parameters:
+    - distance_matrix: The (n, n) distance matrix (2-opt deltas assume it is symmetric).
+    - weights, capacity, priorities, priority_penalty, split, max_trip_cities: As in calculate_fitness.
+      Without weights/capacity the cost is the closed tour length.
+    - k (int): Candidate list size per city.
+    - max_segment (int): Longest segment Or-opt moves.
+    - moves: Subset of LOCAL_SEARCH_MOVES to use.
+    - time_limit (float): Default seconds per improve() call (None = until a local optimum).
+    - max_iterations (int): Default number of improving moves per improve() call.
+    - max_evaluations (int): Default number of exact CVRP scorings per improve() call
+      (CVRP_MAX_EVALUATIONS in CVRP mode; unused for the plain TSP, whose moves cost O(1)).
+    """
+
+    def __init__(self, distance_matrix, weights: List[int] = None, capacity: int = None, priorities: List[str] = None,
+                 priority_penalty: float = 0, split: str = DEFAULT_SPLIT, max_trip_cities: int = None, k: int = 8,
+                 max_segment: int = 3, moves=LOCAL_SEARCH_MOVES, time_limit: float = None, max_iterations: int = None,
+                 max_evaluations: int = None):
+        unknown = set(moves) - set(LOCAL_SEARCH_MOVES)
+        if unknown:
+            raise ValueError(f"Unknown local search moves {sorted(unknown)}, expected {LOCAL_SEARCH_MOVES}")
+        self.distance_matrix = distance_matrix
+        self.weights = weights
+        self.capacity = capacity
+        self.priorities = priorities
+        self.priority_penalty = priority_penalty
+        self.split = split
+        self.max_trip_cities = max_trip_cities
+        self.max_segment = max_segment
+        self.moves = tuple(moves)
+        self.time_limit = time_limit
+        self.max_iterations = max_iterations
+        self.cvrp = weights is not None and capacity is not None
+        self.max_evaluations = max_evaluations if max_evaluations is not None or not self.cvrp else CVRP_MAX_EVALUATIONS
+
+        # Python lists index much faster than numpy scalars in the move loops
+        self.d = np.asarray(distance_matrix, dtype=np.float64).tolist()
+        self.neighbors = neighbor_lists(distance_matrix, k).tolist()
+
+    def fitness(self, route: List[int]) -> float:
+        return calculate_fitness(list(route), self.distance_matrix, self.weights, self.capacity, self.priorities,
+                                 self.priority_penalty, self.split, self.max_trip_cities)
+
+    def improve(self, route, time_limit: float = None, max_iterations: int = None,
+                max_evaluations: int = None) -> Tuple[List[int], float]:
+        """
+        Apply improving 2-opt / Or-opt moves until no candidate improves or the budget runs out.
+
+        Parameters:
+        - route: A permutation of the cities.
+        - time_limit (float): Seconds for this call (defaults to the constructor value).
+        - max_iterations (int): Improving moves for this call (defaults to the constructor value).
+        - max_evaluations (int): Exact CVRP scorings for this call (defaults to the constructor value).
+
+        Returns:
+        Tuple[List[int], float]: The improved route and its fitness, as calculate_fitness scores it.
+        """
+        time_limit = self.time_limit if time_limit is None else time_limit
+        max_iterations = self.max_iterations if max_iterations is None else max_iterations
+        max_evaluations = self.max_evaluations if max_evaluations is None else max_evaluations
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        state = _CvrpState(self, route) if self.cvrp else _TspState(self, route)
+        n = len(state.tour)
+        if n < 5:
+            return list(state.tour), self.fitness(state.tour)
+
+        # Don't-look bits: only cities in the queue are examined
+        queue = deque(state.tour)
+        queued = [True] * n
+        iterations = 0
+        while queue:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            if self.cvrp and max_evaluations is not None and state.evaluations >= max_evaluations:
+                break
+            city = queue.popleft()
+            queued[city] = False
+            touched = None
+            if '2opt' in self.moves:
+                touched = state.two_opt(city)
+            if touched is None and 'oropt' in self.moves:
+                touched = state.or_opt(city)
+            if touched is None:
+                continue
+            iterations += 1
+            for other in touched:
+                if not queued[other]:
+                    queued[other] = True
+                    queue.append(other)
+
+        return list(state.tour), state.final_fitness()
+
+
+class _TspState:
+    """Closed tour with O(1) move deltas."""
+
+    def __init__(self, search: LocalSearch, route):
+        self.search = search
+        self.d = search.d
+        self.tour = [int(city) for city in route]
+        self.n = len(self.tour)
+        self.position = [0] * self.n
+        for index, city in enumerate(self.tour):
+            self.position[city] = index
+
+    def final_fitness(self) -> float:
+        # Deltas accumulate rounding error, so the final value is scored from scratch
+        return self.search.fitness(self.tour)
+
+    def _reverse(self, i: int, j: int) -> None:
+        """Reverse the cyclic segment of positions i..j, or its complement when that is shorter."""
+        n, tour, position = self.n, self.tour, self.position
+        length = (j - i) % n + 1
+        if 2 * length > n:
+            i, j = (j + 1) % n, (i - 1) % n
+            length = n - length
+        for _ in range(length // 2):
+            tour[i], tour[j] = tour[j], tour[i]
+            position[tour[i]] = i
+            position[tour[j]] = j
+            i = (i + 1) % n
+            j = (j - 1) % n
+
+    def two_opt(self, a: int):
+        d, tour, position, n = self.d, self.tour, self.position, self.n
+        i = position[a]
+        for forward in (True, False):
+            # Edge (a, b) is replaced by (a, c), and (c, e) by (b, e)
+            b = tour[(i + 1) % n] if forward else tour[i - 1]
+            d_ab = d[a][b]
+            for c in self.search.neighbors[a]:
+                d_ac = d[a][c]
+                if d_ac >= d_ab:
+                    break
+                j = position[c]
+                e = tour[(j + 1) % n] if forward else tour[j - 1]
+                if e == a or c == b:
+                    continue
+                gain = d_ab + d[c][e] - d_ac - d[b][e]
+                if gain > IMPROVEMENT_EPSILON:
+                    if forward:
+                        self._reverse((i + 1) % n, j)
+                    else:
+                        self._reverse(j, (i - 1) % n)
+                    return a, b, c, e
+        return None
+
+    def or_opt(self, a: int):
+        d, tour, position, n = self.d, self.tour, self.position, self.n
+        i = position[a]
+        for length in range(1, min(self.search.max_segment, n - 3) + 1):
+            segment = [tour[(i + k) % n] for k in range(length)]
+            first, last = segment[0], segment[-1]
+            p, nx = tour[i - 1], tour[(i + length) % n]
+            removal_gain = d[p][first] + d[last][nx] - d[p][nx]
+            if removal_gain <= IMPROVEMENT_EPSILON:
+                continue
+            inside = set(segment)
+            for end in (first, last):
+                for c in self.search.neighbors[end]:
+                    if d[end][c] >= removal_gain:
+                        break
+                    if c in inside:
+                        continue
+                    j = position[c]
+                    for cn in (tour[(j + 1) % n], tour[j - 1]):
+                        if cn in inside:
+                            continue
+                        # Insert between c and cn with end next to c
+                        other = last if end == first else first
+                        gain = removal_gain - (d[c][end] + d[other][cn] - d[c][cn])
+                        if gain > IMPROVEMENT_EPSILON:
+                            self._move_segment(segment, c, cn, end)
+                            return p, nx, c, cn, first, last
+        return None
+
+    def _move_segment(self, segment: List[int], c: int, cn: int, end: int) -> None:
+        inside = set(segment)
+        rest = [city for city in self.tour if city not in inside]
+        index = rest.index(c)
+        # Segment oriented so that end is adjacent to c
+        ordered = segment if end == segment[0] else segment[::-1]
+        if rest[(index + 1) % len(rest)] == cn:
+            self.tour = rest[:index + 1] + ordered + rest[index + 1:]
+        else:
+            self.tour = rest[:index] + ordered[::-1] + rest[index:]
+        for k, city in enumerate(self.tour):
+            self.position[city] = k
+
+
+class _CvrpState:
+    """Giant tour scored with the CVRP fitness through a FitnessTrace."""
+
+    def __init__(self, search: LocalSearch, route):
+        self.search = search
+        self.d = search.d
+        self.trace = FitnessTrace([int(city) for city in route], search.distance_matrix, search.weights,
+                                  search.capacity, search.priorities, search.priority_penalty, search.split,
+                                  search.max_trip_cities)
+        self.n = len(self.trace.path)
+        self.position = [0] * self.n
+        self.evaluations = 0
+        self._index()
+
+    @property
+    def tour(self) -> List[int]:
+        return self.trace.path
+
+    def final_fitness(self) -> float:
+        return self.trace.fitness
+
+    def _index(self) -> None:
+        for index, city in enumerate(self.trace.path):
+            self.position[city] = index
+
+    def _try(self, path: List[int], first: int, last: int) -> bool:
+        """Keep path if its exact fitness beats the current one."""
+        self.evaluations += 1
+        candidate = self.trace.copy()
+        if candidate.reroute(path, first, last) < self.trace.fitness - IMPROVEMENT_EPSILON:
+            self.trace = candidate
+            self._index()
+            return True
+        return False
+
+    def two_opt(self, a: int):
+        d, tour, position, n = self.d, self.trace.path, self.position, self.n
+        i = position[a]
+        for forward in (True, False):
+            b = tour[(i + 1) % n] if forward else tour[i - 1]
+            d_ab = d[a][b]
+            for c in self.search.neighbors[a]:
+                if d[a][c] >= d_ab:
+                    break
+                j = position[c]
+                e = tour[(j + 1) % n] if forward else tour[j - 1]
+                if e == a or c == b:
+                    continue
+                # Only moves that shorten the giant tour are worth an exact scoring
+                if d_ab + d[c][e] - d[a][c] - d[b][e] <= IMPROVEMENT_EPSILON:
+                    continue
+                # Reverse whichever of the two segments does not wrap: same new edges either way
+                if forward:
+                    first, last = ((i + 1) % n, j) if (i + 1) % n <= j else ((j + 1) % n, i)
+                else:
+                    first, last = (j, (i - 1) % n) if j <= (i - 1) % n else (i, (j - 1) % n)
+                if first >= last:
+                    continue
+                path = tour[:first] + tour[first:last + 1][::-1] + tour[last + 1:]
+                if self._try(path, first, last):
+                    return a, b, c, e
+        return None
+
+    def or_opt(self, a: int):
+        d, tour, position, n = self.d, self.trace.path, self.position, self.n
+        i = position[a]
+        for length in range(1, min(self.search.max_segment, n - 3) + 1):
+            if i + length > n:
+                break
+            segment = tour[i:i + length]
+            first, last = segment[0], segment[-1]
+            p, nx = tour[i - 1], tour[(i + length) % n]
+            removal_gain = d[p][first] + d[last][nx] - d[p][nx]
+            rest = tour[:i] + tour[i + length:]
+            for end in (first, last):
+                for c in self.search.neighbors[end]:
+                    if d[end][c] >= removal_gain:
+                        break
+                    if c in segment:
+                        continue
+                    index = rest.index(c)
+                    # Segment after c (end first) or before c (end last)
+                    for insert_at, ordered in ((index + 1, segment if end == first else segment[::-1]),
+                                               (index, segment[::-1] if end == first else segment)):
+                        before, after = rest[insert_at - 1], rest[insert_at % len(rest)]
+                        if removal_gain - (d[before][ordered[0]] + d[ordered[-1]][after] - d[before][after]) \
+                                <= IMPROVEMENT_EPSILON:
+                            continue
+                        path = rest[:insert_at] + ordered + rest[insert_at:]
+                        changed_first = min(i, insert_at)
+                        changed_last = max(i + length, insert_at + length) - 1
+                        if self._try(path, changed_first, min(changed_last, n - 1)):
+                            return p, nx, c, first, last
+        return None
+
+
+if __name__ == '__main__':
+    import random
+    from genetic_algorithm import generate_distance_matrix
+    from benchmark_att48 import att_48_cities_locations, att_48_cities_order
+
+    matrix = generate_distance_matrix(att_48_cities_locations)
+    optimum = calculate_fitness([i - 1 for i in att_48_cities_order[:-1]], matrix)
+    search = LocalSearch(matrix, k=10)
+
+    start = time.perf_counter()
+    best = float('inf')
+    restarts = 0
+    while time.perf_counter() - start < 2.0:
+        route, fitness = search.improve(random.sample(range(len(matrix)), len(matrix)))
+        best = min(best, fitness)
+        restarts += 1
+    print(f"att48 optimum {optimum:.1f} | best of {restarts} random restarts in 2s: {best:.1f} "
+          f"({100 * (best / optimum - 1):.2f}% above)")
@@ -0,0 +1,178 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# In-place mutation operators for routes stored as numpy rows (e.g. GeneticEngine.population[k]).
+#
+# Every operator takes an intensity: the number of elementary moves for inversion, multi-swap
+# and adjacent swap, the longest moved segment for displacement (1 = single-city insertion), and
+# the segment length minus one for scramble. Every operator reports its move as (move, delta):
+# move is the (first, last) span of positions it changed (None if it changed nothing), which
+# genetic_algorithm.calculate_fitness_delta uses to re-score a CVRP child from the first trip
+# the move touches. Given a distance matrix, delta is the exact change of the closed tour length,
+# computed from the edges the move touches (O(1) per elementary move, O(intensity) for scramble);
+# without one it is None. Inversion deltas assume a symmetric matrix.
+# These are the only move operators and move deltas of the GA; GeneticEngine mutates crossover
+# children, which have no parent fitness to add a delta to, so it calls them without a matrix.
+
+# First and last position changed by a mutation
+Move = Optional[Tuple[int, int]]
+
+
+def _span(move: Move, first: int, last: int) -> Move:
+    """The smallest span covering move and first..last."""
+    return (first, last) if move is None else (min(move[0], first), max(move[1], last))
+
+
+def _edge(route: np.ndarray, distance_matrix, k: int) -> float:
+    """Length of the tour edge from position k to position k + 1."""
+    n = len(route)
+    return distance_matrix[route[k % n], route[(k + 1) % n]]
+
+
+def _swap(route: np.ndarray, i: int, j: int, distance_matrix=None) -> float:
+    """Exchange positions i and j; return the tour length change (0 without a matrix)."""
+    n = len(route)
+    if i == j:
+        return 0.0
+    edges = {(i - 1) % n, i, (j - 1) % n, j} if distance_matrix is not None else ()
+    before = sum(_edge(route, distance_matrix, k) for k in edges)
+    route[i], route[j] = route[j], route[i]
+    return sum(_edge(route, distance_matrix, k) for k in edges) - before
+
+
+def invert(route: np.ndarray, rng: np.random.Generator, intensity: int = 1, distance_matrix=None) -> Tuple[Move, float]:
+    """
+    Reverse intensity random segments route[i..j] in place (a random 2-opt move each).
+
+    Parameters:
+    - route (np.ndarray): The route, mutated in place.
+    - rng (np.random.Generator): Random generator.
+    - intensity (int): Number of inversions.
+    - distance_matrix (np.ndarray): If given, the tour length change is returned.
+
+    Returns:
+    Tuple[Move, float]: The changed span and the exact tour length change (symmetric matrix),
+    or None without a matrix.
+    """
+    n = len(route)
+    delta = 0.0
+    move = None
+    if n < 2:
+        return move, delta if distance_matrix is not None else None
+    for _ in range(intensity):
+        i, j = np.sort(rng.choice(n, 2, replace=False))
+        # Reversing n-1 or n cities of a cycle gives the same tour
+        if distance_matrix is not None and j - i + 1 < n - 1:
+            a, b = route[i - 1], route[i]
+            c, e = route[j], route[(j + 1) % n]
+            d = distance_matrix
+            delta += d[a, c] + d[b, e] - d[a, b] - d[c, e]
+        route[i:j + 1] = route[i:j + 1][::-1].copy()
+        move = _span(move, int(i), int(j))
+    return move, delta if distance_matrix is not None else None
+
+
+def scramble(route: np.ndarray, rng: np.random.Generator, intensity: int = 1, distance_matrix=None) -> Tuple[Move, float]:
+    """Shuffle a random segment of intensity + 1 consecutive cities in place."""
+    n = len(route)
+    length = min(intensity + 1, n)
+    if length < 2:
+        return None, 0.0 if distance_matrix is not None else None
+    i = int(rng.integers(0, n - length + 1))
+    j = i + length - 1
+    # Edges i-1 .. j touch the segment
+    edges = range(i - 1, j + 1) if length < n else range(n)
+    before = sum(_edge(route, distance_matrix, k) for k in edges) if distance_matrix is not None else 0.0
+    route[i:j + 1] = rng.permutation(route[i:j + 1])
+    if distance_matrix is None:
+        return (i, j), None
+    return (i, j), sum(_edge(route, distance_matrix, k) for k in edges) - before
+
+
+def displace(route: np.ndarray, rng: np.random.Generator, intensity: int = 1, distance_matrix=None) -> Tuple[Move, float]:
+    """
+    Move a segment of 1..intensity consecutive cities to another place in the tour, in place.
+    With intensity 1 this is the single-city insertion move.
+    """
+    n = len(route)
+    length = int(rng.integers(1, max(1, min(intensity, n - 2)) + 1))
+    if n < length + 2:
+        return None, 0.0 if distance_matrix is not None else None
+    i = int(rng.integers(0, n - length + 1))
+    segment = route[i:i + length].copy()
+    rest = np.concatenate((route[:i], route[i + length:]))
+    # Insert before rest[k], cyclically: k = 0 and k = len(rest) give the same tour, and the gap
+    # the segment came from (i, or 0 when it was at the end) would put it back where it was
+    m = len(rest)
+    k = int(rng.integers(0, m - 1))
+    if k >= i % m:
+        k += 1
+
+    delta = None
+    if distance_matrix is not None:
+        d = distance_matrix
+        p, nx = route[i - 1], route[(i + length) % n]
+        c, cn = rest[k - 1], rest[k % len(rest)]
+        delta = (d[p, nx] - d[p, segment[0]] - d[segment[-1], nx]) + \
+                (d[c, segment[0]] + d[segment[-1], cn] - d[c, cn])
+    route[:] = np.concatenate((rest[:k], segment, rest[k:]))
+    return (min(i, k), max(i, k) + length - 1), delta
+
+
+def multi_swap(route: np.ndarray, rng: np.random.Generator, intensity: int = 1, distance_matrix=None) -> Tuple[Move, float]:
+    """Exchange intensity random pairs of cities in place."""
+    n = len(route)
+    delta = 0.0
+    move = None
+    if n >= 2:
+        for _ in range(intensity):
+            i, j = sorted(int(k) for k in rng.choice(n, 2, replace=False))
+            delta += _swap(route, i, j, distance_matrix)
+            move = _span(move, i, j)
+    return move, delta if distance_matrix is not None else None
+
+
+def adjacent_swap(route: np.ndarray, rng: np.random.Generator, intensity: int = 1, distance_matrix=None) -> Tuple[Move, float]:
+    """The swap of two neighbouring cities of mutate, intensity times, in place."""
+    n = len(route)
+    delta = 0.0
+    move = None
+    if n >= 2:
+        for _ in range(intensity):
+            i = int(rng.integers(0, n - 1))
+            delta += _swap(route, i, i + 1, distance_matrix)
+            move = _span(move, i, i + 1)
+    return move, delta if distance_matrix is not None else None
+
+
+MUTATION_OPERATORS = {
+    'inversion': invert,
+    'scramble': scramble,
+    'displacement': displace,
+    'multi_swap': multi_swap,
+    'swap': adjacent_swap,
+}
+
+
+def mutate_population(population: np.ndarray, mutation_probability: float, operator: str = 'swap',
+                      intensity: int = 1, rng: np.random.Generator = None, distance_matrix=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mutate each row of a 2-D route array in place with mutation_probability.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: The indices of the mutated rows and their tour length
+    changes (zeros without a distance matrix).
+    """
+    if operator not in MUTATION_OPERATORS:
+        raise ValueError(f"Unknown mutation '{operator}', expected one of {tuple(MUTATION_OPERATORS)}")
+    rng = rng if rng is not None else np.random.default_rng()
+    mutated = np.nonzero(rng.random(len(population)) < mutation_probability)[0]
+    deltas = np.zeros(len(mutated))
+    mutation = MUTATION_OPERATORS[operator]
+    for k, row in enumerate(mutated):
+        _, delta = mutation(population[row], rng, intensity, distance_matrix)
+        if delta is not None:
+            deltas[k] = delta
+    return mutated, deltas
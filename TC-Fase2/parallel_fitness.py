@@ -0,0 +1,234 @@
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Tuple
+
+import numpy as np
+
+from genetic_algorithm import calculate_population_fitness, critical_mask, DEFAULT_SPLIT
+
+
+# Process-pool fitness evaluation. The distance matrix, the weights and the Critical mask are
+# copied once into shared memory when the evaluator is created; the persistent workers attach
+# to them at start-up. Per generation only the population is written to a shared buffer and
+# each task carries a (start, stop) row range, so nothing large is pickled.
+
+
+class SharedArray:
+    """A numpy array backed by a multiprocessing.shared_memory block."""
+
+    def __init__(self, shape: Tuple[int, ...], dtype, name: str = None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @classmethod
+    def copy_of(cls, array: np.ndarray) -> 'SharedArray':
+        array = np.ascontiguousarray(array)
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def descriptor(self) -> Tuple[str, Tuple[int, ...], str]:
+        """(name, shape, dtype): enough for another process to attach."""
+        return self.shm.name, self.shape, self.dtype.str
+
+    @classmethod
+    def attach(cls, descriptor: Tuple[str, Tuple[int, ...], str]) -> 'SharedArray':
+        name, shape, dtype = descriptor
+        return cls(shape, dtype, name=name)
+
+    def close(self) -> None:
+        # Drop the view first, the buffer cannot be released while it is exported
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# Worker-side state, set once per process by _init_worker
+_worker = {}
+
+
+def _init_worker(matrix_descriptor, weights_descriptor, mask_descriptor, problem: dict) -> None:
+    matrix = SharedArray.attach(matrix_descriptor)
+    _worker['arrays'] = [matrix]
+    _worker['matrix'] = matrix.array
+    _worker['weights'] = None
+    _worker['priorities'] = None
+    if weights_descriptor is not None:
+        weights = SharedArray.attach(weights_descriptor)
+        _worker['arrays'].append(weights)
+        _worker['weights'] = weights.array
+    if mask_descriptor is not None:
+        mask = SharedArray.attach(mask_descriptor)
+        _worker['arrays'].append(mask)
+        _worker['priorities'] = ['Critical' if critical else 'Normal' for critical in mask.array]
+    _worker['problem'] = problem
+    _worker['buffers'] = {}
+
+
+def _worker_buffer(role: str, descriptor) -> np.ndarray:
+    """Attach to the population or output buffer, again only when the evaluator replaced it."""
+    buffers = _worker['buffers']
+    shared = buffers.get(role)
+    if shared is None or shared.shm.name != descriptor[0]:
+        if shared is not None:
+            shared.close()
+        shared = buffers[role] = SharedArray.attach(descriptor)
+    return shared.array
+
+
+def _evaluate_shard(task) -> None:
+    population_descriptor, output_descriptor, start, stop = task
+    population = _worker_buffer('population', population_descriptor)
+    output = _worker_buffer('output', output_descriptor)
+    problem = _worker['problem']
+    output[start:stop] = calculate_population_fitness(population[start:stop], _worker['matrix'], _worker['weights'],
+                                                      problem['capacity'], _worker['priorities'],
+                                                      problem['priority_penalty'], problem['split'],
+                                                      problem['max_trip_cities'])
+
+
+class ParallelFitnessEvaluator:
+    """
+    calculate_population_fitness sharded over a persistent process pool.
+
+    Takes the problem arguments of calculate_fitness once. evaluate(population) returns the same
+    values as calculate_population_fitness for the same routes. Populations smaller than
+    min_parallel_rows are evaluated in-process, where the pool overhead would dominate.
+
+    Use as a context manager, or call close() to stop the workers and free the shared memory.
+    """
+
+    def __init__(self, distance_matrix: np.ndarray, weights: List[int] = None, capacity: int = None,
+                 priorities: List[str] = None, priority_penalty: float = 0, split: str = DEFAULT_SPLIT,
+                 max_trip_cities: int = None, n_workers: int = None, min_parallel_rows: int = 64):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.min_parallel_rows = min_parallel_rows
+        self.problem = {'capacity': capacity, 'priority_penalty': priority_penalty, 'split': split,
+                        'max_trip_cities': max_trip_cities}
+
+        self._matrix = SharedArray.copy_of(np.asarray(distance_matrix))
+        self._weights = SharedArray.copy_of(np.asarray(weights)) if weights is not None else None
+        self._mask = SharedArray.copy_of(critical_mask(priorities)) if priorities is not None else None
+        # In-process views of the same data for small populations
+        self.distance_matrix = self._matrix.array
+        self.weights = self._weights.array if self._weights is not None else None
+        self.priorities = list(priorities) if priorities is not None else None
+
+        self._population = None
+        self._output = None
+        self._pool = ProcessPoolExecutor(
+            self.n_workers, mp_context=mp.get_context(), initializer=_init_worker,
+            initargs=(self._matrix.descriptor,
+                      self._weights.descriptor if self._weights is not None else None,
+                      self._mask.descriptor if self._mask is not None else None,
+                      self.problem))
+
+    def _buffers(self, n_rows: int, n_cities: int) -> None:
+        """Grow the shared population and output buffers to hold n_rows routes."""
+        if self._population is not None and self._population.shape[0] >= n_rows \
+                and self._population.shape[1] == n_cities:
+            return
+        for shared in (self._population, self._output):
+            if shared is not None:
+                shared.close()
+        dtype = np.int16 if n_cities <= np.iinfo(np.int16).max + 1 else np.int32
+        self._population = SharedArray((n_rows, n_cities), dtype)
+        self._output = SharedArray((n_rows,), self.distance_matrix.dtype
+                                   if np.issubdtype(self.distance_matrix.dtype, np.floating) else np.float64)
+
+    def evaluate(self, population) -> np.ndarray:
+        """
+        Fitness of every route of the population.
+
+        Parameters:
+        - population: 2-D integer array (or list of lists), one route per row.
+
+        Returns:
+        np.ndarray: The fitness of each route, in population order.
+        """
+        if self._pool is None:
+            raise RuntimeError("ParallelFitnessEvaluator is closed")
+        routes = np.asarray(population)
+        n_rows = len(routes)
+        if n_rows < self.min_parallel_rows or self.n_workers == 1:
+            return calculate_population_fitness(routes, self.distance_matrix, self.weights, self.problem['capacity'],
+                                                self.priorities, self.problem['priority_penalty'],
+                                                self.problem['split'], self.problem['max_trip_cities'])
+
+        self._buffers(n_rows, routes.shape[1])
+        self._population.array[:n_rows] = routes
+        bounds = np.linspace(0, n_rows, self.n_workers + 1).astype(int)
+        tasks = [(self._population.descriptor, self._output.descriptor, int(start), int(stop))
+                 for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+        # list() waits for every shard and re-raises a worker error here
+        list(self._pool.map(_evaluate_shard, tasks))
+        return self._output.array[:n_rows].copy()
+
+    __call__ = evaluate
+
+    def close(self) -> None:
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True)
+        self._pool = None
+        self.distance_matrix = self.weights = None
+        for shared in (self._matrix, self._weights, self._mask, self._population, self._output):
+            if shared is not None:
+                shared.close()
+
+    def __enter__(self) -> 'ParallelFitnessEvaluator':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+if __name__ == '__main__':
+    from genetic_algorithm import generate_distance_matrix
+
+    parser = argparse.ArgumentParser(description="Benchmark in-process vs process-pool population fitness.")
+    parser.add_argument('--cities', type=int, nargs='+', default=[200, 1000, 3000])
+    parser.add_argument('--population', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--split', type=str, default=DEFAULT_SPLIT)
+    parser.add_argument('--tsp', action='store_true', help="Plain tour length instead of CVRP")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'cities':>7} {'population':>10} {'in-process (s)':>15} {'pool (s)':>10} {'speedup':>8}")
+    for n_cities in args.cities:
+        cities = [tuple(point) for point in rng.uniform(0, 1000, (n_cities, 2))]
+        matrix = generate_distance_matrix(cities)
+        weights = rng.integers(1, 10, n_cities).tolist()
+        priorities = ['Critical' if rng.random() < 0.1 else 'Normal' for _ in range(n_cities)]
+        problem = {} if args.tsp else dict(weights=weights, capacity=max(10, n_cities // 4), priorities=priorities,
+                                            priority_penalty=100, split=args.split, max_trip_cities=50)
+
+        with ParallelFitnessEvaluator(matrix, n_workers=args.workers, min_parallel_rows=0, **problem) as evaluator:
+            for population_size in args.population:
+                population = rng.permuted(np.tile(np.arange(n_cities), (population_size, 1)), axis=1)
+
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    expected = calculate_population_fitness(population, matrix, **problem)
+                serial = (time.perf_counter() - start) / args.repeat
+
+                evaluator.evaluate(population)  # attach the buffers outside the timing
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    result = evaluator.evaluate(population)
+                parallel = (time.perf_counter() - start) / args.repeat
+
+                assert (result == expected).all(), "pool result differs from calculate_population_fitness"
+                print(f"{n_cities:>7} {population_size:>10} {serial:>15.4f} {parallel:>10.4f} {serial / parallel:>7.2f}x")
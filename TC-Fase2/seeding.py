@@ -0,0 +1,439 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from genetic_algorithm import SpatialGrid
+from local_search import neighbor_lists
+
+
+# Construction heuristics for part of the initial population, so the GA starts from routes that
+# already have the structure a random permutation takes hundreds of generations to find:
+# - 'nearest_neighbor': always go to the nearest unvisited city (randomized: sometimes one of
+#   the next nearest instead);
+# - 'greedy_edge': add the shortest edges that keep every city at degree <= 2 without closing
+#   a cycle, then chain the fragments by nearest endpoints;
+# - 'savings': Clarke-Wright, merging the trips of the two customers with the largest saving
+#   d(0, i) + d(0, j) - d(i, j) while their joint demand fits the capacity (one tour without it);
+# - 'sweep': customers in polar-angle order around the depot, cut into trips by capacity.
+# The CVRP seeds are giant tours, the trips one after another from depot 0; the split decoder
+# cuts them back at least as well as the heuristic did.
+#
+# Candidate edges are limited to each city's k nearest neighbours. Up to SPATIAL_INDEX_MIN_CITIES
+# cities they come from the dense distance matrix; above it, or with an on-demand DistanceOracle,
+# from a SpatialGrid over the coordinates, with a ring search for the nearest unvisited city once
+# a city's whole neighbour list is used up. The routes are always scored with the real distances.
+
+SEEDING_METHODS = ('nearest_neighbor', 'greedy_edge', 'savings', 'sweep')
+SPATIAL_INDEX_MIN_CITIES = 2000
+DEFAULT_NEIGHBORS = 10
+
+
+def _cell_size(points: np.ndarray, per_cell: float) -> float:
+    """Grid cell side that puts about per_cell points in a cell of the points' bounding square."""
+    extent = float(np.ptp(points, axis=0).max()) if len(points) else 0.0
+    return extent * math.sqrt(per_cell / len(points)) if extent > 0 else 1.0
+
+
+def _grid_neighbors(coordinates: np.ndarray, k: int, chunk: int = 4096) -> np.ndarray:
+    """
+    The k nearest other cities of every city by Euclidean distance, closest first, taken from
+    the 3x3 grid cells around it (so a city in a sparse region may get fewer; the rest is -1).
+    """
+    n = len(coordinates)
+    neighbors = np.full((n, k), -1, dtype=np.intp)
+    if k == 0:
+        return neighbors
+    grid = SpatialGrid(coordinates, _cell_size(coordinates, k / 2))
+    cells = grid.cell_of(coordinates)
+    for start in range(0, n, chunk):
+        query, point = grid.query_cells(cells[start:start + chunk])
+        keep = point != query + start
+        query, point = query[keep], point[keep]
+        offset = coordinates[point] - coordinates[query + start]
+        order = np.lexsort((np.hypot(offset[:, 0], offset[:, 1]), query))
+        query, point = query[order], point[order]
+        rank = np.arange(len(query)) - np.searchsorted(query, query)
+        keep = rank < k
+        neighbors[query[keep] + start, rank[keep]] = point[keep]
+    return neighbors
+
+
+class _NearestSearch:
+    """Nearest not yet removed point to a location, by a ring search over a SpatialGrid."""
+
+    def __init__(self, points: np.ndarray):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.grid = SpatialGrid(self.points, _cell_size(self.points, 2))
+        self.keys = self.grid.key(self.grid.cell_of(self.points))
+        self.alive = np.ones(len(self.points), dtype=bool)
+        self.counts = np.bincount(self.keys, minlength=len(self.grid.cell_start) - 1)
+        self.remaining = len(self.points)
+
+    def remove(self, index: int) -> None:
+        if self.alive[index]:
+            self.alive[index] = False
+            self.counts[self.keys[index]] -= 1
+            self.remaining -= 1
+
+    def nearest(self, xy) -> int:
+        """Index of the nearest remaining point (-1 if none is left)."""
+        if self.remaining == 0:
+            return -1
+        grid = self.grid
+        xy = np.asarray(xy, dtype=np.float64)
+        col, row = grid.cell_of(xy[None])[0]
+        last_ring = max(abs(col), abs(col - grid.n_cols + 1), abs(row), abs(row - grid.n_rows + 1))
+        best, best_distance = -1, np.inf
+        for r in range(last_ring + 1):
+            if r == 0:
+                cols, rows = np.array([col]), np.array([row])
+            else:
+                span, side = np.arange(-r, r + 1), np.arange(-r + 1, r)
+                cols = np.concatenate([col + span, col + span, np.full(len(side), col - r), np.full(len(side), col + r)])
+                rows = np.concatenate([np.full(len(span), row - r), np.full(len(span), row + r), row + side, row + side])
+            inside = (cols >= 0) & (cols < grid.n_cols) & (rows >= 0) & (rows < grid.n_rows)
+            keys = grid.key(np.stack([cols[inside], rows[inside]], axis=1))
+            for key in keys[self.counts[keys] > 0]:
+                members = grid.order[grid.cell_start[key]:grid.cell_start[key + 1]]
+                members = members[self.alive[members]]
+                offset = self.points[members] - xy
+                distance = np.hypot(offset[:, 0], offset[:, 1])
+                closest = int(np.argmin(distance))
+                if distance[closest] < best_distance:
+                    best, best_distance = int(members[closest]), float(distance[closest])
+            # Every point beyond ring r is at least r cells away from the query's cell
+            if best >= 0 and best_distance <= r * grid.cell_size:
+                break
+        return best
+
+
+class Neighborhood:
+    """
+    Candidate neighbours and distances of one problem, shared by the construction heuristics.
+
+    Parameters:
+    - distance_matrix: The (n, n) distance matrix or a tsplib.DistanceOracle.
+    - coordinates: The (x, y) of each city; required for the spatial index (DistanceOracle or
+      at least spatial_min_cities cities) and for the sweep.
+    - k (int): Neighbour list size.
+    - spatial_min_cities (int): Number of cities from which the spatial index is used.
+    """
+
+    def __init__(self, distance_matrix, coordinates=None, k: int = DEFAULT_NEIGHBORS,
+                 spatial_min_cities: int = SPATIAL_INDEX_MIN_CITIES):
+        self.distance_matrix = distance_matrix
+        self.n_cities = len(distance_matrix)
+        self.coordinates = None if coordinates is None else np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        dense = isinstance(distance_matrix, np.ndarray)
+        self.spatial = self.coordinates is not None and (self.n_cities >= spatial_min_cities or not dense)
+        if not dense and not self.spatial:
+            raise ValueError("Seeding without a dense distance matrix needs the city coordinates")
+        k = max(0, min(k, self.n_cities - 1))
+        self.neighbors = _grid_neighbors(self.coordinates, k) if self.spatial else neighbor_lists(distance_matrix, k)
+
+    def distance(self, a, b) -> np.ndarray:
+        """Distances between cities a and b (integers or broadcastable index arrays)."""
+        return np.asarray(self.distance_matrix[a, b], dtype=np.float64)
+
+    def nearest_search(self, cities: np.ndarray = None) -> _NearestSearch:
+        """A ring search over the given cities (default all); its indices are positions in cities."""
+        return _NearestSearch(self.coordinates if cities is None else self.coordinates[cities])
+
+    def candidate_edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """The undirected neighbour-list edges (a, b), a < b, each once."""
+        a = np.repeat(np.arange(self.n_cities), self.neighbors.shape[1])
+        b = self.neighbors.ravel()
+        keep = b >= 0
+        low, high = np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])
+        edges = np.unique(low * self.n_cities + high)
+        return edges // self.n_cities, edges % self.n_cities
+
+
+class _Fragments:
+    """Paths built edge by edge: degree <= 2, no cycles (union-find), optional load per path."""
+
+    def __init__(self, n: int, loads=None):
+        self.links = [[-1, -1] for _ in range(n)]
+        self.degree = [0] * n
+        self.parent = list(range(n))
+        self.load = None if loads is None else [float(load) for load in loads]
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def can_link(self, a: int, b: int, capacity: float = None) -> bool:
+        if self.degree[a] == 2 or self.degree[b] == 2:
+            return False
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        return capacity is None or self.load[root_a] + self.load[root_b] <= capacity
+
+    def link(self, a: int, b: int) -> None:
+        self.links[a][self.degree[a]] = b
+        self.links[b][self.degree[b]] = a
+        self.degree[a] += 1
+        self.degree[b] += 1
+        root_a, root_b = self.find(a), self.find(b)
+        self.parent[root_b] = root_a
+        if self.load is not None:
+            self.load[root_a] += self.load[root_b]
+
+    def chains(self, nodes) -> List[List[int]]:
+        """The paths through the given nodes, each walked from one of its ends."""
+        seen = set()
+        chains = []
+        for start in nodes:
+            if start in seen or self.degree[start] == 2:
+                continue
+            chain, previous, current = [], -1, start
+            while current != -1:
+                chain.append(current)
+                seen.add(current)
+                following = [city for city in self.links[current] if city != -1 and city != previous]
+                previous, current = current, following[0] if following else -1
+            chains.append(chain)
+        return chains
+
+
+def _join_chains(chains: List[List[int]], neighborhood: Neighborhood, first: int = 0) -> List[int]:
+    """One tour from path fragments: from the end of the tour so far, on to the nearest fragment end."""
+    tour = list(chains[first])
+    if len(chains) == 1:
+        return tour
+    ends = np.array([[chain[0], chain[-1]] for chain in chains]).ravel()
+    if neighborhood.spatial:
+        search = neighborhood.nearest_search(ends)
+        search.remove(2 * first)
+        search.remove(2 * first + 1)
+    else:
+        alive = np.ones(len(ends), dtype=bool)
+        alive[2 * first:2 * first + 2] = False
+    for _ in range(len(chains) - 1):
+        if neighborhood.spatial:
+            end = search.nearest(neighborhood.coordinates[tour[-1]])
+            search.remove(end - end % 2)
+            search.remove(end - end % 2 + 1)
+        else:
+            end = int(np.argmin(np.where(alive, neighborhood.distance(tour[-1], ends), np.inf)))
+            alive[end - end % 2:end - end % 2 + 2] = False
+        chain = chains[end // 2]
+        tour.extend(chain if end % 2 == 0 else chain[::-1])
+    return tour
+
+
+def nearest_neighbor_tour(neighborhood: Neighborhood, start: int = 0, rng: np.random.Generator = None,
+                          noise: float = 0.0, candidates: int = 3) -> np.ndarray:
+    """
+    Nearest-neighbour tour from start. With noise, each step goes with that probability to one
+    of the candidates nearest unvisited cities, chosen at random, instead of the nearest.
+    """
+    n = neighborhood.n_cities
+    visited = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=np.intp)
+    tour[0] = current = start
+    visited[start] = True
+    search = None
+    if neighborhood.spatial:
+        search = neighborhood.nearest_search()
+        search.remove(start)
+    for position in range(1, n):
+        randomized = noise > 0 and rng.random() < noise
+        if search is None:
+            row = np.where(visited, np.inf, neighborhood.distance(current, slice(None)))
+            choices = min(candidates, n - position)
+            if randomized and choices > 1:
+                current = int(np.argpartition(row, choices - 1)[:choices][rng.integers(choices)])
+            else:
+                current = int(np.argmin(row))
+        else:
+            near = neighborhood.neighbors[current]
+            near = near[near >= 0]
+            near = near[~visited[near]]
+            if len(near) == 0:
+                current = search.nearest(neighborhood.coordinates[current])
+            elif randomized:
+                current = int(near[rng.integers(min(candidates, len(near)))])
+            else:
+                current = int(near[0])
+            search.remove(current)
+        visited[current] = True
+        tour[position] = current
+    return tour
+
+
+def greedy_edge_tour(neighborhood: Neighborhood, rng: np.random.Generator = None, noise: float = 0.0) -> np.ndarray:
+    """
+    Greedy edge tour over the neighbour-list edges, shortest first; with noise, each length is
+    scaled by a random factor in [1, 1 + noise) and the fragments are chained from a random one.
+    """
+    a, b = neighborhood.candidate_edges()
+    lengths = neighborhood.distance(a, b)
+    if noise > 0:
+        lengths = lengths * (1 + noise * rng.random(len(lengths)))
+    fragments = _Fragments(neighborhood.n_cities)
+    for edge in np.argsort(lengths, kind='stable').tolist():
+        if fragments.can_link(int(a[edge]), int(b[edge])):
+            fragments.link(int(a[edge]), int(b[edge]))
+    chains = fragments.chains(range(neighborhood.n_cities))
+    first = int(rng.integers(len(chains))) if noise > 0 else 0
+    return np.array(_join_chains(chains, neighborhood, first), dtype=np.intp)
+
+
+def savings_tour(neighborhood: Neighborhood, weights: List[int] = None, capacity: int = None,
+                 rng: np.random.Generator = None, noise: float = 0.0) -> np.ndarray:
+    """
+    Clarke-Wright savings around depot 0 over the neighbour-list pairs of customers.
+
+    With weights and capacity, the trips are returned as a giant tour (in random order and
+    direction when noise > 0); without them the paths are chained into one tour. With noise,
+    each saving is scaled by a random factor in [1, 1 + noise).
+    """
+    n = neighborhood.n_cities
+    cvrp = weights is not None and capacity is not None
+    a, b = neighborhood.candidate_edges()
+    customers = (a != 0) & (b != 0)
+    a, b = a[customers], b[customers]
+    from_depot = neighborhood.distance(0, np.arange(n))
+    savings = from_depot[a] + from_depot[b] - neighborhood.distance(a, b)
+    if noise > 0:
+        savings = savings * (1 + noise * rng.random(len(savings)))
+    fragments = _Fragments(n, weights if cvrp else None)
+    for pair in np.argsort(-savings, kind='stable').tolist():
+        if savings[pair] <= 0:
+            break
+        if fragments.can_link(int(a[pair]), int(b[pair]), capacity if cvrp else None):
+            fragments.link(int(a[pair]), int(b[pair]))
+    chains = fragments.chains(range(1, n))
+    if not cvrp:
+        return np.array(_join_chains([[0]] + chains, neighborhood), dtype=np.intp)
+    if noise > 0:
+        chains = [chains[i][::-1] if rng.random() < 0.5 else chains[i] for i in rng.permutation(len(chains))]
+    return np.array([0] + [city for chain in chains for city in chain], dtype=np.intp)
+
+
+def _euclidean_nearest_neighbor_order(points: np.ndarray, xy: np.ndarray) -> np.ndarray:
+    """Order of the points on a nearest-neighbour path starting from location xy."""
+    remaining = np.ones(len(points), dtype=bool)
+    order = np.empty(len(points), dtype=np.intp)
+    for position in range(len(points)):
+        offset = points - xy
+        distance = np.where(remaining, np.hypot(offset[:, 0], offset[:, 1]), np.inf)
+        order[position] = nearest = int(np.argmin(distance))
+        remaining[nearest] = False
+        xy = points[nearest]
+    return order
+
+
+def sweep_tour(coordinates, weights: List[int] = None, capacity: int = None, start_angle: float = 0.0,
+               clockwise: bool = False, max_trip_order: int = SPATIAL_INDEX_MIN_CITIES) -> np.ndarray:
+    """
+    Sweep around depot 0: customers by polar angle from start_angle, cut into a new trip whenever
+    the next one would overflow the capacity; each trip is ordered nearest-neighbour from the
+    depot (trips over max_trip_order cities keep the angular order). Returns the giant tour.
+    """
+    points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    offset = points[1:] - points[0]
+    angle = np.mod(np.arctan2(offset[:, 1], offset[:, 0]) - start_angle, 2 * np.pi)
+    customers = 1 + np.argsort(-angle if clockwise else angle, kind='stable')
+    if weights is None or capacity is None:
+        return np.concatenate([[0], customers]).astype(np.intp)
+
+    demand = np.asarray(weights, dtype=np.float64)
+    trips, trip, load = [], [], 0.0
+    for city in customers.tolist():
+        if trip and load + demand[city] > capacity:
+            trips.append(trip)
+            trip, load = [], 0.0
+        trip.append(city)
+        load += demand[city]
+    trips.append(trip)
+    tour = [0]
+    for trip in trips:
+        trip = np.array(trip, dtype=np.intp)
+        if len(trip) <= max_trip_order:
+            trip = trip[_euclidean_nearest_neighbor_order(points[trip], points[0])]
+        tour.extend(trip.tolist())
+    return np.array(tour, dtype=np.intp)
+
+
+class PopulationSeeder:
+    """
+    Builds a fraction of a GeneticEngine's initial population with the construction heuristics;
+    the rest stays random.
+
+    The seeded routes go round-robin over the methods. The first route of each method is its
+    plain heuristic (nearest neighbour from the depot, sweep from angle 0); the next ones are
+    randomized with noise, and with a random start city, sweep angle and direction.
+
+    Parameters:
+    - fraction (float): Share of the population to seed (0-1).
+    - methods: Subset of SEEDING_METHODS. Default: nearest_neighbor, greedy_edge and savings,
+      plus sweep for the CVRP mode when coordinates are given.
+    - coordinates: The (x, y) of each city, for sweep and the spatial index of large instances.
+    - noise (float): Randomization of the routes after the first of each method.
+    - candidates (int): Nearest cities a randomized nearest-neighbour step picks from.
+    - k (int): Neighbour list size for greedy edge, savings and the spatial index.
+    """
+
+    def __init__(self, fraction: float = 0.2, methods=None, coordinates=None, noise: float = 0.1,
+                 candidates: int = 3, k: int = DEFAULT_NEIGHBORS):
+        if not 0 <= fraction <= 1:
+            raise ValueError(f"Seeding fraction must be between 0 and 1, got {fraction}")
+        unknown = set(methods or ()) - set(SEEDING_METHODS)
+        if unknown:
+            raise ValueError(f"Unknown seeding methods {sorted(unknown)}, expected {SEEDING_METHODS}")
+        if methods is not None and 'sweep' in methods and coordinates is None:
+            raise ValueError("The sweep seeding needs the city coordinates")
+        self.fraction = fraction
+        self.methods = None if methods is None else tuple(methods)
+        self.coordinates = coordinates
+        self.noise = noise
+        self.candidates = candidates
+        self.k = k
+
+    def methods_for(self, cvrp: bool) -> Tuple[str, ...]:
+        if self.methods is not None:
+            return self.methods
+        if cvrp and self.coordinates is not None:
+            return SEEDING_METHODS
+        return ('nearest_neighbor', 'greedy_edge', 'savings')
+
+    def routes(self, count: int, distance_matrix, weights: List[int] = None, capacity: int = None,
+               rng: np.random.Generator = None) -> np.ndarray:
+        """count seeded routes as a (count, n) array."""
+        rng = rng if rng is not None else np.random.default_rng()
+        n = len(distance_matrix)
+        cvrp = weights is not None and capacity is not None
+        methods = self.methods_for(cvrp)
+        neighborhood = Neighborhood(distance_matrix, self.coordinates, self.k) if n > 3 and count > 0 else None
+        routes = np.empty((count, n), dtype=np.intp)
+        for index in range(count):
+            method, variant = methods[index % len(methods)], index // len(methods)
+            noise = self.noise if variant > 0 else 0.0
+            if neighborhood is None:
+                routes[index] = rng.permutation(n) if variant > 0 else np.arange(n)
+            elif method == 'nearest_neighbor':
+                start = int(rng.integers(n)) if variant > 0 else 0
+                routes[index] = nearest_neighbor_tour(neighborhood, start, rng, noise, self.candidates)
+            elif method == 'greedy_edge':
+                routes[index] = greedy_edge_tour(neighborhood, rng, noise)
+            elif method == 'savings':
+                routes[index] = savings_tour(neighborhood, weights, capacity, rng, noise)
+            else:
+                start_angle, clockwise = (rng.uniform(0, 2 * np.pi), bool(rng.random() < 0.5)) if variant > 0 else (0.0, False)
+                routes[index] = sweep_tour(self.coordinates, weights if cvrp else None, capacity, start_angle, clockwise)
+        return routes
+
+    def seed(self, engine) -> int:
+        """Overwrite the first rows of the engine's population with seeded routes; returns how many."""
+        count = min(int(round(self.fraction * engine.population_size)), engine.population_size)
+        if count > 0:
+            engine.population[:count] = self.routes(count, engine.distance_matrix, engine.weights, engine.capacity,
+                                                    engine.rng)
+        return count
@@ -0,0 +1,94 @@
+import numpy as np
+
+
+# Fitness is a distance: lower is better everywhere in this module.
+
+def _cumulative(weights: np.ndarray) -> np.ndarray:
+    """Normalized cumulative weights, computed once per generation."""
+    cumulative = np.cumsum(weights, dtype=np.float64)
+    cumulative /= cumulative[-1]
+    return cumulative
+
+
+def _draw(cumulative: np.ndarray, n_pairs: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw all 2 * n_pairs parents at once with one binary search per draw."""
+    picks = np.searchsorted(cumulative, rng.random(2 * n_pairs), side='right')
+    return np.minimum(picks, len(cumulative) - 1).reshape(n_pairs, 2)
+
+
+def roulette_selection(fitness: np.ndarray, n_pairs: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Fitness-proportionate selection with weights 1 / fitness.
+
+    Parameters:
+    - fitness (np.ndarray): Fitness of each individual (lower is better).
+    - n_pairs (int): Number of parent pairs to draw.
+    - rng (np.random.Generator): Random generator.
+
+    Returns:
+    np.ndarray: (n_pairs, 2) array of parent indices.
+    """
+    weights = 1 / np.maximum(np.asarray(fitness, dtype=np.float64), np.finfo(float).tiny)
+    return _draw(_cumulative(weights), n_pairs, rng)
+
+
+def tournament_selection(fitness: np.ndarray, n_pairs: int, rng: np.random.Generator, tournament_size: int = 3) -> np.ndarray:
+    """
+    Each parent is the best of tournament_size individuals drawn uniformly with replacement.
+    All tournaments of the generation are played in one (2 * n_pairs, tournament_size) array.
+    """
+    fitness = np.asarray(fitness)
+    contestants = rng.integers(0, len(fitness), size=(2 * n_pairs, tournament_size))
+    winners = np.take_along_axis(contestants, np.argmin(fitness[contestants], axis=1)[:, None], axis=1)
+    return winners.reshape(n_pairs, 2)
+
+
+def rank_selection(fitness: np.ndarray, n_pairs: int, rng: np.random.Generator, selection_pressure: float = 1.5) -> np.ndarray:
+    """
+    Linear ranking: the weight depends only on the rank, from selection_pressure for the best
+    down to 2 - selection_pressure for the worst (1 <= selection_pressure <= 2).
+    """
+    size = len(fitness)
+    ranks = np.empty(size)
+    # rank 0 = worst ... size - 1 = best
+    ranks[np.argsort(np.asarray(fitness), kind='stable')[::-1]] = np.arange(size)
+    if size > 1:
+        weights = (2 - selection_pressure) + 2 * (selection_pressure - 1) * ranks / (size - 1)
+    else:
+        weights = np.ones(1)
+    return _draw(_cumulative(weights), n_pairs, rng)
+
+
+def stochastic_universal_sampling(fitness: np.ndarray, n_pairs: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Stochastic universal sampling on 1 / fitness: 2 * n_pairs evenly spaced pointers with one
+    random offset, so each individual is picked close to its expected number of times.
+    The picks are shuffled before pairing.
+    """
+    weights = 1 / np.maximum(np.asarray(fitness, dtype=np.float64), np.finfo(float).tiny)
+    cumulative = _cumulative(weights)
+    n_picks = 2 * n_pairs
+    pointers = (rng.random() + np.arange(n_picks)) / n_picks
+    picks = np.minimum(np.searchsorted(cumulative, pointers, side='right'), len(cumulative) - 1)
+    return rng.permutation(picks).reshape(n_pairs, 2)
+
+
+SELECTION_METHODS = {
+    'roulette': roulette_selection,
+    'tournament': tournament_selection,
+    'rank': rank_selection,
+    'sus': stochastic_universal_sampling,
+}
+
+
+def select_parents(fitness: np.ndarray, n_pairs: int, method: str = 'roulette', rng: np.random.Generator = None, **kwargs) -> np.ndarray:
+    """
+    Draw n_pairs parent pairs with one of SELECTION_METHODS.
+
+    Returns:
+    np.ndarray: (n_pairs, 2) array of indices into the population.
+    """
+    if method not in SELECTION_METHODS:
+        raise ValueError(f"Unknown selection '{method}', expected one of {tuple(SELECTION_METHODS)}")
+    rng = rng if rng is not None else np.random.default_rng()
+    return SELECTION_METHODS[method](fitness, n_pairs, rng, **kwargs)
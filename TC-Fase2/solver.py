@@ -0,0 +1,482 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import numpy as np
+
+from genetic_algorithm import GeneticEngine, generate_distance_matrix, calculate_fitness, split_giant_tour, DEFAULT_SPLIT, SPLIT_MODES, _rotate_path_to_depot
+from selection import SELECTION_METHODS
+from local_search import LocalSearch
+from mutation import MUTATION_OPERATORS
+from tsplib import load_tsplib, TSPLIBInstance
+from instrumentation import Instrumentation, profiled
+from checkpoint import Checkpointer, load_checkpoint
+from convergence import StoppingCriteria, RestartPolicy
+from adaptive import AdaptiveController
+from seeding import PopulationSeeder, SEEDING_METHODS
+from benchmark_att48 import att_48_cities_locations, att_48_cities_weights, att_48_cities_priorities, att_48_cities_order
+
+
+# Same defaults as tsp.py / homescreen.py
+DEFAULT_POPULATION_SIZE = 100
+DEFAULT_N_GENERATIONS = 5000
+DEFAULT_MUTATION_PROBABILITY = 0.5
+DEFAULT_TRUCK_CAPACITY = 80
+
+# Screen geometry the att48 coordinates are scaled to, so fitness values match the pygame view
+SCREEN_WIDTH, SCREEN_HEIGHT = 1500, 800
+PLOT_X_OFFSET = 450
+NODE_RADIUS = 10
+
+
+def scale_to_screen(locations: List[Tuple[float, float]], width: int = SCREEN_WIDTH, height: int = SCREEN_HEIGHT,
+                    x_offset: int = PLOT_X_OFFSET, node_radius: int = NODE_RADIUS) -> List[Tuple[int, int]]:
+    """
+    Scale city coordinates to pixel positions right of the fitness plot.
+    """
+    max_x = max(point[0] for point in locations)
+    max_y = max(point[1] for point in locations)
+    scale_x = (width - x_offset - node_radius) / max_x
+    scale_y = height / max_y
+    return [(int(point[0] * scale_x + x_offset), int(point[1] * scale_y)) for point in locations]
+
+
+def parse_critical_indices(critical_indices_str: str, n_cities: int, default_priorities: List[str] = None) -> List[str]:
+    """
+    Build the priority list from a "1, 5, 10" string of Critical city indices.
+    An empty string keeps default_priorities (the att48 benchmark priorities if not given).
+    """
+    if not critical_indices_str or not critical_indices_str.strip():
+        return list(default_priorities if default_priorities is not None else att_48_cities_priorities)
+
+    priorities = ['Normal'] * n_cities
+    try:
+        # Parse "1, 5, 10" -> [1, 5, 10]
+        indices = [int(x.strip()) for x in critical_indices_str.split(',') if x.strip().isdigit()]
+        for idx in indices:
+            if 0 <= idx < n_cities:
+                priorities[idx] = 'Critical'
+    except Exception:
+        print("Error parsing critical indices, using defaults.")
+    return priorities
+
+
+@dataclass
+class SolverResult:
+    """Outcome of a headless run."""
+    best_route: List[int]
+    best_fitness: float
+    trips: List[List[int]]
+    best_fitness_values: List[float]
+    generations: int
+    elapsed_seconds: float
+    generations_per_second: float
+    evaluations_per_second: float
+    parameters: dict = field(default_factory=dict)
+    stop_reason: str = None
+    restarts: int = 0
+    diversity: dict = field(default_factory=dict)
+    adaptive_trajectory: List[dict] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class HeadlessSolver:
+    """
+    The capacity/priority GA of the simulation, without pygame.
+
+    Takes the parameters of homescreen.start_simulation and runs the GeneticEngine at full speed.
+    run() evolves to the end and returns a SolverResult; iter_generations() yields one snapshot
+    per generation for consumers such as the pygame view.
+
+    With an instrumentation.Instrumentation, run() closes one record per generation;
+    iter_generations() leaves that to its consumer, which can add its own phases first.
+
+    With checkpoint_path, the engine state is saved there every checkpoint_generations
+    generations and/or checkpoint_seconds seconds, and at the end of run(). resume=True
+    continues from that file if it exists; from_checkpoint() rebuilds the solver from the
+    arguments stored in it.
+
+    The run ends after n_generations or earlier by the convergence.StoppingCriteria built from
+    stall_generations, min_improvement (over improvement_window), time_limit and target;
+    restart_stall enables cataclysmic restarts keeping restart_keep elites.
+
+    track_diversity follows the population diversity (edge bond distance and entropy) every
+    generation; reject_duplicates keeps exact copies of other individuals out of each new generation.
+    adaptive hands mutation_probability, mutation_intensity and the crossover operator to an
+    adaptive.AdaptiveController, which starts from the given values and re-tunes them online.
+    mutation defaults to segment inversion here and in the CLI (GeneticEngine keeps the original
+    adjacent swap); any mutation.MUTATION_OPERATORS name can be given.
+    seeding_fraction of the initial population is built by the seeding.PopulationSeeder heuristics
+    (seeding_methods, or its defaults for the problem) instead of at random.
+    """
+
+    # Arguments that define the problem and the engine; a checkpoint only resumes if they match
+    RESUME_ARGUMENTS = ('truck_capacity', 'population_size', 'critical_indices_str', 'priority_penalty', 'split',
+                        'cities_locations', 'weights', 'crossover', 'selection', 'local_search_elites',
+                        'local_search_offspring', 'mutation', 'mutation_intensity', 'instance',
+                        'reject_duplicates', 'adaptive')
+
+    def __init__(self, truck_capacity: int = None,
+                 population_size: int = DEFAULT_POPULATION_SIZE,
+                 n_generations: int = DEFAULT_N_GENERATIONS,
+                 mutation_probability: float = DEFAULT_MUTATION_PROBABILITY,
+                 critical_indices_str: str = "",
+                 priority_penalty: float = 0,
+                 split: str = DEFAULT_SPLIT,
+                 seed: int = None,
+                 cities_locations: List[Tuple[int, int]] = None,
+                 weights: List[int] = None,
+                 crossover: str = 'ox',
+                 selection: str = 'roulette',
+                 local_search_elites: int = 0,
+                 local_search_offspring: float = 0.0,
+                 mutation: str = 'inversion',
+                 mutation_intensity: int = 1,
+                 instance=None,
+                 instrumentation: Instrumentation = None,
+                 checkpoint_path: str = None,
+                 checkpoint_generations: int = None,
+                 checkpoint_seconds: float = None,
+                 resume: bool = False,
+                 stall_generations: int = None,
+                 min_improvement: float = None,
+                 improvement_window: int = 100,
+                 time_limit: float = None,
+                 target: float = None,
+                 restart_stall: int = None,
+                 restart_keep: int = None,
+                 max_restarts: int = None,
+                 track_diversity: bool = False,
+                 reject_duplicates: bool = False,
+                 adaptive: bool = False,
+                 seeding_fraction: float = 0.0,
+                 seeding_methods: List[str] = None):
+        # JSON-serializable constructor arguments, stored in checkpoints
+        self.arguments = {key: value for key, value in locals().items()
+                          if key not in ('self', 'instrumentation', 'resume')}
+        if isinstance(instance, dict):
+            # Parsed instance as stored in a checkpoint by to_dict
+            instance = TSPLIBInstance.from_dict(instance)
+        if isinstance(instance, TSPLIBInstance):
+            # In-memory instances are stored whole, so that resuming rebuilds the same problem
+            self.arguments['instance'] = instance.to_dict()
+        self.instance = None
+        if instance is not None:
+            # A TSPLIB/CVRPLIB file (or parsed instance): distances use its own metric, and the
+            # screen coordinates are only for drawing
+            self.instance = (load_tsplib(instance) if isinstance(instance, str) else instance).depot_first()
+            self.cities_locations = scale_to_screen(self.instance.locations)
+            self.weights = self.instance.weights
+            if self.weights is None:
+                truck_capacity = None
+            elif truck_capacity is None:
+                truck_capacity = self.instance.capacity or DEFAULT_TRUCK_CAPACITY
+            default_priorities = ['Normal'] * self.instance.dimension
+        else:
+            # Using att48 benchmark unless another instance is given
+            self.cities_locations = cities_locations if cities_locations is not None else scale_to_screen(att_48_cities_locations)
+            self.weights = weights if weights is not None else att_48_cities_weights
+            truck_capacity = truck_capacity if truck_capacity is not None else DEFAULT_TRUCK_CAPACITY
+            default_priorities = None
+        self.priorities = parse_critical_indices(critical_indices_str, len(self.cities_locations), default_priorities)
+        self.truck_capacity = truck_capacity
+        self.n_generations = n_generations
+        self.priority_penalty = priority_penalty
+        self.split = split
+        self.parameters = {
+            'truck_capacity': truck_capacity, 'population_size': population_size, 'n_generations': n_generations,
+            'mutation_probability': mutation_probability, 'critical_indices_str': critical_indices_str,
+            'priority_penalty': priority_penalty, 'split': split, 'seed': seed, 'crossover': crossover,
+            'selection': selection, 'local_search_elites': local_search_elites,
+            'local_search_offspring': local_search_offspring, 'mutation': mutation,
+            'mutation_intensity': mutation_intensity, 'stall_generations': stall_generations,
+            'min_improvement': min_improvement, 'time_limit': time_limit, 'target': target,
+            'restart_stall': restart_stall, 'reject_duplicates': reject_duplicates,
+            'adaptive': adaptive, 'seeding_fraction': seeding_fraction, 'seeding_methods': seeding_methods,
+            'instance': self.instance.name if self.instance is not None else 'att48',
+        }
+
+        if self.instance is not None:
+            # Dense matrix for moderate sizes, on-demand DistanceOracle for huge instances
+            self.distance_matrix = self.instance.distances()
+        else:
+            self.distance_matrix = generate_distance_matrix(self.cities_locations)
+        self.local_search = None
+        if local_search_elites > 0 or local_search_offspring > 0:
+            if not isinstance(self.distance_matrix, np.ndarray):
+                raise ValueError("Local search needs a dense distance matrix; this instance uses a DistanceOracle")
+            self.local_search = LocalSearch(self.distance_matrix, self.weights, truck_capacity, self.priorities,
+                                            priority_penalty, split)
+        self.stopping = StoppingCriteria(stall_generations, min_improvement, improvement_window, time_limit, target)
+        restart = RestartPolicy(restart_stall, restart_keep, max_restarts) if restart_stall else None
+        seeding = None
+        if seeding_fraction > 0:
+            coordinates = self.instance.coordinates if self.instance is not None else self.cities_locations
+            seeding = PopulationSeeder(seeding_fraction, seeding_methods, coordinates)
+        self.engine = GeneticEngine(self.distance_matrix, population_size, mutation_probability,
+                                    self.weights, truck_capacity, self.priorities, priority_penalty,
+                                    split, crossover=crossover, seed=seed, selection=selection,
+                                    local_search=self.local_search, local_search_elites=local_search_elites,
+                                    local_search_offspring=local_search_offspring, mutation=mutation,
+                                    mutation_intensity=mutation_intensity, instrumentation=instrumentation,
+                                    restart=restart, track_diversity=track_diversity,
+                                    reject_duplicates=reject_duplicates,
+                                    adaptive=AdaptiveController() if adaptive else None, seeding=seeding)
+        self.instrumentation = self.engine.instrumentation
+        self.elapsed_seconds = 0.0
+
+        self.checkpointer = None
+        if checkpoint_path is not None:
+            self.checkpointer = Checkpointer(checkpoint_path, checkpoint_generations, checkpoint_seconds,
+                                             metadata={'solver_arguments': self.arguments})
+            if resume and os.path.exists(checkpoint_path):
+                self.load_checkpoint(checkpoint_path)
+
+    @classmethod
+    def from_checkpoint(cls, path: str, **overrides) -> 'HeadlessSolver':
+        """
+        Rebuild the solver stored in a checkpoint and restore its state; overrides replace stored
+        arguments that do not change the problem (e.g. n_generations to extend the run).
+        """
+        arguments = load_checkpoint(path)['solver_arguments']
+        arguments.update(overrides)
+        arguments.setdefault('checkpoint_path', path)
+        solver = cls(**dict(arguments, resume=False))
+        solver.load_checkpoint(path)
+        return solver
+
+    def load_checkpoint(self, path: str) -> None:
+        """Continue from a checkpoint of the same problem."""
+        state = load_checkpoint(path)
+        stored = state.get('solver_arguments', {})
+        current = json.loads(json.dumps(self.arguments))
+        mismatched = [key for key in self.RESUME_ARGUMENTS if key in stored and stored[key] != current.get(key)]
+        if mismatched:
+            raise ValueError(f"Checkpoint '{path}' was written for different {', '.join(mismatched)}")
+        self.engine.load_state(state)
+        self.elapsed_seconds = float(state.get('elapsed_seconds', 0.0))
+        if self.checkpointer is not None:
+            self.checkpointer.last_generation = self.engine.generation
+
+    def checkpoint(self) -> None:
+        """Save a checkpoint now (no-op without checkpoint_path)."""
+        if self.checkpointer is not None:
+            self.checkpointer.save(self.engine, elapsed_seconds=self.elapsed_seconds)
+
+    def step(self) -> float:
+        """
+        One generation of the engine, timed, checked against the stopping criteria and
+        checkpointed when due; returns its best fitness.
+        """
+        start = time.perf_counter()
+        best_fitness = self.engine.step()
+        self.elapsed_seconds += time.perf_counter() - start
+        self.engine.stop_reason = self.stopping.reason(self.engine, self.elapsed_seconds)
+        if self.checkpointer is not None:
+            self.checkpointer.maybe_save(self.engine, elapsed_seconds=self.elapsed_seconds)
+        return best_fitness
+
+    def fitness(self, route: List[int]) -> float:
+        """Fitness of any route under this solver's problem settings."""
+        return calculate_fitness(list(route), self.distance_matrix, self.weights, self.truck_capacity,
+                                 self.priorities, self.priority_penalty, self.split)
+
+    def trips(self, route: List[int]) -> List[List[int]]:
+        """Depot-to-depot trips of a route, as scored (one trip for a plain TSP instance)."""
+        if self.weights is None or self.truck_capacity is None:
+            return [_rotate_path_to_depot(list(route))]
+        _, trips = split_giant_tour(list(route), self.distance_matrix, self.weights, self.truck_capacity, self.split)
+        return trips
+
+    def target_fitness(self) -> float:
+        """Fitness of the known optimal att48 tour under the current settings (None for other instances)."""
+        if self.instance is not None:
+            return None
+        return self.fitness([i - 1 for i in att_48_cities_order[:-1]])
+
+    def random_baseline_fitness(self) -> float:
+        """Fitness of one random route, the baseline the improvement is measured against."""
+        n = len(self.cities_locations)
+        return self.fitness(random.sample(range(n), n))
+
+    @property
+    def finished(self) -> bool:
+        return self.engine.generation >= self.n_generations or self.engine.stop_reason is not None
+
+    @property
+    def stop_reason(self) -> str:
+        """Why the run ended early (a StoppingCriteria rule), or None."""
+        return self.engine.stop_reason
+
+    def iter_generations(self):
+        """
+        Evolve one generation per iteration and yield a snapshot dict with the generation
+        number, that generation's best fitness and route, and the best fitness so far.
+        """
+        while not self.finished:
+            best_fitness = self.step()
+            yield {
+                'generation': self.engine.generation,
+                'best_fitness': best_fitness,
+                'best_route': self.engine.population[0].tolist(),
+                'overall_best_fitness': self.engine.best_fitness,
+            }
+
+    def run(self, callback=None) -> SolverResult:
+        """
+        Evolve until n_generations or a stopping criterion. callback(engine) runs after each
+        generation and may return True to stop early.
+        """
+        while not self.finished:
+            self.step()
+            self.instrumentation.end_generation(self.engine.generation, best_fitness=self.engine.best_fitness)
+            if callback is not None and callback(self.engine):
+                break
+        self.checkpoint()
+        return self.result()
+
+    def result(self) -> SolverResult:
+        generations = self.engine.generation
+        elapsed = self.elapsed_seconds
+        best_route = self.engine.best_route.tolist()
+        return SolverResult(
+            best_route=best_route,
+            best_fitness=self.engine.best_fitness,
+            trips=self.trips(best_route),
+            best_fitness_values=list(self.engine.best_fitness_values),
+            generations=generations,
+            elapsed_seconds=elapsed,
+            generations_per_second=generations / elapsed if elapsed > 0 else 0.0,
+            # Routes actually scored, without cache hits and carried-over elites
+            evaluations_per_second=self.engine.evaluations / elapsed if elapsed > 0 else 0.0,
+            parameters=dict(self.parameters),
+            stop_reason=self.stop_reason,
+            restarts=self.engine.restarts,
+            diversity=dict(self.engine.diversity_metrics),
+            adaptive_trajectory=self.engine.adaptive.trajectory_dicts() if self.engine.adaptive is not None else [],
+        )
+
+
+def solve(truck_capacity: int = None,
+          population_size: int = DEFAULT_POPULATION_SIZE,
+          n_generations: int = DEFAULT_N_GENERATIONS,
+          mutation_probability: float = DEFAULT_MUTATION_PROBABILITY,
+          critical_indices_str: str = "",
+          priority_penalty: float = 0,
+          **kwargs) -> SolverResult:
+    """Run the GA headless with the homescreen parameters and return the SolverResult."""
+    return HeadlessSolver(truck_capacity, population_size, n_generations, mutation_probability,
+                          critical_indices_str, priority_penalty, **kwargs).run()
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Headless genetic algorithm solver for the att48 CVRP.")
+    parser.add_argument('--capacity', type=int, default=None, help=f"Truck capacity (kg); default {DEFAULT_TRUCK_CAPACITY} or the instance CAPACITY")
+    parser.add_argument('--instance', type=str, default=None, help="TSPLIB/CVRPLIB file to solve instead of att48")
+    parser.add_argument('--population', type=int, default=DEFAULT_POPULATION_SIZE, help="Population size")
+    parser.add_argument('--generations', type=int, default=None, help=f"Number of generations (default {DEFAULT_N_GENERATIONS}, or the checkpoint's on --resume)")
+    parser.add_argument('--mutation', type=float, default=DEFAULT_MUTATION_PROBABILITY, help="Mutation probability (0-1)")
+    parser.add_argument('--mutation-operator', choices=sorted(MUTATION_OPERATORS), default='inversion', help="Mutation operator")
+    parser.add_argument('--mutation-intensity', type=int, default=1, help="Moves per mutation (segment length for scramble/displacement)")
+    parser.add_argument('--critical', type=str, default="", help="Critical city indices, e.g. \"1, 5, 12\"")
+    parser.add_argument('--penalty', type=float, default=0, help="Priority violation penalty")
+    parser.add_argument('--split', choices=SPLIT_MODES, default=DEFAULT_SPLIT, help="Trip split mode")
+    parser.add_argument('--crossover', choices=['ox', 'pmx', 'cx'], default='ox', help="Crossover operator")
+    parser.add_argument('--selection', choices=sorted(SELECTION_METHODS), default='roulette', help="Parent selection method")
+    parser.add_argument('--local-search', type=int, default=0, help="Elites improved by 2-opt/Or-opt each generation")
+    parser.add_argument('--local-search-offspring', type=float, default=0.0, help="Share of children improved by local search")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--output', type=str, default=None, help="Write the result as JSON to this file")
+    parser.add_argument('--stall', type=int, default=None, help="Stop after this many generations without a new best")
+    parser.add_argument('--min-improvement', type=float, default=None, help="Stop when the relative improvement over --improvement-window generations is below this")
+    parser.add_argument('--improvement-window', type=int, default=100, help="Window of --min-improvement, in generations")
+    parser.add_argument('--time-limit', type=float, default=None, help="Stop after this many seconds of evolution")
+    parser.add_argument('--target', type=float, default=None, help="Stop once the best fitness reaches this value")
+    parser.add_argument('--restart-stall', type=int, default=None, help="Re-seed all but the elites after this many generations without a new best")
+    parser.add_argument('--restart-keep', type=int, default=None, help="Individuals kept on a restart (default: the elites)")
+    parser.add_argument('--max-restarts', type=int, default=None, help="Maximum number of restarts")
+    parser.add_argument('--diversity', action='store_true', help="Track the population diversity (edge bond distance and entropy)")
+    parser.add_argument('--reject-duplicates', action='store_true', help="Mutate children that duplicate another individual again")
+    parser.add_argument('--adaptive', action='store_true', help="Tune the mutation probability/intensity and crossover online, starting from --mutation and --mutation-intensity")
+    parser.add_argument('--seeding', type=float, default=0.0, help="Share of the initial population built by construction heuristics (0-1)")
+    parser.add_argument('--seeding-methods', nargs='+', choices=SEEDING_METHODS, default=None, help="Heuristics for --seeding (default: all that fit the problem)")
+    parser.add_argument('--checkpoint', type=str, default=None, help="Save the GA state to this .npz file periodically and at the end")
+    parser.add_argument('--checkpoint-every', type=int, default=100, help="Generations between checkpoints")
+    parser.add_argument('--checkpoint-seconds', type=float, default=None, help="Also checkpoint after this many seconds")
+    parser.add_argument('--resume', type=str, default=None, help="Continue the run saved in this checkpoint (its settings are reused)")
+    parser.add_argument('--trace', type=str, default=None, help="Write per-generation phase timings as JSON lines to this file")
+    parser.add_argument('--profile', type=str, default=None, help="Run under cProfile and dump the stats to this file")
+    return parser
+
+
+def main(argv: List[str] = None) -> SolverResult:
+    args = build_arg_parser().parse_args(argv)
+
+    # Validate inputs, like homescreen.start_simulation
+    if (args.capacity is not None and args.capacity <= 0) or args.population <= 0 or \
+            (args.generations is not None and args.generations <= 0):
+        raise SystemExit("Values must be positive integers.")
+    if not (0 <= args.mutation <= 1):
+        raise SystemExit("Mutation probability must be between 0 and 1.")
+    if not (0 <= args.seeding <= 1):
+        raise SystemExit("Seeding fraction must be between 0 and 1.")
+
+    instrumentation = Instrumentation(jsonl_path=args.trace) if args.trace else None
+    checkpoint = dict(checkpoint_generations=args.checkpoint_every, checkpoint_seconds=args.checkpoint_seconds)
+    with profiled(args.profile) if args.profile else contextlib.nullcontext():
+        if args.resume:
+            overrides = dict(checkpoint, instrumentation=instrumentation, checkpoint_path=args.checkpoint or args.resume)
+            if args.generations is not None:
+                overrides['n_generations'] = args.generations
+            solver = HeadlessSolver.from_checkpoint(args.resume, **overrides)
+            print(f"Resuming '{args.resume}' at generation {solver.engine.generation}")
+            result = solver.run()
+        else:
+            result = solve(args.capacity, args.population, args.generations or DEFAULT_N_GENERATIONS, args.mutation,
+                           args.critical, args.penalty, split=args.split, crossover=args.crossover, seed=args.seed,
+                           selection=args.selection, local_search_elites=args.local_search,
+                           local_search_offspring=args.local_search_offspring, mutation=args.mutation_operator,
+                           mutation_intensity=args.mutation_intensity, instance=args.instance,
+                           instrumentation=instrumentation, checkpoint_path=args.checkpoint,
+                           stall_generations=args.stall, min_improvement=args.min_improvement,
+                           improvement_window=args.improvement_window, time_limit=args.time_limit, target=args.target,
+                           restart_stall=args.restart_stall, restart_keep=args.restart_keep,
+                           max_restarts=args.max_restarts, track_diversity=args.diversity,
+                           reject_duplicates=args.reject_duplicates, adaptive=args.adaptive,
+                           seeding_fraction=args.seeding, seeding_methods=args.seeding_methods, **checkpoint)
+
+    print(f"Best fitness: {round(result.best_fitness, 2)} | Trips: {len(result.trips)}")
+    if result.stop_reason or result.restarts:
+        print(f"Stopped early: {result.stop_reason or '-'} | Restarts: {result.restarts}")
+    if result.diversity:
+        print(f"Diversity: bond distance {result.diversity['bond_distance']:.3f} | "
+              f"edge entropy {result.diversity['edge_entropy']:.3f} | "
+              f"{result.diversity['unique_routes']} unique routes")
+    if result.adaptive_trajectory:
+        final = result.adaptive_trajectory[-1]
+        print(f"Adaptive: mutation {final['mutation_probability']:.3f} x{final['mutation_intensity']} | "
+              f"crossover {final['crossover']}")
+    print(f"{result.generations} generations in {result.elapsed_seconds:.2f}s "
+          f"({result.generations_per_second:.1f} gen/s, {result.evaluations_per_second:.0f} evals/s)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result.to_dict(), f, indent=2)
+        print(f"Result saved to '{args.output}'")
+    if args.checkpoint or args.resume:
+        print(f"Checkpoint saved to '{args.checkpoint or args.resume}'")
+    if instrumentation is not None:
+        instrumentation.close()
+        print(instrumentation.format_summary())
+        print(f"Trace saved to '{args.trace}'")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+
+import numpy as np
+
+from solver import HeadlessSolver, DEFAULT_N_GENERATIONS
+from instrumentation import Instrumentation
+
+
+# The HeadlessSolver in a background process (or thread), so the pygame view and the GA no
+# longer throttle each other.
+#
+# - The worker publishes snapshot dicts (generation, best route and fitness, trips, ...) at most
+#   every publish_interval seconds on a queue; the consumer only ever wants the newest one, so the
+#   worker discards an unread snapshot before putting the next and latest() drains the queue.
+# - The best fitness of every generation goes to a shared float64 buffer of n_generations
+#   entries, so the fitness plot gets the whole history without shipping it in every snapshot.
+# - pause/resume/stop are control messages, read by the worker between generations. With a
+#   checkpoint_path in the solver arguments, stop and the end of the run save a checkpoint.
+# - The solver (distance matrix, seeding, checkpoint load) is only built in the worker, which
+#   sends the problem data the view needs (cities, priorities, weights, baselines) once.
+
+MODES = ('process', 'thread')
+
+
+def _publish(snapshots, snapshot: dict) -> None:
+    """Replace any unread snapshot with this one."""
+    try:
+        snapshots.get_nowait()
+    except queue.Empty:
+        pass
+    snapshots.put(snapshot)
+
+
+def _snapshot(solver: HeadlessSolver, started: float, finished: bool, first_generation: int = 0) -> dict:
+    engine = solver.engine
+    route = engine.population[0].tolist()
+    elapsed = time.perf_counter() - started
+    return {
+        'generation': engine.generation,
+        'best_fitness': engine.best_fitness_values[-1] if engine.best_fitness_values else solver.fitness(route),
+        'best_route': route,
+        'overall_best_fitness': engine.best_fitness,
+        'trips': solver.trips(route),
+        'finished': finished,
+        'stop_reason': solver.stop_reason,
+        'restarts': engine.restarts,
+        'generations_per_second': (engine.generation - first_generation) / elapsed if elapsed > 0 else 0.0,
+        'cache': engine.cache.stats(),
+        'diversity': dict(engine.diversity_metrics),
+        'adaptive': {'mutation_probability': engine.mutation_probability, 'mutation_intensity': engine.mutation_intensity,
+                     'crossover': engine.crossover} if engine.adaptive is not None else None,
+    }
+
+
+def _problem(solver: HeadlessSolver, snapshot: dict) -> dict:
+    """The problem data the view draws, with the solver's first snapshot."""
+    return {
+        'cities_locations': [tuple(city) for city in solver.cities_locations],
+        'priorities': list(solver.priorities),
+        'weights': list(solver.weights) if solver.weights is not None else None,
+        'n_generations': solver.n_generations,
+        'target_fitness': solver.target_fitness(),
+        'random_baseline_fitness': solver.random_baseline_fitness(),
+        'snapshot': snapshot,
+    }
+
+
+def _run_worker(solver_kwargs: dict, history, snapshots, control, problems, publish_interval: float,
+                trace_path: str) -> None:
+    """Body of the worker: evolve, record the history, publish snapshots and obey control messages."""
+    try:
+        instrumentation = Instrumentation(jsonl_path=trace_path) if trace_path else None
+        solver = HeadlessSolver(**solver_kwargs, instrumentation=instrumentation)
+        engine = solver.engine
+        values = history if isinstance(history, np.ndarray) else np.frombuffer(history, dtype=np.float64)
+        # A resumed run already has a history
+        values[:engine.generation] = engine.best_fitness_values[:len(values)]
+        first_generation = engine.generation
+        started = time.perf_counter()
+        snapshot = _snapshot(solver, started, solver.finished, first_generation)
+        problems.put(_problem(solver, snapshot))
+        _publish(snapshots, snapshot)
+        last_publish = started
+        paused = False
+        while not solver.finished:
+            # Drain the control messages; while paused, wait for the next one
+            while True:
+                try:
+                    message = control.get(block=paused)
+                except queue.Empty:
+                    break
+                if message == 'stop':
+                    solver.checkpoint()
+                    return
+                paused = message == 'pause'
+                if paused:
+                    # Show exactly where it stopped
+                    _publish(snapshots, _snapshot(solver, started, False, first_generation))
+
+            best_fitness = solver.step()
+            values[engine.generation - 1] = best_fitness
+            solver.instrumentation.end_generation(engine.generation, best_fitness=engine.best_fitness)
+            now = time.perf_counter()
+            if now - last_publish >= publish_interval:
+                _publish(snapshots, _snapshot(solver, started, solver.finished, first_generation))
+                last_publish = now
+        solver.checkpoint()
+        _publish(snapshots, _snapshot(solver, started, True, first_generation))
+        solver.instrumentation.close()
+    except Exception:
+        error = {'error': traceback.format_exc()}
+        problems.put(error)
+        _publish(snapshots, error)
+
+
+class SolverWorker:
+    """
+    Runs a HeadlessSolver in the background and hands out its latest snapshot.
+
+    Parameters:
+    - solver_kwargs (dict): HeadlessSolver arguments (truck_capacity, population_size, ...).
+    - mode (str): 'process' (the GA gets its own core) or 'thread'.
+    - publish_interval (float): Minimum seconds between two snapshots.
+    - trace_path (str): Write the solver's per-generation phase timings to this JSON-lines file.
+
+    The HeadlessSolver is only built in the worker; wait_problem() returns the problem data the
+    view needs (cities, priorities, weights, baselines and the first snapshot).
+    """
+
+    def __init__(self, solver_kwargs: dict = None, mode: str = 'process', publish_interval: float = 1 / 60,
+                 trace_path: str = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+        self.solver_kwargs = dict(solver_kwargs or {})
+        self.mode = mode
+        self.publish_interval = publish_interval
+        self.trace_path = trace_path
+        self.n_generations = self.solver_kwargs.get('n_generations', DEFAULT_N_GENERATIONS)
+        self.problem = None
+
+        if mode == 'process':
+            context = multiprocessing.get_context()
+            self._buffer = context.RawArray('d', max(self.n_generations, 1))
+            self.history = np.frombuffer(self._buffer, dtype=np.float64)
+            self._snapshots = context.Queue()
+            self._control = context.Queue()
+            self._problems = context.Queue()
+        else:
+            self._buffer = self.history = np.zeros(max(self.n_generations, 1))
+            self._snapshots = queue.Queue()
+            self._control = queue.Queue()
+            self._problems = queue.Queue()
+        self._worker = None
+        self.snapshot = None
+
+    def start(self) -> 'SolverWorker':
+        arguments = (self.solver_kwargs, self._buffer, self._snapshots, self._control, self._problems,
+                     self.publish_interval, self.trace_path)
+        if self.mode == 'process':
+            self._worker = multiprocessing.Process(target=_run_worker, args=arguments, daemon=True)
+        else:
+            self._worker = threading.Thread(target=_run_worker, args=arguments, daemon=True)
+        self._worker.start()
+        return self
+
+    def latest(self) -> dict:
+        """
+        The newest snapshot published so far (None before the first one).
+
+        Raises:
+        RuntimeError: If the solver failed; the message carries its traceback.
+        """
+        while True:
+            try:
+                snapshot = self._snapshots.get_nowait()
+            except queue.Empty:
+                break
+            if 'error' in snapshot:
+                raise RuntimeError(f"Solver worker failed:\n{snapshot['error']}")
+            self.snapshot = snapshot
+        return self.snapshot
+
+    def wait_problem(self, timeout: float = None) -> dict:
+        """
+        Block until the started worker has built its solver and return the problem data.
+
+        Raises:
+        RuntimeError: If the solver failed (or timeout passed first).
+        """
+        if self.problem is None:
+            try:
+                problem = self._problems.get(timeout=timeout)
+            except queue.Empty:
+                raise RuntimeError("Solver worker did not build its solver in time")
+            if 'error' in problem:
+                raise RuntimeError(f"Solver worker failed:\n{problem['error']}")
+            self.problem = problem
+        return self.problem
+
+    def pause(self) -> None:
+        self._control.put('pause')
+
+    def resume(self) -> None:
+        self._control.put('resume')
+
+    @property
+    def finished(self) -> bool:
+        return self.snapshot is not None and self.snapshot['finished']
+
+    def best_fitness_values(self) -> np.ndarray:
+        """Best fitness per generation up to the latest snapshot (a view of the shared buffer)."""
+        return self.history[:self.snapshot['generation'] if self.snapshot else 0]
+
+    def wait(self, timeout: float = None) -> dict:
+        """Block until the solver finishes (or timeout passes) and return the latest snapshot."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not self.finished:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                snapshot = self._snapshots.get(timeout=remaining if remaining is not None else 0.1)
+            except queue.Empty:
+                if not self._worker.is_alive() and self._snapshots.empty():
+                    break
+                continue
+            if 'error' in snapshot:
+                raise RuntimeError(f"Solver worker failed:\n{snapshot['error']}")
+            self.snapshot = snapshot
+        return self.snapshot
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Ask the solver to stop and wait for it (a process that does not stop is terminated)."""
+        if self._worker is None:
+            return
+        self._control.put('stop')
+        self._worker.join(timeout)
+        if self.mode == 'process':
+            if self._worker.is_alive():
+                self._worker.terminate()
+                self._worker.join()
+            self._snapshots.cancel_join_thread()
+            self._control.cancel_join_thread()
+            self._problems.cancel_join_thread()
+        self._worker = None
+
+    def __enter__(self) -> 'SolverWorker':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
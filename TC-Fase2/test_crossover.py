@@ -1,31 +1,64 @@
-
 import random
-from genetic_algorithm import order_crossover
+import numpy as np
+from genetic_algorithm import order_crossover, CROSSOVER_OPERATORS, CROSSOVER_BATCH_OPERATORS
 
 def test_crossover():
     parent1 = list(range(10))
     parent2 = list(reversed(range(10)))
-    
+
     print(f"Parent1: {parent1}")
     print(f"Parent2: {parent2}")
-    
+
     for i in range(5):
         try:
             child = order_crossover(parent1, parent2)
             print(f"Child {i}: {child}")
-            
+
             if len(child) != 10:
                 print("FAILURE: Child length incorrect")
             if len(set(child)) != 10:
                 print("FAILURE: Duplicates found in child")
                 from collections import Counter
                 print(f"Counts: {Counter(child)}")
-                
+
         except Exception as e:
             print(f"FAILURE: Exception {e}")
 
+def test_crossover_operators():
+    n = 50
+    parent1 = random.sample(range(n), n)
+    parent2 = random.sample(range(n), n)
+
+    for name, operator in CROSSOVER_OPERATORS.items():
+        for _ in range(20):
+            child = operator(parent1, parent2)
+            assert sorted(child) == list(range(n)), f"FAILURE: {name} child is not a permutation"
+        print(f"SUCCESS: {name} children are valid permutations")
+
+def test_crossover_batch():
+    n, pairs = 40, 64
+    parents1 = np.array([random.sample(range(n), n) for _ in range(pairs)])
+    parents2 = np.array([random.sample(range(n), n) for _ in range(pairs)])
+
+    for name, operator in CROSSOVER_BATCH_OPERATORS.items():
+        # Same segments as the scalar operator draws, so the children must be identical
+        starts, ends, expected = [], [], []
+        for k in range(pairs):
+            state = random.getstate()
+            start = random.randint(0, n - 1)
+            starts.append(start)
+            ends.append(random.randint(start + 1, n))
+            random.setstate(state)
+            expected.append(CROSSOVER_OPERATORS[name](list(parents1[k]), list(parents2[k])))
+
+        children = operator(parents1, parents2, np.array(starts), np.array(ends))
+        assert (children == np.array(expected)).all(), f"FAILURE: {name} batch differs from scalar"
+        print(f"SUCCESS: {name} batch matches the scalar operator")
+
 if __name__ == "__main__":
     try:
         test_crossover()
+        test_crossover_operators()
+        test_crossover_batch()
     except Exception as e:
         print(e)
@@ -0,0 +1,65 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import numpy as np
+import pygame
+from draw_functions import FitnessPlot, CitiesLayer, draw_cities, draw_text, render_text, clear_font_caches
+
+def test_fitness_plot():
+    pygame.init()
+    screen = pygame.Surface((1500, 800))
+    rng = np.random.default_rng(0)
+    values = list(20000 - np.cumsum(rng.exponential(1, 6000)) + rng.normal(0, 50, 6000))
+    plot = FitnessPlot()
+    history = []
+    for value in values:
+        history.append(value)
+        plot.draw(screen, history)
+
+    indices, kept = plot.series()
+    # Bounded number of points, in order, keeping the extremes of the history
+    assert len(plot._buckets) <= plot.max_buckets and len(indices) <= 2 * plot.max_buckets
+    assert indices == sorted(indices) and indices[-1] == len(values) - 1
+    assert min(kept) == min(values) and max(kept) == max(values), "FAILURE: decimation lost an extreme"
+    assert all(kept[k] == values[i] for k, i in enumerate(indices))
+
+    # A shorter history is a new run
+    plot.draw(screen, values[:10])
+    assert plot.n_values == 10 and plot.bucket_size == 1
+    print(f"SUCCESS: {len(values)} generations drawn from {len(indices)} points")
+
+def test_cached_layers():
+    pygame.init()
+    rng = np.random.default_rng(1)
+    cities = [tuple(point) for point in rng.integers(20, 780, (48, 2)).tolist()]
+    colors = [tuple(color) for color in rng.integers(0, 255, (48, 3)).tolist()]
+    radii = rng.integers(5, 15, 48).tolist()
+    direct, layered = pygame.Surface((800, 800)), pygame.Surface((800, 800))
+    direct.fill((255, 255, 255))
+    layered.fill((255, 255, 255))
+    draw_cities(direct, cities, colors, radii)
+    CitiesLayer(cities, colors, radii).draw(layered)
+    assert pygame.image.tobytes(direct, 'RGB') == pygame.image.tobytes(layered, 'RGB'), "FAILURE: layer differs"
+
+    # Unchanged lines come from the text cache
+    assert render_text("Generation: 1", (0, 0, 0)) is render_text("Generation: 1", (0, 0, 0))
+    draw_text(layered, "Total Cities: 48\nGeneration: 2", (0, 0, 0))
+    assert render_text.cache_info().currsize >= 3
+    print("SUCCESS: cities layer matches direct drawing")
+
+def test_reinit():
+    pygame.init()
+    screen = pygame.Surface((400, 200))
+    draw_text(screen, "Generation: 1", (0, 0, 0))
+    # As tsp.main does on exit: a later run must not draw with Fonts of the closed pygame.font
+    clear_font_caches()
+    pygame.quit()
+    pygame.init()
+    assert render_text.cache_info().currsize == 0
+    draw_text(screen, "Generation: 1", (0, 0, 0))
+    assert render_text("Generation: 1", (0, 0, 0)).get_width() > 0
+    print("SUCCESS: text drawn after pygame.quit() and init()")
+
+if __name__ == "__main__":
+    test_fitness_plot()
+    test_cached_layers()
+    test_reinit()
@@ -0,0 +1,392 @@
+import random
+import numpy as np
+from genetic_algorithm import GeneticEngine, FitnessCache, generate_distance_matrix, calculate_fitness
+from selection import SELECTION_METHODS, select_parents
+from island_model import IslandModel
+from local_search import LocalSearch
+from benchmark_suite import held_karp, run_suite, compare
+from instrumentation import Instrumentation
+from solver import HeadlessSolver
+from solver_worker import SolverWorker
+from checkpoint import save_checkpoint, load_checkpoint
+from convergence import StoppingCriteria, RestartPolicy
+from diversity import DiversityTracker
+from adaptive import AdaptiveController
+from seeding import PopulationSeeder, Neighborhood, nearest_neighbor_tour, SEEDING_METHODS
+from tsplib import DistanceOracle, TSPLIBInstance
+import json
+import os
+import tempfile
+import itertools
+
+def make_problem(n=25, seed=21):
+    rng = random.Random(seed)
+    cities = [(rng.randint(0, 800), rng.randint(0, 400)) for _ in range(n)]
+    weights = [rng.randint(1, 10) for _ in range(n)]
+    priorities = [rng.choice(['Critical', 'Normal']) for _ in range(n)]
+    return generate_distance_matrix(cities), weights, priorities
+
+def test_engine():
+    matrix, weights, priorities = make_problem()
+    engine = GeneticEngine(matrix, 60, 0.5, weights, 30, priorities, 500, seed=1)
+    engine.run(40)
+
+    # Every row stays a permutation of the cities
+    n = len(matrix)
+    valid = all((np.sort(row) == np.arange(n)).all() for row in engine.population)
+    print(f"Population dtype: {engine.population.dtype}, valid permutations: {valid}")
+    assert valid, "FAILURE: engine produced an invalid route"
+
+    # Elitism: the best fitness never gets worse, and matches the reference evaluation
+    history = engine.best_fitness_values
+    assert all(a >= b for a, b in zip(history, history[1:])), "FAILURE: best fitness got worse"
+    reference = calculate_fitness(engine.best_route.tolist(), matrix, weights, 30, priorities, 500)
+    assert reference == engine.best_fitness, "FAILURE: best fitness does not match calculate_fitness"
+    print(f"SUCCESS: best fitness {engine.best_fitness}")
+
+    # Parents gathered in several chunks of the preallocated buffers breed the same children
+    chunked = GeneticEngine(matrix, 60, 0.5, weights, 30, priorities, 500, seed=1)
+    chunked._parents = chunked._parents[:, :7]
+    chunked.run(40)
+    assert (chunked.population == engine.population).all(), "FAILURE: chunked breeding changed the run"
+
+def test_engine_seed():
+    matrix, weights, priorities = make_problem()
+    first = GeneticEngine(matrix, 40, 0.5, weights, 30, priorities, 500, seed=5)
+    second = GeneticEngine(matrix, 40, 0.5, weights, 30, priorities, 500, seed=5)
+    first.run(20)
+    second.run(20)
+    assert (first.population == second.population).all(), "FAILURE: same seed gave different runs"
+    print("SUCCESS: same seed, same run")
+
+def test_selection_methods():
+    rng = np.random.default_rng(0)
+    fitness = np.arange(1, 101, dtype=float)  # index 0 is the best
+
+    for method in SELECTION_METHODS:
+        pairs = select_parents(fitness, 5000, method, rng)
+        assert pairs.shape == (5000, 2), f"FAILURE: {method} returned shape {pairs.shape}"
+        assert pairs.min() >= 0 and pairs.max() < len(fitness), f"FAILURE: {method} index out of range"
+        # Better individuals must be picked more often than worse ones
+        best_half = (pairs < 50).mean()
+        print(f"{method}: {best_half:.0%} of parents from the best half")
+        assert best_half > 0.5, f"FAILURE: {method} does not favor better individuals"
+
+def test_island_model():
+    matrix, weights, priorities = make_problem()
+    problem = dict(weights=weights, capacity=30, priorities=priorities, priority_penalty=500)
+    results = [IslandModel(matrix, 3, 30, [0.2, 0.5, 0.8], migration_interval=5, topology=topology, seed=3,
+                           processes=processes, **problem).run(12)
+               for topology in ('ring', 'random') for processes in (False, True)]
+
+    for result in results:
+        assert len(result.islands) == 3 and result.migrations == 2, "FAILURE: wrong island bookkeeping"
+        assert calculate_fitness(result.best_route, matrix, **problem) == result.best_fitness, \
+            "FAILURE: global best does not match calculate_fitness"
+        assert result.best_fitness == min(stats.best_fitness for stats in result.islands)
+    # Worker processes reproduce the in-process run exactly
+    assert results[0].best_fitness_values == results[1].best_fitness_values, "FAILURE: ring runs differ"
+    assert results[2].best_fitness_values == results[3].best_fitness_values, "FAILURE: random runs differ"
+    print(f"SUCCESS: island model best {results[0].best_fitness}")
+
+def test_local_search():
+    matrix, weights, priorities = make_problem(40)
+    rng = random.Random(4)
+    for problem in [{}, dict(weights=weights, capacity=30, priorities=priorities, priority_penalty=500)]:
+        search = LocalSearch(matrix, **problem)
+        for _ in range(5):
+            route = rng.sample(range(40), 40)
+            improved, fitness = search.improve(route)
+            assert sorted(improved) == list(range(40)), "FAILURE: local search broke the permutation"
+            assert fitness == calculate_fitness(improved, matrix, **problem), "FAILURE: wrong local search fitness"
+            assert fitness <= calculate_fitness(route, matrix, **problem), "FAILURE: local search made it worse"
+
+    # Memetic engine: far better than the plain GA after the same generations
+    plain = GeneticEngine(matrix, 40, 0.5, seed=2)
+    memetic = GeneticEngine(matrix, 40, 0.5, seed=2, local_search=LocalSearch(matrix), local_search_offspring=0.1)
+    plain.run(30)
+    memetic.run(30)
+    assert memetic.best_fitness == calculate_fitness(memetic.best_route.tolist(), matrix)
+    assert memetic.best_fitness < plain.best_fitness, "FAILURE: local search did not help"
+    print(f"SUCCESS: memetic {memetic.best_fitness:.1f} vs plain {plain.best_fitness:.1f}")
+
+def test_benchmark_suite():
+    matrix, _, _ = make_problem(8)
+    brute_force = min(calculate_fitness([0] + list(rest), matrix) for rest in itertools.permutations(range(1, 8)))
+    assert abs(held_karp(matrix) - brute_force) < 1e-9, "FAILURE: Held-Karp is not optimal"
+
+    report = run_suite(['default5', 'default10'], population_size=30, generations_scale=0.25, progress=None)
+    assert [r['instance'] for r in report['results']] == ['default5', 'default10']
+    assert all(r['gap_percent'] >= -1e-9 for r in report['results']), "FAILURE: better than the optimum"
+    # Throughput counts the routes actually scored, not cache hits or carried-over elites
+    assert all(0 < r['evaluations'] <= (r['generations'] + 1) * 30 - r['generations'] for r in report['results'])
+    assert compare(report, report) == [], "FAILURE: a run regressed against itself"
+
+    # A slower and worse baseline copy must be flagged
+    slower = {'results': [dict(r, generations_per_second=r['generations_per_second'] * 2,
+                               gap_percent=r['gap_percent'] - 5) for r in report['results']]}
+    assert len(compare(report, slower)) == 4, "FAILURE: regressions not flagged"
+    print("SUCCESS: benchmark suite and regression check")
+
+def test_instrumentation():
+    matrix, weights, priorities = make_problem()
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trace.jsonl')
+        with Instrumentation(callback=records.append, jsonl_path=path) as instrumentation:
+            engine = GeneticEngine(matrix, 40, 0.5, weights, 30, priorities, 500, seed=5,
+                                   instrumentation=instrumentation)
+            engine.run(15)
+        with open(path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+    assert len(records) == len(lines) == 15, "FAILURE: one record per generation expected"
+    assert lines[-1]['generation'] == 15 and lines[-1]['best_fitness'] == engine.best_fitness
+    for name in ['fitness', 'sort', 'selection', 'crossover', 'mutation']:
+        assert name in records[0]['phases'], f"FAILURE: phase {name} not timed"
+    assert records[0]['counters']['evaluations'] == 40, "FAILURE: first generation scores every route"
+    print(instrumentation.format_summary())
+
+    # Instrumentation does not change the run
+    plain = GeneticEngine(matrix, 40, 0.5, weights, 30, priorities, 500, seed=5)
+    plain.run(15)
+    assert (plain.population == engine.population).all(), "FAILURE: instrumented run differs"
+    print("SUCCESS: per-generation phase records")
+
+def test_solver_worker():
+    options = dict(population_size=30, n_generations=60, seed=4)
+    expected = HeadlessSolver(**options).run()
+    evaluations = expected.evaluations_per_second * expected.elapsed_seconds
+    assert 0 < evaluations < 61 * 30 - 60 + 1e-6, "FAILURE: evals/s counts more than the scored routes"
+    for mode in ['thread', 'process']:
+        worker = SolverWorker(options, mode=mode)
+        assert not hasattr(worker, 'solver'), "FAILURE: the solver was built outside the worker"
+        with worker:
+            problem = worker.wait_problem(timeout=60)
+            snapshot = worker.wait(timeout=60)
+        assert len(problem['cities_locations']) == 48 and problem['snapshot']['generation'] == 0
+        assert snapshot['finished'] and snapshot['generation'] == 60, f"FAILURE: {mode} worker did not finish"
+        assert snapshot['overall_best_fitness'] == expected.best_fitness, f"FAILURE: {mode} worker diverged"
+        assert worker.best_fitness_values().tolist() == expected.best_fitness_values
+        print(f"SUCCESS: {mode} worker, {snapshot['generations_per_second']:.0f} gen/s")
+
+    # Paused workers hold still until resumed
+    worker = SolverWorker(dict(options, n_generations=100_000), mode='thread').start()
+    worker.pause()
+    worker.wait(timeout=0.2)
+    held = worker.latest()['generation']
+    worker.wait(timeout=0.2)
+    assert worker.latest()['generation'] == held, "FAILURE: paused worker kept evolving"
+    worker.resume()
+    worker.wait(timeout=0.3)
+    assert worker.latest()['generation'] > held, "FAILURE: resumed worker did not evolve"
+    worker.stop()
+    print("SUCCESS: pause and resume")
+
+def test_checkpoint_resume():
+    matrix, weights, priorities = make_problem()
+    options = dict(mutation_probability=0.5, weights=weights, capacity=30, priorities=priorities, priority_penalty=500,
+                   seed=9, local_search_elites=1, local_search_offspring=0.02, mutation='scramble', mutation_intensity=2)
+    reference = GeneticEngine(matrix, 40, local_search=LocalSearch(matrix, weights, 30, priorities, 500), **options)
+    reference.run(40)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'run.npz')
+        first = GeneticEngine(matrix, 40, local_search=LocalSearch(matrix, weights, 30, priorities, 500), **options)
+        first.run(25)
+        save_checkpoint(path, first.state_dict())
+        assert os.listdir(directory) == ['run.npz'], "FAILURE: temporary file left behind"
+        resumed = GeneticEngine(matrix, 40, local_search=LocalSearch(matrix, weights, 30, priorities, 500),
+                                **dict(options, seed=123))
+        resumed.load_state(load_checkpoint(path))
+        resumed.run(15)
+    assert (resumed.population == reference.population).all(), "FAILURE: resumed run diverged"
+    assert resumed.best_fitness_values == reference.best_fitness_values and resumed.generation == 40
+    print("SUCCESS: checkpointed run continues bit-for-bit")
+
+    # Solver level: periodic checkpoints, resume from the stored arguments, mismatches refused
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'solver.npz')
+        HeadlessSolver(population_size=30, n_generations=30, seed=2, checkpoint_path=path,
+                       checkpoint_generations=10).run()
+        resumed = HeadlessSolver.from_checkpoint(path, n_generations=50)
+        assert resumed.engine.generation == 30
+        result = resumed.run()
+        expected = HeadlessSolver(population_size=30, n_generations=50, seed=2).run()
+        assert result.best_fitness_values == expected.best_fitness_values, "FAILURE: solver resume diverged"
+        try:
+            HeadlessSolver(truck_capacity=60, population_size=30, checkpoint_path=path, resume=True)
+            assert False, "FAILURE: resumed a checkpoint of another problem"
+        except ValueError as e:
+            print(f"SUCCESS: {e}")
+
+        # A parsed (in-memory) instance is stored in the checkpoint, not replaced by att48
+        coordinates = np.random.default_rng(3).uniform(0, 1000, (15, 2))
+        instance = TSPLIBInstance('random15', dimension=15, coordinates=coordinates,
+                                  demands=np.arange(15) % 5, depots=[0], node_ids=np.arange(1, 16))
+        HeadlessSolver(population_size=30, n_generations=20, seed=2, instance=instance, checkpoint_path=path).run()
+        resumed = HeadlessSolver.from_checkpoint(path, n_generations=30)
+        assert resumed.instance.name == 'random15' and (resumed.instance.coordinates == coordinates).all()
+        expected = HeadlessSolver(population_size=30, n_generations=30, seed=2, instance=instance).run()
+        assert resumed.run().best_fitness_values == expected.best_fitness_values, "FAILURE: instance resume diverged"
+
+def test_stopping_and_restarts():
+    matrix, weights, priorities = make_problem(12)
+    engine = GeneticEngine(matrix, 30, 0.5, seed=3)
+    engine.run(5000, stopping=StoppingCriteria(stall_generations=50))
+    assert engine.stop_reason == 'stall' and engine.generation - engine.last_improvement == 50
+    print(f"SUCCESS: stalled after {engine.generation} generations")
+
+    target = engine.best_fitness * 1.2
+    engine = GeneticEngine(matrix, 30, 0.5, seed=3)
+    engine.run(5000, stopping=StoppingCriteria(target=target))
+    assert engine.stop_reason == 'target' and engine.best_fitness <= target
+
+    engine = GeneticEngine(matrix, 30, 0.5, seed=3)
+    engine.run(5000, stopping=StoppingCriteria(min_improvement=0.01, improvement_window=40))
+    assert engine.stop_reason == 'min_improvement' and engine.generation < 5000
+
+    # Restarts re-seed the population around the elites; the best never gets worse
+    engine = GeneticEngine(matrix, 30, 0.5, seed=3, restart=RestartPolicy(stall_generations=20, max_restarts=3))
+    engine.run(300)
+    history = engine.best_fitness_values
+    assert engine.restarts == 3 and all(a >= b for a, b in zip(history, history[1:]))
+
+    solver = HeadlessSolver(population_size=30, n_generations=5000, seed=1, stall_generations=40, restart_stall=15)
+    result = solver.run()
+    assert result.stop_reason == 'stall' and result.restarts > 0 and result.generations < 5000
+    print(f"SUCCESS: solver stopped after {result.generations} generations and {result.restarts} restarts")
+
+def test_diversity():
+    n = 12
+    rng = np.random.default_rng(0)
+    tracker = DiversityTracker(n)
+
+    def brute_force(population):
+        edges = [{frozenset((row[i], row[(i + 1) % n])) for i in range(n)} for row in population.tolist()]
+        pairs = list(itertools.combinations(edges, 2))
+        return sum(1 - len(a & b) / n for a, b in pairs) / len(pairs)
+
+    population = np.array([rng.permutation(n) for _ in range(20)])
+    for _ in range(5):
+        # Replace a few individuals (some by clones of others) and compare with a fresh tracker
+        population[rng.integers(0, 20, 4)] = rng.permutation(n)
+        population[rng.integers(0, 20, 2)] = population[0]
+        metrics = tracker.update(population)
+        assert abs(metrics['bond_distance'] - brute_force(population)) < 1e-9
+        fresh = DiversityTracker(n)
+        expected = fresh.update(population)
+        assert np.array_equal(tracker.edge_counts, fresh.edge_counts)
+        assert all(abs(metrics[key] - expected[key]) < 1e-9 for key in expected)
+
+    clones = np.tile(rng.permutation(n), (10, 1))
+    metrics = DiversityTracker(n).update(clones)
+    assert metrics['bond_distance'] == 0 and metrics['edge_entropy'] == 0 and metrics['unique_routes'] == 1
+
+    # Duplicate children are mutated away before they are evaluated
+    matrix, weights, priorities = make_problem(n)
+    instrumentation = Instrumentation()
+    engine = GeneticEngine(matrix, 40, 0.2, seed=2, elite_size=2, track_diversity=True, reject_duplicates=True,
+                           instrumentation=instrumentation)
+    for _ in range(60):
+        engine.step()
+        instrumentation.end_generation(engine.generation)
+        assert len(np.unique(FitnessCache.route_keys(engine.population), axis=0)) == len(engine.population)
+    summary = instrumentation.summary()
+    assert summary['counters']['duplicates'] > 0 and 'bond_distance' in summary['gauges']
+    assert engine.diversity_metrics['unique_routes'] == 40
+    print(f"SUCCESS: {summary['counters']['duplicates']} duplicates rejected, diversity {engine.diversity_metrics}")
+
+def test_adaptive():
+    matrix, weights, priorities = make_problem(30)
+    # From a poor start (every child mutated with 4 inversions) the controller backs off
+    engine = GeneticEngine(matrix, 60, 0.9, seed=1, mutation_intensity=4, selection='tournament',
+                           adaptive=AdaptiveController())
+    engine.run(150)
+    trajectory = engine.adaptive.trajectory_dicts()
+    assert len(trajectory) == 150 and trajectory[-1]['generation'] == 149
+    assert engine.mutation_intensity < 4 and 0.05 <= engine.mutation_probability <= 0.9
+    assert {row['crossover'] for row in trajectory} <= {'ox', 'pmx'}
+    print(f"SUCCESS: adapted to mutation {engine.mutation_probability:.2f} x{engine.mutation_intensity}")
+
+    # Duplicates changed after mutation are reported to the controller as mutated children
+    engine = GeneticEngine(matrix, 40, 0.1, seed=2, elite_size=2, reject_duplicates=True, adaptive=AdaptiveController())
+    remove_duplicates, changed = engine.remove_duplicates, []
+    engine.remove_duplicates = lambda *args: changed.append(remove_duplicates(*args)) or changed[-1]
+    for _ in range(30):
+        engine.step()
+        assert engine._mutated[changed[-1]].all(), "FAILURE: re-mutated duplicates not marked"
+    assert sum(map(len, changed)) > 0
+
+    # The controller state is part of the checkpoint: a resumed run continues bit-for-bit
+    def build():
+        return GeneticEngine(matrix, 40, 0.5, weights, 60, priorities, 100, seed=4, adaptive=AdaptiveController())
+    straight = build()
+    straight.run(60)
+    first = build()
+    first.run(30)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'adaptive.npz')
+        save_checkpoint(path, first.state_dict())
+        resumed = build()
+        resumed.load_state(load_checkpoint(path))
+    resumed.run(30)
+    assert np.array_equal(straight.population, resumed.population)
+    assert straight.best_fitness_values == resumed.best_fitness_values
+    assert straight.adaptive.trajectory == resumed.adaptive.trajectory
+
+    solver = HeadlessSolver(population_size=30, n_generations=40, seed=2, adaptive=True)
+    result = solver.run()
+    assert len(result.adaptive_trajectory) == 40 and result.diversity
+
+def test_seeding():
+    rng = random.Random(5)
+    cities = [(rng.randint(0, 800), rng.randint(0, 400)) for _ in range(40)]
+    matrix = generate_distance_matrix(cities)
+    weights = [rng.randint(1, 10) for _ in range(40)]
+    problem = dict(weights=weights, capacity=30)
+    random_engine = GeneticEngine(matrix, 40, seed=3, **problem)
+    seeder = PopulationSeeder(0.5, SEEDING_METHODS, cities)
+    engine = GeneticEngine(matrix, 40, seed=3, seeding=seeder, **problem)
+    assert engine.seeded == 20
+    n = len(matrix)
+    assert all((np.sort(row) == np.arange(n)).all() for row in engine.population)
+    seeded, rest = np.sort(engine.evaluate()[:20]), random_engine.evaluate()
+    # Every heuristic beats the best random route; the unseeded rows are unchanged
+    assert seeded[-1] < rest.min(), "FAILURE: a seeded route is worse than a random one"
+    assert np.array_equal(engine.population[20:], random_engine.population[20:])
+    print(f"SUCCESS: seeded best {seeded[0]:.0f} vs random best {rest.min():.0f}")
+
+    # Above the dense limit the neighbour search runs on a spatial grid over the coordinates
+    coordinates = np.random.default_rng(8).uniform(0, 10_000, (3000, 2))
+    oracle = DistanceOracle(coordinates)
+    neighborhood = Neighborhood(oracle, coordinates)
+    assert neighborhood.spatial
+    tour = nearest_neighbor_tour(neighborhood, 0, np.random.default_rng(1), noise=0.1)
+    assert (np.sort(tour) == np.arange(3000)).all()
+    length = float(np.sum(oracle[tour, np.roll(tour, -1)]))
+    random_length = float(np.sum(oracle[np.arange(3000), np.random.default_rng(2).permutation(3000)]))
+    assert length < random_length / 10
+    try:
+        PopulationSeeder(0.2, ['sweep'])
+        assert False, "FAILURE: sweep without coordinates was accepted"
+    except ValueError:
+        pass
+
+    result = HeadlessSolver(population_size=30, n_generations=5, seed=2, seeding_fraction=0.2).run()
+    unseeded = HeadlessSolver(population_size=30, n_generations=5, seed=2).run()
+    assert result.best_fitness < unseeded.best_fitness
+
+if __name__ == "__main__":
+    test_engine()
+    test_engine_seed()
+    test_selection_methods()
+    test_island_model()
+    test_local_search()
+    test_benchmark_suite()
+    test_instrumentation()
+    test_solver_worker()
+    test_checkpoint_resume()
+    test_stopping_and_restarts()
+    test_diversity()
+    test_adaptive()
+    test_seeding()
@@ -0,0 +1,151 @@
+import random
+import numpy as np
+from genetic_algorithm import calculate_fitness, calculate_population_fitness, calculate_fitness_delta, generate_distance_matrix, generate_random_population, split_giant_tour, FitnessTrace, FitnessCache
+from parallel_fitness import ParallelFitnessEvaluator
+from mutation import MUTATION_OPERATORS
+
+def test_population_fitness_tsp():
+    random.seed(42)
+    cities = [(random.randint(0, 800), random.randint(0, 400)) for _ in range(30)]
+    matrix = generate_distance_matrix(cities)
+    population = generate_random_population(len(cities), 200)
+
+    batch = calculate_population_fitness(population, matrix)
+    reference = [calculate_fitness(path, matrix) for path in population]
+
+    mismatches = sum(1 for b, r in zip(batch, reference) if b != r)
+    print(f"TSP batch vs reference: {len(population)} paths, {mismatches} mismatches")
+    assert mismatches == 0, "FAILURE: batch fitness differs from calculate_fitness"
+
+def test_population_fitness_cvrp():
+    random.seed(7)
+    n = 40
+    cities = [(random.randint(0, 800), random.randint(0, 400)) for _ in range(n)]
+    matrix = generate_distance_matrix(cities)
+    weights = [random.randint(1, 10) for _ in range(n)]
+    priorities = [random.choice(['Critical', 'Normal']) for _ in range(n)]
+    population = generate_random_population(n, 200)
+
+    for split in ['greedy', 'optimal']:
+        for capacity, penalty in [(30, 0), (30, 5000.0), (1000, 250.5), (5, 5000)]:
+            batch = calculate_population_fitness(population, matrix, weights, capacity, priorities, penalty, split)
+            reference = [calculate_fitness(path, matrix, weights, capacity, priorities, penalty, split) for path in population]
+
+            mismatches = sum(1 for b, r in zip(batch, reference) if b != r)
+            print(f"CVRP {split} batch vs reference (capacity={capacity}, penalty={penalty}): {mismatches} mismatches")
+            assert mismatches == 0, "FAILURE: batch CVRP fitness differs from calculate_fitness"
+
+def test_optimal_split():
+    random.seed(3)
+    n = 25
+    cities = [(random.randint(0, 800), random.randint(0, 400)) for _ in range(n)]
+    matrix = generate_distance_matrix(cities)
+    weights = [random.randint(1, 10) for _ in range(n)]
+    capacity = 25
+
+    for path in generate_random_population(n, 50):
+        greedy_cost, greedy_trips = split_giant_tour(path, matrix, weights, capacity, 'greedy')
+        optimal_cost, optimal_trips = split_giant_tour(path, matrix, weights, capacity, 'optimal')
+
+        # Same cities, same order, every trip within capacity, and never worse than greedy
+        assert [c for trip in optimal_trips for c in trip[1:]] == [c for trip in greedy_trips for c in trip[1:]]
+        assert all(sum(weights[c] for c in trip[1:]) <= capacity for trip in optimal_trips)
+        assert optimal_cost <= greedy_cost + 1e-9, "FAILURE: optimal split worse than greedy"
+
+        trips_cost = sum(matrix[0][trip[1]] + sum(matrix[a][b] for a, b in zip(trip[1:], trip[2:])) + matrix[trip[-1]][0]
+                         for trip in optimal_trips)
+        assert abs(trips_cost - optimal_cost) < 1e-6, "FAILURE: optimal trips do not add up to the reported cost"
+    print("SUCCESS: optimal split is feasible and never worse than greedy")
+
+def test_fitness_trace():
+    random.seed(11)
+    rng = np.random.default_rng(11)
+    n = 30
+    cities = [(random.randint(0, 800), random.randint(0, 400)) for _ in range(n)]
+    matrix = generate_distance_matrix(cities)
+    weights = [random.randint(1, 10) for _ in range(n)]
+    priorities = [random.choice(['Critical', 'Normal']) for _ in range(n)]
+
+    for parent in generate_random_population(n, 30):
+        for split in ['greedy', 'optimal']:
+            problem = (weights, 25, priorities, 5000.0, split)
+            trace = FitnessTrace(parent, matrix, *problem)
+            for name, operator in MUTATION_OPERATORS.items():
+                for intensity in [1, 3]:
+                    child = np.array(parent)
+                    move, _ = operator(child, rng, intensity)
+
+                    # Resumed from the first trip the move touches, exactly equal to a full evaluation
+                    fitness = calculate_fitness_delta(parent, child.tolist(), move, trace.fitness, matrix, *problem,
+                                                      trace=trace)
+                    assert fitness == calculate_fitness(child.tolist(), matrix, *problem), \
+                        f"FAILURE: resumed fitness differs after {name}"
+
+        # TSP mode adds the operator's tour length delta
+        parent_fitness = calculate_fitness(parent, matrix)
+        for name, operator in MUTATION_OPERATORS.items():
+            child = np.array(parent)
+            move, delta = operator(child, rng, 2, matrix)
+            fitness = calculate_fitness_delta(parent, child.tolist(), move, parent_fitness, matrix, delta=delta)
+            assert abs(fitness - calculate_fitness(child.tolist(), matrix)) < 1e-6, f"FAILURE: TSP delta of {name}"
+    print("SUCCESS: delta evaluation matches full evaluation for every mutation")
+
+def test_fitness_cache():
+    random.seed(13)
+    n = 20
+    cities = [(random.randint(0, 800), random.randint(0, 400)) for _ in range(n)]
+    matrix = generate_distance_matrix(cities)
+    weights = [random.randint(1, 10) for _ in range(n)]
+    priorities = [random.choice(['Critical', 'Normal']) for _ in range(n)]
+    population = generate_random_population(n, 50)
+    population += population[:10]  # duplicates
+
+    cache = FitnessCache(max_size=40)
+    for capacity in [25, 25, 30]:
+        cached = calculate_population_fitness(population, matrix, weights, capacity, priorities, 500, cache=cache)
+        plain = calculate_population_fitness(population, matrix, weights, capacity, priorities, 500)
+        assert (cached == plain).all(), "FAILURE: cached fitness differs"
+        assert len(cache) <= 40, "FAILURE: cache grew past max_size"
+    print(f"Cache stats: {cache.stats()}")
+    assert cache.hits > 0, "FAILURE: cache never hit"
+
+    # A new matrix of the same shape (possibly at the freed one's address) is never served stale values
+    for scale in [1.0, 2.0, 3.0]:
+        scaled = generate_distance_matrix([(x * scale, y * scale) for x, y in cities])
+        cached = calculate_population_fitness(population, scaled, cache=cache)
+        assert (cached == calculate_population_fitness(population, scaled)).all(), "FAILURE: stale fitness for a new matrix"
+        del scaled
+
+    # Keys are two 64-bit digests of constant size; a match on the first one alone is a miss
+    keys = FitnessCache.route_keys(population)
+    assert keys.shape == (len(population), 2) and len(np.unique(keys[:50], axis=0)) == 50
+    first, second = FitnessCache.route_key(population[0])
+    cache.put((first, second ^ 1), -1.0)
+    assert cache.get((first, second)) is None, "FAILURE: a first-digest collision was served"
+
+def test_parallel_fitness():
+    random.seed(11)
+    n = 40
+    cities = [(random.randint(0, 800), random.randint(0, 400)) for _ in range(n)]
+    matrix = generate_distance_matrix(cities)
+    weights = [random.randint(1, 10) for _ in range(n)]
+    priorities = [random.choice(['Critical', 'Normal']) for _ in range(n)]
+    population = generate_random_population(n, 150)
+
+    for problem in [{}, dict(weights=weights, capacity=30, priorities=priorities, priority_penalty=500.0)]:
+        expected = calculate_population_fitness(population, matrix, **problem)
+        with ParallelFitnessEvaluator(matrix, n_workers=3, min_parallel_rows=0, **problem) as evaluator:
+            first = evaluator.evaluate(population)
+            # A larger population replaces the shared buffers the workers attached to
+            second = evaluator.evaluate(population + population)
+        assert (first == expected).all(), "FAILURE: pool fitness differs from calculate_population_fitness"
+        assert (second == list(expected) * 2).all(), "FAILURE: pool fitness wrong after buffer growth"
+    print("SUCCESS: process pool matches the in-process evaluation")
+
+if __name__ == "__main__":
+    test_population_fitness_tsp()
+    test_population_fitness_cvrp()
+    test_optimal_split()
+    test_fitness_trace()
+    test_fitness_cache()
+    test_parallel_fitness()
@@ -0,0 +1,57 @@
+import random
+import numpy as np
+from genetic_algorithm import generate_distance_matrix, calculate_fitness
+from mutation import MUTATION_OPERATORS, mutate_population
+
+def test_mutation_deltas():
+    rng = np.random.default_rng(3)
+    random.seed(3)
+    for n in [3, 5, 12, 40]:
+        cities = [(random.randint(0, 800), random.randint(0, 400)) for _ in range(n)]
+        matrix = generate_distance_matrix(cities)
+        for name, operator in MUTATION_OPERATORS.items():
+            for intensity in [1, 2, 4]:
+                for _ in range(50):
+                    route = rng.permutation(n)
+                    parent = route.copy()
+                    before = calculate_fitness(route.tolist(), matrix)
+                    move, delta = operator(route, rng, intensity, matrix)
+                    assert sorted(route) == list(range(n)), f"FAILURE: {name} broke the permutation"
+                    after = calculate_fitness(route.tolist(), matrix)
+                    assert abs(after - before - delta) < 1e-6, f"FAILURE: {name} delta {delta} != {after - before}"
+                    # The reported move covers every changed position
+                    changed = np.nonzero(route != parent)[0]
+                    assert len(changed) == 0 or move[0] <= changed[0] and changed[-1] <= move[1], \
+                        f"FAILURE: {name} move {move} misses positions {changed}"
+        print(f"SUCCESS: exact deltas for {n} cities")
+
+def test_displacement_moves():
+    rng = np.random.default_rng(7)
+    for n in [4, 6, 20]:
+        for intensity in [1, 3]:
+            for _ in range(300):
+                route = rng.permutation(n)
+                parent = route.tolist()
+                MUTATION_OPERATORS['displacement'](route, rng, intensity)
+                # Never the same cyclic tour (a rotation of the parent)
+                rotations = [parent[k:] + parent[:k] for k in range(n)]
+                assert route.tolist() not in rotations, f"FAILURE: displacement left {parent} unchanged"
+    print("SUCCESS: every displacement moves its segment")
+
+def test_mutate_population():
+    rng = np.random.default_rng(5)
+    population = np.tile(np.arange(30, dtype=np.int16), (200, 1))
+    for name in MUTATION_OPERATORS:
+        rows = population.copy()
+        mutated, _ = mutate_population(rows, 0.5, name, 3, rng)
+        changed = np.nonzero((rows != population).any(axis=1))[0]
+        # Rows are edited in place, and only the reported ones
+        assert set(changed) <= set(mutated), f"FAILURE: {name} changed rows it did not report"
+        assert len(changed) > 0, f"FAILURE: {name} changed nothing"
+        assert (np.sort(rows, axis=1) == np.arange(30)).all(), f"FAILURE: {name} broke a permutation"
+    print("SUCCESS: population mutated in place")
+
+if __name__ == "__main__":
+    test_mutation_deltas()
+    test_displacement_moves()
+    test_mutate_population()
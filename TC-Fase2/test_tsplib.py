@@ -0,0 +1,85 @@
+import io
+import numpy as np
+from benchmark_att48 import att_48_cities_locations, att_48_cities_order
+from genetic_algorithm import calculate_fitness, calculate_population_fitness
+from tsplib import parse_tsplib, tsplib_distance, tour_length, DistanceOracle
+
+ATT48 = "NAME : att48\nTYPE : TSP\nDIMENSION : 48\nEDGE_WEIGHT_TYPE : ATT\nNODE_COORD_SECTION\n" + \
+        "".join(f"{i + 1} {x} {y}\n" for i, (x, y) in enumerate(att_48_cities_locations)) + "EOF\n"
+
+CVRP = """NAME : tiny-n6
+COMMENT : depot is node 3
+TYPE : CVRP
+DIMENSION : 6
+EDGE_WEIGHT_TYPE : EUC_2D
+CAPACITY : 10
+NODE_COORD_SECTION
+1 0 0
+2 3 4
+3 10 10
+4 6 8
+5 1.4 1.4
+6 20 0
+DEMAND_SECTION
+1 4
+2 3
+3 0
+4 5
+5 2
+6 7
+DEPOT_SECTION
+3
+-1
+EOF
+"""
+
+def test_att48_optimum():
+    instance = parse_tsplib(io.StringIO(ATT48))
+    matrix = instance.distance_matrix()
+    tour = [i - 1 for i in att_48_cities_order[:-1]]
+    length = tour_length(tour, matrix)
+    print(f"att48 optimal tour under ATT: {length}")
+    assert length == 10628, "FAILURE: ATT metric does not give the published att48 optimum"
+
+def test_metrics():
+    a, b = np.array([0.0, 0.0]), np.array([3.0, 4.1])
+    assert tsplib_distance(a, b, 'EUC_2D') == 5
+    assert tsplib_distance(a, b, 'CEIL_2D') == 6
+    # burma14 nodes 1 and 2, GEO distance 153 in the TSPLIB matrix
+    assert tsplib_distance([16.47, 96.10], [16.47, 94.44], 'GEO') == 153
+    print("SUCCESS: EUC_2D, CEIL_2D and GEO distances")
+
+def test_cvrp_sections():
+    instance = parse_tsplib(io.StringIO(CVRP))
+    assert instance.type == 'CVRP' and instance.capacity == 10 and instance.depot == 2
+    assert instance.demands.tolist() == [4, 3, 0, 5, 2, 7]
+    moved = instance.depot_first()
+    # The depot becomes city 0, the node it replaced takes its old index
+    assert moved.depot == 0 and moved.node_ids.tolist() == [3, 2, 1, 4, 5, 6]
+    assert moved.weights == [0, 3, 4, 5, 2, 7]
+    assert moved.distance_matrix()[0, 1] == 9  # nodes 3 -> 2: sqrt(49 + 36) = 9.2
+    print("SUCCESS: demand and depot sections")
+
+def test_distance_oracle():
+    instance = parse_tsplib(io.StringIO(ATT48))
+    matrix = instance.distance_matrix()
+    oracle = DistanceOracle(instance.coordinates, 'ATT', cache_rows=4)
+    rng = np.random.default_rng(0)
+    rows, columns = rng.integers(0, 48, (2, 10, 7))
+    assert (oracle[rows, columns] == matrix[rows, columns]).all()
+    assert oracle[5][9] == matrix[5][9] and (np.asarray(oracle[5]) == matrix[5]).all()
+
+    # The fitness code accepts the oracle in place of the matrix
+    population = rng.permuted(np.tile(np.arange(48), (20, 1)), axis=1)
+    weights = list(range(1, 49))
+    for problem in [{}, dict(weights=weights, capacity=100, split='greedy'), dict(weights=weights, capacity=100)]:
+        expected = calculate_population_fitness(population, matrix, **problem)
+        assert (calculate_population_fitness(population, oracle, **problem) == expected).all()
+        assert calculate_fitness(population[0].tolist(), oracle, **problem) == expected[0]
+    print(f"SUCCESS: oracle matches the dense matrix, row cache {oracle.stats()}")
+
+if __name__ == "__main__":
+    test_att48_optimum()
+    test_metrics()
+    test_cvrp_sections()
+    test_distance_oracle()
@@ -0,0 +1,344 @@
+import gzip
+import math
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+
+# TSPLIB / CVRPLIB instances: a streaming parser for the coordinate, demand and depot sections,
+# the TSPLIB distance functions, and a DistanceOracle that computes distances on demand for
+# instances whose n x n matrix does not fit in memory.
+
+METRICS = ('EUC_2D', 'CEIL_2D', 'ATT', 'GEO')
+
+# generate_distance_matrix-style dense matrices are used up to this many cities
+# (5000^2 float64 = 200 MB); beyond it, distances() returns a DistanceOracle.
+DENSE_MATRIX_LIMIT = 5000
+
+GEO_PI = 3.141592
+GEO_EARTH_RADIUS = 6378.388
+
+
+def _nint(x: np.ndarray) -> np.ndarray:
+    """TSPLIB nint: (int)(x + 0.5)."""
+    return np.floor(x + 0.5)
+
+
+def _geo_radians(coordinates: np.ndarray) -> np.ndarray:
+    """DDD.MM coordinates to radians, as in the TSPLIB GEO definition."""
+    degrees = np.trunc(coordinates)
+    minutes = coordinates - degrees
+    return GEO_PI * (degrees + 5.0 * minutes / 3.0) / 180.0
+
+
+def tsplib_distance(a: np.ndarray, b: np.ndarray, metric: str = 'EUC_2D') -> np.ndarray:
+    """
+    TSPLIB distance between coordinates a and b (arrays of (..., 2) points, broadcast together).
+
+    Parameters:
+    - a, b (np.ndarray): Points as (x, y), or (latitude, longitude) in DDD.MM for GEO.
+    - metric (str): One of METRICS.
+
+    Returns:
+    np.ndarray: The integer-valued distances, as float64.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    if metric == 'GEO':
+        ra, rb = _geo_radians(a), _geo_radians(b)
+        q1 = np.cos(ra[..., 1] - rb[..., 1])
+        q2 = np.cos(ra[..., 0] - rb[..., 0])
+        q3 = np.cos(ra[..., 0] + rb[..., 0])
+        cosine = np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)
+        distance = np.trunc(GEO_EARTH_RADIUS * np.arccos(cosine) + 1.0)
+        # A point's distance to itself is 0, not the +1 of the rounding rule
+        return np.where((a == b).all(axis=-1), 0.0, distance)
+
+    dx = a[..., 0] - b[..., 0]
+    dy = a[..., 1] - b[..., 1]
+    if metric == 'EUC_2D':
+        return _nint(np.sqrt(dx * dx + dy * dy))
+    if metric == 'CEIL_2D':
+        return np.ceil(np.sqrt(dx * dx + dy * dy))
+    if metric == 'ATT':
+        r = np.sqrt((dx * dx + dy * dy) / 10.0)
+        t = _nint(r)
+        return np.where(t < r, t + 1, t)
+    raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE '{metric}', expected one of {METRICS}")
+
+
+def tsplib_distance_matrix(coordinates, metric: str = 'EUC_2D', dtype=np.float64, chunk_rows: int = 512) -> np.ndarray:
+    """Dense (n, n) matrix of tsplib_distance, built a block of rows at a time."""
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    n = len(coordinates)
+    matrix = np.empty((n, n), dtype=dtype)
+    for start in range(0, n, chunk_rows):
+        stop = min(n, start + chunk_rows)
+        matrix[start:stop] = tsplib_distance(coordinates[start:stop, None, :], coordinates[None, :, :], metric)
+    return matrix
+
+
+class _OracleRow:
+    """oracle[i]: supports oracle[i][j] in O(1), and np.asarray(oracle[i]) through the row cache."""
+
+    __slots__ = ('oracle', 'index')
+
+    def __init__(self, oracle: 'DistanceOracle', index: int):
+        self.oracle = oracle
+        self.index = index
+
+    def __getitem__(self, j):
+        return self.oracle[self.index, j]
+
+    def __len__(self) -> int:
+        return len(self.oracle)
+
+    def __array__(self, dtype=None, copy=None):
+        row = self.oracle.row(self.index)
+        return row if dtype is None else row.astype(dtype)
+
+
+class DistanceOracle:
+    """
+    Distance "matrix" computed on demand from the coordinates, for instances too large for n^2 memory.
+
+    Supports the indexing the fitness code uses on a dense matrix: oracle[a, b] with integers or
+    integer arrays (broadcast like numpy fancy indexing), oracle[a][b], len(), shape and dtype.
+    Whole rows from row(i) are kept in an LRU cache of cache_rows rows.
+    """
+
+    def __init__(self, coordinates, metric: str = 'EUC_2D', cache_rows: int = 64, dtype=np.float64):
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE '{metric}', expected one of {METRICS}")
+        self.coordinates = np.ascontiguousarray(coordinates, dtype=np.float64)
+        self.metric = metric
+        self.cache_rows = cache_rows
+        self.dtype = np.dtype(dtype)
+        self.shape = (len(self.coordinates), len(self.coordinates))
+        self.ndim = 2
+        self._rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def row(self, i: int) -> np.ndarray:
+        """All distances from city i (read-only, cached)."""
+        i = int(i)
+        row = self._rows.get(i)
+        if row is not None:
+            self.hits += 1
+            self._rows.move_to_end(i)
+            return row
+        self.misses += 1
+        row = tsplib_distance(self.coordinates[i], self.coordinates, self.metric).astype(self.dtype)
+        row.flags.writeable = False
+        self._rows[i] = row
+        if len(self._rows) > self.cache_rows:
+            self._rows.popitem(last=False)
+        return row
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            if np.ndim(key) == 0:
+                return _OracleRow(self, int(key))
+            return np.stack([self.row(i) for i in np.asarray(key).ravel()]).reshape(np.shape(key) + (len(self),))
+        a, b = key
+        if np.ndim(a) == 0 and int(a) in self._rows:
+            return self._rows[int(a)][b]
+        distance = tsplib_distance(self.coordinates[a], self.coordinates[b], self.metric).astype(self.dtype)
+        return distance if np.ndim(distance) else distance[()]
+
+    def __array__(self, dtype=None, copy=None):
+        # Only sensible for small instances; large ones should never be materialized
+        return tsplib_distance_matrix(self.coordinates, self.metric, dtype or self.dtype)
+
+    def stats(self) -> dict:
+        return {'rows': len(self._rows), 'hits': self.hits, 'misses': self.misses}
+
+
+@dataclass
+class TSPLIBInstance:
+    """A parsed TSPLIB/CVRPLIB instance. Node k of the file is index k - 1 (cities are 0-based here)."""
+    name: str = ''
+    type: str = 'TSP'
+    comment: str = ''
+    dimension: int = 0
+    edge_weight_type: str = 'EUC_2D'
+    capacity: int = None
+    coordinates: np.ndarray = None
+    demands: np.ndarray = None
+    depots: List[int] = field(default_factory=list)
+    node_ids: np.ndarray = None
+
+    @property
+    def locations(self) -> List[Tuple[float, float]]:
+        return [tuple(point) for point in self.coordinates.tolist()]
+
+    @property
+    def weights(self) -> List[int]:
+        return None if self.demands is None else self.demands.tolist()
+
+    @property
+    def depot(self) -> int:
+        return self.depots[0] if self.depots else 0
+
+    def to_dict(self) -> dict:
+        """JSON-serializable copy (plain lists instead of arrays), e.g. for checkpoint metadata."""
+        return {key: value.tolist() if isinstance(value, np.ndarray) else value
+                for key, value in self.__dict__.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TSPLIBInstance':
+        """Inverse of to_dict."""
+        data = dict(data)
+        for key, dtype in (('coordinates', np.float64), ('demands', np.int64), ('node_ids', np.int64)):
+            if data.get(key) is not None:
+                data[key] = np.asarray(data[key], dtype=dtype)
+        return cls(**data)
+
+    def distance_matrix(self, dtype=np.float64) -> np.ndarray:
+        return tsplib_distance_matrix(self.coordinates, self.edge_weight_type, dtype)
+
+    def distance_oracle(self, cache_rows: int = 64, dtype=np.float64) -> DistanceOracle:
+        return DistanceOracle(self.coordinates, self.edge_weight_type, cache_rows, dtype)
+
+    def distances(self, max_dense: int = DENSE_MATRIX_LIMIT):
+        """Dense matrix up to max_dense cities, DistanceOracle above."""
+        return self.distance_matrix() if self.dimension <= max_dense else self.distance_oracle()
+
+    def depot_first(self) -> 'TSPLIBInstance':
+        """Copy with the depot swapped to index 0, where the fitness functions expect it."""
+        depot = self.depot
+        if depot == 0:
+            return self
+        order = np.arange(self.dimension)
+        order[[0, depot]] = order[[depot, 0]]
+        return TSPLIBInstance(self.name, self.type, self.comment, self.dimension, self.edge_weight_type,
+                              self.capacity, self.coordinates[order],
+                              None if self.demands is None else self.demands[order],
+                              [0] + [int(np.nonzero(order == d)[0][0]) for d in self.depots[1:]],
+                              self.node_ids[order])
+
+
+def _section_rows(lines, count: int):
+    """
+    Yield the split non-blank lines of a section, stopping after count rows.
+
+    A negative count never stops: the caller breaks on its own terminator (the -1 closing
+    DEPOT_SECTION). Keywords are not detected, since a consumed line cannot be handed back.
+    """
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        yield parts
+        count -= 1
+        if count == 0:
+            return
+
+
+def parse_tsplib(lines: Iterable[str]) -> TSPLIBInstance:
+    """
+    Parse a TSPLIB/CVRPLIB file from any iterable of lines (an open file, StringIO, ...).
+
+    Lines are consumed one at a time and the coordinates go straight into a preallocated
+    array, so memory stays O(n) for 100k-node files. Reads the specification keywords and
+    NODE_COORD_SECTION, DEMAND_SECTION and DEPOT_SECTION; other sections are skipped.
+    Explicit-matrix instances (EDGE_WEIGHT_TYPE EXPLICIT) are rejected.
+
+    Returns:
+    TSPLIBInstance: The instance, with coordinates and demands in node order.
+    """
+    instance = TSPLIBInstance()
+    lines = iter(lines)
+    index_of = {}
+    ids, rows = [], []
+
+    def node_index(node_id: int) -> int:
+        if node_id in index_of:
+            return index_of[node_id]
+        # Files number their nodes 1..n in order; fall back to the id only if a section comes first
+        return node_id - 1
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        keyword, _, value = line.partition(':')
+        keyword, value = keyword.strip().upper(), value.strip()
+
+        if keyword == 'EOF':
+            break
+        elif keyword == 'NAME':
+            instance.name = value
+        elif keyword == 'TYPE':
+            instance.type = value.upper()
+        elif keyword == 'COMMENT':
+            instance.comment = (instance.comment + '\n' + value).strip()
+        elif keyword == 'DIMENSION':
+            instance.dimension = int(value)
+        elif keyword == 'CAPACITY':
+            instance.capacity = int(float(value))
+        elif keyword == 'EDGE_WEIGHT_TYPE':
+            instance.edge_weight_type = value.upper()
+        elif keyword.endswith('_SECTION') and instance.dimension <= 0:
+            raise ValueError(f"{keyword} before a positive DIMENSION")
+        elif keyword == 'NODE_COORD_SECTION':
+            n = instance.dimension
+            coordinates = np.empty((n, 2), dtype=np.float64)
+            node_ids = np.empty(n, dtype=np.int64)
+            for k, parts in enumerate(_section_rows(lines, n)):
+                node_ids[k] = int(parts[0])
+                coordinates[k] = float(parts[1]), float(parts[2])
+                index_of[int(parts[0])] = k
+            instance.coordinates, instance.node_ids = coordinates, node_ids
+        elif keyword == 'DEMAND_SECTION':
+            demands = np.zeros(instance.dimension, dtype=np.int64)
+            for parts in _section_rows(lines, instance.dimension):
+                demands[node_index(int(parts[0]))] = int(float(parts[1]))
+            instance.demands = demands
+        elif keyword == 'DEPOT_SECTION':
+            for parts in _section_rows(lines, -1):
+                if int(parts[0]) == -1:
+                    break
+                instance.depots.append(node_index(int(parts[0])))
+        # Other keywords and sections (DISPLAY_DATA_SECTION, ...) are not used; their data
+        # lines fall through here as unknown keywords and are skipped as well
+
+    if instance.coordinates is None:
+        raise ValueError("Instance has no NODE_COORD_SECTION")
+    if instance.edge_weight_type not in METRICS:
+        raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE '{instance.edge_weight_type}', expected one of {METRICS}")
+    return instance
+
+
+def load_tsplib(path: str) -> TSPLIBInstance:
+    """Parse a .tsp / .vrp file (optionally gzip-compressed)."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return parse_tsplib(f)
+
+
+def tour_length(tour: List[int], distance_matrix) -> float:
+    """Closed tour length under any matrix or DistanceOracle."""
+    tour = np.asarray(tour)
+    return float(np.sum(distance_matrix[tour, np.roll(tour, -1)]))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load a TSPLIB/CVRPLIB instance and print a summary.")
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    instance = load_tsplib(args.path)
+    distances = instance.distances()
+    print(f"{instance.name}: {instance.type}, {instance.dimension} nodes, {instance.edge_weight_type}, "
+          f"capacity {instance.capacity}, depot {instance.depot}")
+    print(f"Distances: {'dense matrix' if isinstance(distances, np.ndarray) else 'on-demand oracle'}")
+    print(f"Identity tour length: {tour_length(list(range(instance.dimension)), distances):.0f}")
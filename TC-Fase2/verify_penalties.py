@@ -10,7 +10,8 @@ def test_penalties():
         (50.0, 0.0)    # Index 2 (The city in the middle)
     ]
     
-    matrix = generate_distance_matrix(cities)
+    # The penalty is opt-in: the CVRP simulation uses plain Euclidean distances
+    matrix = generate_distance_matrix(cities, penalize_intersections=True)
     
     # Distance 0->1 should be 100 + penalty
     dist_0_1 = matrix[0][1]